@@ -1,3 +1,5 @@
+import multiprocessing
+
 import loguru
 from PySide6.QtWidgets import QApplication
 
@@ -15,4 +17,6 @@ def main():
 
 
 if __name__ == '__main__':
+    # 打包之后多进程处理帧的子进程需要
+    multiprocessing.freeze_support()
     main()
@@ -3,6 +3,7 @@ from pathlib import Path
 
 import loguru
 
+from src.common.analysis_cache import AnalysisCache
 from src.core.enums import Orientation
 
 description = """批量视频处理工具
@@ -13,9 +14,13 @@ parser = argparse.ArgumentParser(description=description)
 parser.add_argument('-i', '--input', type=str, help='包含视频文件地址的txt文件的地址')
 parser.add_argument("--video_oritation", type=str, default='horization', choices=['vertical', 'horization'],
                     help='视频的方向')
+parser.add_argument("--clear_cache", action='store_true', help='清空视频分析缓存,所有视频都会重新分析')
 
 
 def parse_args():
+    if parser.parse_args().clear_cache:
+        AnalysisCache().clear()
+
     # 解析视频文件地址
     input_txt_path: Path = Path(parser.parse_args().input)
     video_path_list: list[Path] = []
@@ -0,0 +1,59 @@
+"""对比逐帧读取配置和预先编译处理计划的每帧额外开销
+
+只启用剪裁、旋转和缩放,并且使用很小的帧,这样测出来的时间主要是读取配置和调度处理器的开销
+
+运行方式(在项目根目录):
+    python -m scripts.benchmark_processing_plan
+"""
+import timeit
+
+import numpy as np
+
+from src.common.processors.opencv_processors.opencv_processor_manager import OpenCVProcessorManager
+from src.common.processors.processor_global_var import ProcessorGlobalVar
+from src.config import SuperResolutionAlgorithm, VideoNoiseReduction, cfg
+from src.core.enums import Orientation
+
+FRAME_COUNT: int = 20000
+
+
+def prepare() -> OpenCVProcessorManager:
+    # 关闭所有重处理器,只保留几何变换,配置不写入文件
+    cfg.set(cfg.white_balance, False, save=False)
+    cfg.set(cfg.brightness_contrast, False, save=False)
+    cfg.set(cfg.deband, False, save=False)
+    cfg.set(cfg.deblock, False, save=False)
+    cfg.set(cfg.video_noise_reduction, VideoNoiseReduction.Disable, save=False)
+    cfg.set(cfg.super_resolution_algorithm, SuperResolutionAlgorithm.Disable, save=False)
+    cfg.set(cfg.merge_video, True, save=False)
+
+    global_var = ProcessorGlobalVar()
+    global_var.update("crop_x", 0)
+    global_var.update("crop_y", 4)
+    global_var.update("crop_width", 64)
+    global_var.update("crop_height", 28)
+    global_var.update("rotation_angle", 0)
+    global_var.update("orientation", Orientation.HORIZONTAL)
+    global_var.update("target_width", 64)
+    global_var.update("target_height", 36)
+    return OpenCVProcessorManager()
+
+
+def benchmark(name: str, func, frame: np.ndarray) -> float:
+    seconds: float = min(timeit.repeat(lambda: func(frame), number=FRAME_COUNT, repeat=3))
+    per_frame_us: float = seconds / FRAME_COUNT * 1e6
+    print(f"{name}: {per_frame_us:.2f}us/帧")
+    return per_frame_us
+
+
+def main():
+    manager = prepare()
+    frame = np.zeros((36, 64, 3), dtype=np.uint8)
+
+    before: float = benchmark("每帧读取配置(OpenCVProcessorManager.process)", manager.process, frame)
+    after: float = benchmark("预先编译(ProcessingPlan.process)", manager.compile_plan().process, frame)
+    print(f"每帧减少{before - after:.2f}us, 约为原来的{after / before:.0%}")
+
+
+if __name__ == '__main__':
+    main()
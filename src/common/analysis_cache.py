@@ -0,0 +1,113 @@
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+
+import loguru
+
+from src.core.datacls import CropInfo, VideoInfo
+from src.core.paths import ANALYSIS_CACHE_FILE
+from src.utils import singleton
+
+# 计算内容哈希时读取文件开头和结尾的字节数
+HASH_CHUNK_SIZE: int = 64 * 1024
+
+
+@singleton
+class AnalysisCache:
+    """视频分析结果(视频信息和去黑边结果)的持久化缓存
+
+    键为(路径, 文件大小, 修改时间, 首尾内容哈希, 去黑边算法, 去黑边采样帧数),输入视频和分析参数都没有变化时直接返回上一次的结果,
+    不再重新分析。缓存条数超过上限之后按照最近使用时间淘汰
+    """
+
+    def __init__(self, cache_file: Path = ANALYSIS_CACHE_FILE, max_entries: int = 5000):
+        self._cache_file: Path = cache_file
+        self._max_entries: int = max_entries
+        self._lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+
+    def get(self, video_path: Path, algorithm: str, sample_frame_number: int) -> VideoInfo | None:
+        key = self._get_key(video_path, algorithm, sample_frame_number)
+        with self._lock:
+            connection = self._get_connection()
+            row = connection.execute(
+                    'SELECT fps, frame_count, width, height, crop_x, crop_y, crop_w, crop_h '
+                    'FROM analysis WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            connection.execute('UPDATE analysis SET last_used = (SELECT MAX(last_used) + 1 FROM analysis) '
+                               'WHERE key = ?', (key,))
+            connection.commit()
+
+        fps, frame_count, width, height, crop_x, crop_y, crop_w, crop_h = row
+        crop: CropInfo | None = None
+        if crop_x is not None:
+            crop = CropInfo(crop_x, crop_y, crop_w, crop_h)
+        loguru.logger.debug(f'命中视频分析缓存: {video_path}')
+        return VideoInfo(video_path=Path(video_path),
+                         fps=fps,
+                         frame_count=frame_count,
+                         width=width,
+                         height=height,
+                         crop=crop)
+
+    def put(self, video_info: VideoInfo, algorithm: str, sample_frame_number: int) -> None:
+        key = self._get_key(video_info.video_path, algorithm, sample_frame_number)
+        crop = video_info.crop
+        with self._lock:
+            connection = self._get_connection()
+            connection.execute(
+                    'INSERT OR REPLACE INTO analysis '
+                    '(key, fps, frame_count, width, height, crop_x, crop_y, crop_w, crop_h, last_used) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, (SELECT COALESCE(MAX(last_used), 0) + 1 FROM analysis))',
+                    (key, video_info.fps, video_info.frame_count, video_info.width, video_info.height,
+                     crop.x if crop else None, crop.y if crop else None,
+                     crop.w if crop else None, crop.h if crop else None))
+            # last_used是递增的使用序号,淘汰最久没有使用的记录
+            connection.execute(
+                    'DELETE FROM analysis WHERE key IN '
+                    '(SELECT key FROM analysis ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+                    (self._max_entries,))
+            connection.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            connection = self._get_connection()
+            connection.execute('DELETE FROM analysis')
+            connection.commit()
+        loguru.logger.info('视频分析缓存已清空')
+
+    def _get_connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._cache_file.parent.mkdir(parents=True, exist_ok=True)
+            # 多个分析线程共用同一个连接,由self._lock保证同一时间只有一个线程在访问
+            self._connection = sqlite3.connect(self._cache_file, check_same_thread=False)
+            self._connection.execute(
+                    'CREATE TABLE IF NOT EXISTS analysis ('
+                    'key TEXT PRIMARY KEY, fps INTEGER, frame_count INTEGER, width INTEGER, height INTEGER, '
+                    'crop_x INTEGER, crop_y INTEGER, crop_w INTEGER, crop_h INTEGER, last_used INTEGER)')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS analysis_last_used ON analysis (last_used)')
+            self._connection.commit()
+        return self._connection
+
+    def _get_key(self, video_path: Path, algorithm: str, sample_frame_number: int) -> str:
+        video_path = Path(video_path).resolve()
+        stat = video_path.stat()
+        return '|'.join([str(video_path),
+                         str(stat.st_size),
+                         str(stat.st_mtime_ns),
+                         self._get_content_hash(video_path, stat.st_size),
+                         algorithm,
+                         str(sample_frame_number)])
+
+    @staticmethod
+    def _get_content_hash(video_path: Path, file_size: int) -> str:
+        # 只读取开头和结尾的一小部分,防止文件被替换但是大小和修改时间恰好相同
+        sha1 = hashlib.sha1()
+        with open(video_path, 'rb') as f:
+            sha1.update(f.read(HASH_CHUNK_SIZE))
+            if file_size > HASH_CHUNK_SIZE * 2:
+                f.seek(-HASH_CHUNK_SIZE, 2)
+                sha1.update(f.read(HASH_CHUNK_SIZE))
+        return sha1.hexdigest()
@@ -0,0 +1,162 @@
+import math
+from collections import Counter
+from typing import Iterable, Iterator
+
+import cv2
+import numpy as np
+
+from src.config import cfg
+
+# 精修的时候最多使用多少帧
+REFINE_FRAME_COUNT: int = 5
+
+
+def read_frames(video: cv2.VideoCapture, indices: list[int]) -> Iterator[np.ndarray]:
+    """按照帧序号读取原始分辨率的帧,用于精修"""
+    for index in indices:
+        video.set(cv2.CAP_PROP_POS_FRAMES, index)
+        ret, frame = video.read()
+        if ret:
+            yield frame
+
+
+def refine_content_rect(frame: np.ndarray,
+                        rect: tuple[int, int, int, int],
+                        margin: int,
+                        threshold: int = 30,
+                        min_content_ratio: float = 0.1) -> tuple[int, int, int, int]:
+    """在原始分辨率下重新确定主体区域的四条边,只读取每条边附近margin个像素宽的条带
+
+    一行(或者一列)里面亮度大于threshold的像素占比不低于min_content_ratio时认为是画面内容,
+    条带里面找不到画面内容的时候保留原来的边
+
+    Args:
+        frame: 原始分辨率的BGR帧
+        rect: 缩小分析之后映射回原始分辨率的主体区域(x, y, w, h)
+        margin: 每条边向内外各搜索多少个像素
+        threshold: 亮度阈值,低于这个值认为是黑色
+        min_content_ratio: 一行或者一列被认为是画面内容所需要的亮像素占比
+
+    Returns:
+        精修之后的主体区域(x, y, w, h)
+    """
+    height, width = frame.shape[:2]
+    x, y, w, h = rect
+    left, top, right, bottom = x, y, x + w, y + h
+
+    def get_profile(strip: np.ndarray, axis: int) -> np.ndarray:
+        gray: np.ndarray = cv2.cvtColor(strip, cv2.COLOR_BGR2GRAY) if strip.ndim == 3 else strip
+        return np.count_nonzero(gray > threshold, axis=axis) >= min_content_ratio * gray.shape[axis]
+
+    # 上下两条边只看主体区域范围内的列,左右两条边只看主体区域范围内的行
+    start, end = max(0, top - margin), min(height, top + margin)
+    rows = np.flatnonzero(get_profile(frame[start:end, left:right], 1))
+    new_top = start + int(rows[0]) if rows.size else top
+
+    start, end = max(0, bottom - margin), min(height, bottom + margin)
+    rows = np.flatnonzero(get_profile(frame[start:end, left:right], 1))
+    new_bottom = start + int(rows[-1]) + 1 if rows.size else bottom
+
+    start, end = max(0, left - margin), min(width, left + margin)
+    columns = np.flatnonzero(get_profile(frame[top:bottom, start:end], 0))
+    new_left = start + int(columns[0]) if columns.size else left
+
+    start, end = max(0, right - margin), min(width, right + margin)
+    columns = np.flatnonzero(get_profile(frame[top:bottom, start:end], 0))
+    new_right = start + int(columns[-1]) + 1 if columns.size else right
+
+    if new_right <= new_left or new_bottom <= new_top:
+        return rect
+    return new_left, new_top, new_right - new_left, new_bottom - new_top
+
+
+class AnalysisScale:
+    """去黑边分析使用的分辨率
+
+    所有去黑边算法都先把帧缩小到分析分辨率再检测,耗时大约和缩放比例的平方成正比,
+    检测出来的区域再映射回原始分辨率,需要的话在原始分辨率下只对边缘附近进行精修
+
+    Examples:
+        >>> scale = AnalysisScale(3840, 2160)
+        >>> small_frame = scale.resize(frame)
+        >>> x, y, w, h = scale.to_source_rect(detect(small_frame))
+    """
+
+    def __init__(self, source_width: int, source_height: int, analysis_height: int | None = None):
+        """
+        Args:
+            source_width: 原始宽度
+            source_height: 原始高度
+            analysis_height: 分析时的高度,0表示不缩小,None表示使用配置
+        """
+        if analysis_height is None:
+            analysis_height = cfg.get(cfg.black_border_analysis_height)
+
+        self.source_width: int = source_width
+        self.source_height: int = source_height
+        # 只缩小不放大
+        if not analysis_height or analysis_height >= source_height:
+            self.width, self.height = source_width, source_height
+        else:
+            self.height = analysis_height
+            self.width = max(1, round(source_width * analysis_height / source_height))
+
+    @property
+    def is_scaled(self) -> bool:
+        return (self.width, self.height) != (self.source_width, self.source_height)
+
+    @property
+    def area_ratio(self) -> float:
+        """分析分辨率和原始分辨率的面积比,用来换算以像素面积为单位的阈值"""
+        return (self.width * self.height) / (self.source_width * self.source_height)
+
+    def resize(self, frame: np.ndarray) -> np.ndarray:
+        """缩小到分析分辨率,INTER_AREA会对每一个像素取平均,细线和噪点不会被跳过"""
+        if frame.shape[:2] == (self.height, self.width):
+            return frame
+        return cv2.resize(frame, (self.width, self.height), interpolation=cv2.INTER_AREA)
+
+    def to_gray(self, frame: np.ndarray, dst: np.ndarray | None = None) -> np.ndarray:
+        """先缩小再转换为灰度,颜色转换只需要处理缩小之后的像素,已经是灰度的帧直接复制"""
+        frame = self.resize(frame)
+        if frame.ndim == 2:
+            if dst is None:
+                return frame.copy()
+            np.copyto(dst, frame)
+            return dst
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=dst)
+
+    def to_source_rect(self, rect: tuple[int, int, int, int]) -> tuple[int, int, int, int]:
+        """把分析分辨率下的区域映射回原始分辨率,向外取整,保证不会剪掉画面"""
+        if not self.is_scaled:
+            return rect
+        x, y, w, h = rect
+        scale_x: float = self.source_width / self.width
+        scale_y: float = self.source_height / self.height
+        left: int = max(0, math.floor(x * scale_x))
+        top: int = max(0, math.floor(y * scale_y))
+        right: int = min(self.source_width, math.ceil((x + w) * scale_x))
+        bottom: int = min(self.source_height, math.ceil((y + h) * scale_y))
+        return left, top, right - left, bottom - top
+
+    def get_refine_margin(self) -> int:
+        """精修时每条边搜索的范围,覆盖缩小时一个像素对应的原始像素再多留一个像素"""
+        scale: float = max(self.source_width / self.width, self.source_height / self.height)
+        return math.ceil(scale) + 1
+
+    def refine(self,
+               frames: Iterable[np.ndarray],
+               rect: tuple[int, int, int, int],
+               threshold: int = 30,
+               min_content_ratio: float = 0.1) -> tuple[int, int, int, int]:
+        """使用几帧原始分辨率的帧精修主体区域,取出现次数最多的结果
+
+        没有缩小或者没有开启精修的时候直接返回原来的区域,
+        threshold和min_content_ratio需要和检测时使用的参数一致,否则精修会把边缘移到别的位置
+        """
+        if not self.is_scaled or not cfg.get(cfg.black_border_refine_enabled):
+            return rect
+
+        margin: int = self.get_refine_margin()
+        rects = [refine_content_rect(frame, rect, margin, threshold, min_content_ratio) for frame in frames]
+        return Counter(rects).most_common(1)[0][0] if rects else rect
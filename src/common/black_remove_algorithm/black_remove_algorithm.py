@@ -1,8 +1,42 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
+from typing import Callable
+
+from src.signal_bus import SignalBus
+
+# 进度回调(当前值, 最大值)
+ProgressCallback = Callable[[int, int], None]
 
 
 class BlackRemoveAlgorithm(ABC):
     @abstractmethod
-    def remove_black(self, input_file_path: str | Path) -> tuple[int, int, int, int]:
+    def remove_black(self, input_file_path: str | Path,
+                     progress_callback: ProgressCallback | None = None) -> tuple[int, int, int, int]:
+        """
+        Args:
+            input_file_path: 视频路径
+            progress_callback: 进度回调(当前帧, 总帧数),传入之后进度不再直接发送到详细进度条,
+                多个视频并行分析时由调用方自行汇总
+
+        Returns:
+            主体区域(x, y, w, h)
+        """
         pass
+
+    @staticmethod
+    def get_progress_callback(progress_callback: ProgressCallback | None) -> ProgressCallback:
+        """没有传入进度回调的时候返回一个直接更新详细进度条的回调,总进度条始终由调用方负责"""
+        if progress_callback is not None:
+            return progress_callback
+
+        signal_bus = SignalBus()
+        last_total: int | None = None
+
+        def callback(current: int, total: int):
+            nonlocal last_total
+            if total != last_total:
+                last_total = total
+                signal_bus.set_detail_progress_max.emit(total)
+            signal_bus.set_detail_progress_current.emit(current)
+
+        return callback
@@ -0,0 +1,121 @@
+import re
+import subprocess
+from collections import Counter
+from pathlib import Path
+
+import cv2
+import loguru
+
+from src.common.black_remove_algorithm.analysis_scale import AnalysisScale, REFINE_FRAME_COUNT, read_frames
+from src.common.black_remove_algorithm.black_remove_algorithm import BlackRemoveAlgorithm, ProgressCallback
+from src.common.black_remove_algorithm.frame_sampler import probe_keyframe_sampling
+from src.common.media_probe import MediaProbe
+from src.common.process_runner import ProcessRunner
+from src.config import cfg
+from src.core.paths import FFMPEG_FILE
+# [Parsed_cropdetect_2 @ 000001] x1:0 x2:639 y1:47 y2:312 w:640 h:266 x:0 y:47 pts:1001 t:0.033 ... crop=640:266:0:47
+CROPDETECT_PATTERN: re.Pattern = re.compile(r'\bt:(?P<t>[\d.]+)\b.*?\bcrop=(?P<w>\d+):(?P<h>\d+):(?P<x>\d+):(?P<y>\d+)')
+
+
+def parse_cropdetect_log(lines: list[str]) -> list[tuple[float, tuple[int, int, int, int]]]:
+    """从ffmpeg的日志里面读取cropdetect每一帧的结果
+
+    Args:
+        lines: ffmpeg的stderr的每一行
+
+    Returns:
+        (帧的时间, (x, y, w, h)),整帧都是黑色的帧cropdetect会输出负数的宽高,这些帧会被忽略
+    """
+    rects: list[tuple[float, tuple[int, int, int, int]]] = []
+    for line in lines:
+        if 'cropdetect' not in line or (match := CROPDETECT_PATTERN.search(line)) is None:
+            continue
+        x, y, w, h = (int(match.group(each)) for each in ('x', 'y', 'w', 'h'))
+        if w > 0 and h > 0:
+            rects.append((float(match.group('t')), (x, y, w, h)))
+    return rects
+
+
+class CropDetectBlackRemover(BlackRemoveAlgorithm):
+    """使用ffmpeg的cropdetect滤镜寻找黑边
+
+    跳帧、缩小和检测都在ffmpeg里面完成,解码可以使用多线程,Python只需要解析日志,
+    适合一次处理大量视频。每一帧的结果取出现次数最多的区域,再在原始分辨率下精修边缘
+    """
+
+    def __init__(self, threshold: int = 30):
+        self.threshold: int = threshold
+        self._process_runner = ProcessRunner()
+
+    def remove_black(self, input_file_path: str | Path,
+                     progress_callback: ProgressCallback | None = None) -> tuple[int, int, int, int]:
+        input_file_path: Path = Path(input_file_path)
+        # 如果不是视频则报错
+        if input_file_path.suffix not in ['.mp4', '.avi', '.flv', '.mov', '.mkv']:
+            raise ValueError(f"文件不是视频: {input_file_path}")
+
+        # 如果不存在则报错
+        if not input_file_path.exists():
+            raise FileNotFoundError(f"文件不存在: {input_file_path}")
+
+        media_info = MediaProbe().probe(input_file_path)
+        total_frames: int = media_info.frame_count
+        width: int = media_info.display_width
+        height: int = media_info.display_height
+        # 限制最大采样帧数,不然长时间的视频会导致等待时间过长
+        sample_frames: int = max(1, min(cfg.get(cfg.video_sample_frame_number), int(total_frames * 0.5)))
+        scale = AnalysisScale(width, height)
+
+        command: list[str] = self.get_command(input_file_path, scale, total_frames, sample_frames)
+        loguru.logger.debug(f"FFmpeg命令: {subprocess.list2cmdline(command)}")
+        result = self._process_runner.run(command, stdin=subprocess.DEVNULL)
+        if result.returncode != 0:
+            loguru.logger.critical(f"FFmpeg命令运行失败: {command}, 错误信息: {result.stderr}")
+            raise subprocess.CalledProcessError(result.returncode, command, stderr=result.stderr)
+
+        # 命令里面使用了-copyts,t是视频流原始的时间戳,减去第一帧的时间戳之后才能换算成帧序号
+        detected: list[tuple[int, tuple[int, int, int, int]]] = [
+            (max(0, round((t - media_info.start_time) * media_info.fps)), scale.to_source_rect(rect))
+            for t, rect in parse_cropdetect_log(result.stderr.splitlines())]
+        if detected:
+            x, y, w, h = Counter(rect for _, rect in detected).most_common(1)[0][0]
+            # 只用检测结果和最终结果一致的几帧在原始分辨率下精修边缘
+            refine_indices: list[int] = [index for index, rect in detected if rect == (x, y, w, h)]
+            video = cv2.VideoCapture(str(input_file_path))
+            x, y, w, h = scale.refine(read_frames(video, refine_indices[:REFINE_FRAME_COUNT]), (x, y, w, h),
+                                      self.threshold)
+            video.release()
+        else:
+            x, y, w, h = 0, 0, width, height
+
+        # 分析全部在ffmpeg里面完成,只在结束的时候更新一次进度
+        self.get_progress_callback(progress_callback)(total_frames, total_frames)
+
+        loguru.logger.debug(f'[{input_file_path.name}]的主体区域坐标为{x, y, w, h}')
+        return x, y, w, h
+
+    def get_command(self, input_file_path: Path,
+                    scale: AnalysisScale,
+                    total_frames: int,
+                    sample_frames: int) -> list[str]:
+        """生成cropdetect的ffmpeg命令,每一帧单独检测,不累计之前帧的结果"""
+        input_options: list[str] = []
+        # 关键帧足够多的时候只解码关键帧,否则解码全部帧之后等间隔选取
+        if keyframe_step := probe_keyframe_sampling(input_file_path, total_frames, sample_frames):
+            input_options = ['-skip_frame', 'nokey']
+            step: int = keyframe_step
+        else:
+            step = max(1, total_frames // sample_frames)
+
+        video_filters: list[str] = []
+        if step > 1:
+            video_filters.append(f"select='not(mod(n\\,{step}))'")
+        if scale.is_scaled:
+            video_filters.append(f'scale={scale.width}:{scale.height}:flags=area')
+        # round=2保留最精确的边缘,reset=1让每一帧单独输出结果,skip=0不跳过开头的帧
+        video_filters.append(f'cropdetect=limit={self.threshold}:round=2:reset=1:skip=0')
+        # -copyts保留原始时间戳,不被ffmpeg按照整个文件的起始时间平移
+        return [str(FFMPEG_FILE), '-hide_banner', '-nostats', '-threads', '0', *input_options, '-copyts',
+                '-i', str(input_file_path),
+                '-an', '-sn', '-vf', ','.join(video_filters),
+                '-fps_mode', 'passthrough', '-frames:v', str(sample_frames), '-f', 'null', '-']
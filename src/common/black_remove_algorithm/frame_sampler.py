@@ -0,0 +1,160 @@
+import math
+from pathlib import Path
+from typing import Iterator
+
+import cv2
+import loguru
+import numpy as np
+
+from src.common.black_remove_algorithm.analysis_scale import AnalysisScale
+from src.common.ffmpeg_frame_reader import FFmpegFrameReader
+from src.common.media_probe import MediaProbe
+from src.config import cfg
+from src.core.enums import SamplingMode
+
+# 采样间隔超过关键帧间隔的多少倍时改为跳转
+SEEK_STRIDE_RATIO: float = 2.0
+# 读不到关键帧间隔的时候按照x264默认的keyint估算
+DEFAULT_KEYFRAME_INTERVAL: int = 250
+# 关键帧少于这个数量的时候只分析关键帧不够有代表性,改为逐帧采样
+MIN_KEYFRAME_SAMPLES: int = 20
+
+
+def get_sample_indices(total_frames: int, sample_frames: int) -> list[int]:
+    """等间隔选出需要采样的帧序号"""
+    stride: int = max(1, total_frames // sample_frames if sample_frames else 1)
+    return list(range(0, total_frames, stride))
+
+
+def choose_sampling_mode(stride: int, keyframe_interval: int) -> SamplingMode:
+    """根据采样间隔和关键帧间隔选择读取方式
+
+    跳转到任意一帧都要从前一个关键帧开始解码,平均要多解码半个GOP,还要清空解码器;
+    按顺序读取时每一个采样帧要解码stride帧,但是不需要转换颜色。
+    只有采样间隔比GOP大很多的时候跳转才更快
+
+    Args:
+        stride: 相邻两个采样帧之间相差多少帧
+        keyframe_interval: 关键帧间隔,0表示未知
+
+    Returns:
+        读取方式
+    """
+    keyframe_interval = keyframe_interval or DEFAULT_KEYFRAME_INTERVAL
+    return SamplingMode.SEEK if stride > keyframe_interval * SEEK_STRIDE_RATIO else SamplingMode.SEQUENTIAL
+
+
+def probe_sampling_mode(video_path: str | Path, indices: list[int]) -> SamplingMode:
+    """读取视频的关键帧间隔,为这一组采样帧选择读取方式"""
+    if len(indices) < 2:
+        return SamplingMode.SEEK
+    stride: int = indices[1] - indices[0]
+    keyframe_interval: int = MediaProbe().probe_keyframe_interval(video_path)
+    mode: SamplingMode = choose_sampling_mode(stride, keyframe_interval)
+    loguru.logger.debug(f'[{Path(video_path).name}]采样间隔{stride}帧,关键帧间隔{keyframe_interval}帧,使用{mode.name}读取')
+    return mode
+
+
+def read_sample_frames(video: cv2.VideoCapture,
+                       indices: list[int],
+                       mode: SamplingMode) -> Iterator[tuple[int, np.ndarray]]:
+    """按照升序的帧序号读取采样帧,读取失败时停止
+
+    Args:
+        video: 刚打开的视频,顺序读取时从第0帧开始计数
+        indices: 升序的帧序号
+        mode: 读取方式
+
+    Yields:
+        (帧序号, BGR帧)
+    """
+    if mode == SamplingMode.SEEK:
+        for index in indices:
+            video.set(cv2.CAP_PROP_POS_FRAMES, index)
+            ret, frame = video.read()
+            if not ret:
+                return
+            yield index, frame
+        return
+
+    position: int = 0
+    for index in indices:
+        # grab只解码不转换颜色,跳过的帧不需要retrieve
+        while position < index:
+            if not video.grab():
+                return
+            position += 1
+        ret, frame = video.read()
+        if not ret:
+            return
+        position += 1
+        yield index, frame
+
+
+def get_keyframe_step(frame_count: int, keyframe_interval: int, sample_count: int) -> int | None:
+    """只分析关键帧时每隔多少个关键帧取一个,保证采样数量不超过sample_count
+
+    Args:
+        frame_count: 视频总帧数
+        keyframe_interval: 关键帧间隔,0表示未知
+        sample_count: 最多采样多少帧
+
+    Returns:
+        关键帧的采样间隔,关键帧间隔未知或者关键帧太少的时候返回None
+    """
+    if keyframe_interval <= 0 or sample_count <= 0:
+        return None
+    keyframe_count: int = math.ceil(frame_count / keyframe_interval)
+    if keyframe_count < MIN_KEYFRAME_SAMPLES:
+        return None
+    return max(1, math.ceil(keyframe_count / sample_count))
+
+
+def probe_keyframe_sampling(video_path: str | Path, frame_count: int, sample_count: int) -> int | None:
+    """开启了只分析关键帧并且关键帧足够多的时候返回关键帧采样间隔,否则返回None"""
+    if not cfg.get(cfg.black_border_keyframe_only):
+        return None
+    keyframe_interval: int = MediaProbe().probe_keyframe_interval(video_path)
+    keyframe_step: int | None = get_keyframe_step(frame_count, keyframe_interval, sample_count)
+    if keyframe_step is None:
+        loguru.logger.debug(f'[{Path(video_path).name}]的关键帧太少或者无法确定关键帧间隔,使用逐帧采样')
+    return keyframe_step
+
+
+def read_keyframe_samples(video_path: str | Path,
+                          scale: AnalysisScale,
+                          keyframe_step: int,
+                          sample_count: int) -> Iterator[tuple[int, np.ndarray]]:
+    """让ffmpeg只解码关键帧(-skip_frame nokey),在ffmpeg里面缩小到分析分辨率并转换为灰度,通过管道读取
+
+    非关键帧完全不解码,长视频的分析时间基本上只取决于读取文件的速度。
+    GOP的长度不一定固定,返回的序号只是第几个采样,不能当作帧序号用来跳转,所以这里读到的帧不做精修
+
+    注意:
+        返回的帧会被下一帧覆盖,需要保留的话请自行复制
+
+    Args:
+        video_path: 视频路径
+        scale: 分析分辨率
+        keyframe_step: 每隔多少个关键帧取一个
+        sample_count: 最多读取多少帧
+
+    Yields:
+        (第几个采样, 分析分辨率下的灰度帧)
+
+    Raises:
+        OSError: 无法启动ffmpeg
+        subprocess.CalledProcessError: ffmpeg解码失败
+    """
+    video_filters: list[str] = []
+    if keyframe_step > 1:
+        # select里面的n是进入滤镜的帧序号,这里只有关键帧
+        video_filters.append(f"select='not(mod(n\\,{keyframe_step}))'")
+    video_filters.append(f'scale={scale.width}:{scale.height}:flags=area')
+    reader = FFmpegFrameReader(Path(video_path), scale.width, scale.height, video_filters,
+                               buffer_count=1,
+                               input_options=['-skip_frame', 'nokey'],
+                               output_options=['-fps_mode', 'passthrough', '-frames:v', str(sample_count)],
+                               pix_fmt='gray')
+    with reader:
+        yield from enumerate(reader)
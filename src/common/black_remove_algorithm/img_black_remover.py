@@ -1,16 +1,21 @@
+import subprocess
 from collections import Counter
 from pathlib import Path
+from typing import Callable, Iterator
 
 import cv2
 import loguru
 import numpy as np
 
-from src.common.black_remove_algorithm.black_remove_algorithm import BlackRemoveAlgorithm
+from src.common.black_remove_algorithm.analysis_scale import AnalysisScale, REFINE_FRAME_COUNT, read_frames
+from src.common.black_remove_algorithm.black_remove_algorithm import BlackRemoveAlgorithm, ProgressCallback
+from src.common.black_remove_algorithm.frame_sampler import (get_sample_indices, probe_keyframe_sampling,
+                                                             probe_sampling_mode, read_keyframe_samples,
+                                                             read_sample_frames)
+from src.common.media_probe import MediaProbe
 from src.common.utils.image_utils import ImageUtils
-from src.signal_bus import SignalBus
-
-signal_bus = SignalBus()
-
+from src.config import cfg
+from src.core.enums import SamplingMode
 
 class IMGBlackRemover(BlackRemoveAlgorithm):
     def __init__(self, threshold: int = 30, border_width: int = 5):
@@ -19,7 +24,9 @@ class IMGBlackRemover(BlackRemoveAlgorithm):
 
         self._image_utils = ImageUtils()
 
-    def remove_black(self, input_file_path: str | Path, max_frames: int = 500) -> tuple[int, int, int, int]:
+    def remove_black(self, input_file_path: str | Path,
+                     progress_callback: ProgressCallback | None = None,
+                     max_frames: int | None = None) -> tuple[int, int, int, int]:
         input_file_path: Path = Path(input_file_path)
         # 如果不是视频则报错
         if input_file_path.suffix not in ['.mp4', '.avi', '.flv', '.mov', '.mkv']:
@@ -29,57 +36,76 @@ class IMGBlackRemover(BlackRemoveAlgorithm):
         if not input_file_path.exists():
             raise FileNotFoundError(f"文件不存在: {input_file_path}")
 
+        media_info = MediaProbe().probe(input_file_path)
+        total_frames = media_info.frame_count
+        width: int = media_info.display_width
+        height: int = media_info.display_height
         video = cv2.VideoCapture(str(input_file_path))
-        total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
-        width: int = int(video.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height: int = int(video.get(cv2.CAP_PROP_FRAME_HEIGHT))
         # 如果有黑边则需要获取主体区域坐标(只获取部分百比分帧)
         sample_frames = int(total_frames * 0.5)
         # 限制最大采样帧数,不然长时间的视频会导致等待时间过长
-        sample_frames = min([max_frames, sample_frames])
-        # 计算每次需要跳过的帧数
-        skip_frames = total_frames // sample_frames if sample_frames else 0
-
-        coordinates = []
-        if skip_frames <= 0:
-            skip_frames = 1
-        for i in range(0, total_frames, skip_frames):
-            video.set(cv2.CAP_PROP_POS_FRAMES, i)
-            ret, frame = video.read()
-
-            # 获取进度条增加的数量
-            signal_bus.set_detail_progress_current.emit(i)
-            if not ret:
-                break
-            # Use BlackRemover to get the coordinates of the frame without black borders
-            coordinates.append(self._analyze_each_frame(frame))
-
-        signal_bus.set_detail_progress_finish.emit()
-        signal_bus.advance_total_progress.emit(1)
-        video.release()
+        sample_frames = min([max_frames or cfg.get(cfg.video_sample_frame_number), sample_frames])
+
+        report_progress: ProgressCallback = self.get_progress_callback(progress_callback)
+        # 先缩小到分析分辨率再检测,检测结果映射回原始分辨率
+        scale = AnalysisScale(width, height)
+        coordinates: list[tuple[int, tuple[int, int, int, int]]] = []
+        # 优先让ffmpeg只解码关键帧,失败或者关键帧太少的时候使用OpenCV逐帧采样
+        if keyframe_step := probe_keyframe_sampling(input_file_path, total_frames, sample_frames):
+            try:
+                # 关键帧返回的是第几个采样,进度按照采样数量计算
+                coordinates = self._analyze_frames(
+                        read_keyframe_samples(input_file_path, scale, keyframe_step, sample_frames), scale,
+                        lambda current: report_progress(current, sample_frames))
+            except (OSError, subprocess.CalledProcessError) as e:
+                loguru.logger.warning(f'[{input_file_path.name}]只分析关键帧失败,改为逐帧采样: {e}')
+                coordinates = []
+        # 关键帧的采样序号不是帧序号,无法跳转回去精修
+        is_keyframe_sampling: bool = bool(coordinates)
+        if not coordinates:
+            sample_indices: list[int] = get_sample_indices(total_frames, sample_frames)
+            # 根据采样间隔和关键帧间隔选择顺序读取或者跳转读取
+            sampling_mode: SamplingMode = probe_sampling_mode(input_file_path, sample_indices)
+            coordinates = self._analyze_frames(read_sample_frames(video, sample_indices, sampling_mode), scale,
+                                               lambda current: report_progress(current, total_frames))
 
         # Get the most common coordinates
-        most_common_coordinates = Counter(coordinates).most_common(1)[0][0]
+        most_common_coordinates = Counter(rect for _, rect in coordinates).most_common(1)[0][0]
+        x, y, w, h = most_common_coordinates
+        if not is_keyframe_sampling:
+            # 只用检测结果和最终结果一致的几帧在原始分辨率下精修边缘
+            refine_indices: list[int] = [i for i, rect in coordinates if rect == most_common_coordinates]
+            x, y, w, h = scale.refine(read_frames(video, refine_indices[:REFINE_FRAME_COUNT]),
+                                      most_common_coordinates, self.threshold)
 
-        # 把坐标转化成x, y, w, h
-        most_common_coordinates = (
-                most_common_coordinates[0],
-                most_common_coordinates[1],
-                most_common_coordinates[2] - most_common_coordinates[0],
-                most_common_coordinates[3] - most_common_coordinates[1]
-                )
+        video.release()
 
-        x, y, w, h = most_common_coordinates
         x = max(0, x)
         y = max(0, y)
         w = min(width, w)
         h = min(height, h)
 
+        report_progress(total_frames, total_frames)
         loguru.logger.debug(f'[{input_file_path.name}]的主体区域坐标为{x, y, w, h}')
-        signal_bus.set_total_progress_finish.emit()
-        signal_bus.set_detail_progress_finish.emit()
         return x, y, w, h
 
+    def _analyze_frames(self, frames: Iterator[tuple[int, np.ndarray]],
+                        scale: AnalysisScale,
+                        report_progress: Callable[[int], None]) -> list[tuple[int, tuple[int, int, int, int]]]:
+        """分析每一帧的主体区域,返回(帧序号, 原始分辨率下的(x, y, w, h))"""
+        coordinates: list[tuple[int, tuple[int, int, int, int]]] = []
+        for i, frame in frames:
+            # 获取进度条增加的数量
+            report_progress(i)
+            # Use BlackRemover to get the coordinates of the frame without black borders
+            left_top_x, left_top_y, right_bottom_x, right_bottom_y = self._analyze_each_frame(scale.resize(frame))
+            # 把坐标转化成x, y, w, h
+            coordinates.append((i, scale.to_source_rect((left_top_x,
+                                                         left_top_y,
+                                                         right_bottom_x - left_top_x,
+                                                         right_bottom_y - left_top_y))))
+        return coordinates
+
     def _analyze_each_frame(self, frame: np.ndarray) -> tuple[int, int, int, int]:
         # 获取图片的长和宽
         img_height: int = frame.shape[0]
@@ -95,8 +121,8 @@ class IMGBlackRemover(BlackRemoveAlgorithm):
             # loguru.logger.debug(f'{img_path} dont have black border, skip it')
             return left_top_x, left_top_y, right_bottom_x, right_bottom_y
 
-        # 转换为灰度图像
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        # 转换为灰度图像,只分析关键帧的时候ffmpeg输出的已经是灰度图像
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
 
         # 计算平均亮度阈值
         # mean_threshold = np.mean(gray)
@@ -0,0 +1,179 @@
+import subprocess
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Iterator
+
+import cv2
+import loguru
+import numpy as np
+
+from src.common.black_remove_algorithm.analysis_scale import AnalysisScale, REFINE_FRAME_COUNT, read_frames
+from src.common.black_remove_algorithm.black_remove_algorithm import BlackRemoveAlgorithm, ProgressCallback
+from src.common.black_remove_algorithm.frame_sampler import (get_sample_indices, probe_keyframe_sampling,
+                                                             probe_sampling_mode, read_keyframe_samples,
+                                                             read_sample_frames)
+from src.common.media_probe import MediaProbe
+from src.config import cfg
+from src.core.enums import SamplingMode
+# 一次分析多少帧,(N, H, W)的灰度帧一起计算
+BATCH_SIZE: int = 32
+
+
+def find_content_rects(frames: np.ndarray,
+                       threshold: int = 30,
+                       min_content_ratio: float = 0.1) -> list[tuple[int, int, int, int] | None]:
+    """通过每一行和每一列的亮度统计找出每一帧的主体区域
+
+    一行(或者一列)里面亮度大于threshold的像素占比不低于min_content_ratio时认为这一行是画面内容,
+    黑边上面的小logo和噪点占比很低,不会被当成画面。所有帧一起计算,不需要逐帧做形态学、连通区域和轮廓查找
+
+    Args:
+        frames: 灰度帧,形状为(H, W)或者(N, H, W)
+        threshold: 亮度阈值,低于这个值认为是黑色
+        min_content_ratio: 一行或者一列被认为是画面内容所需要的亮像素占比
+
+    Returns:
+        每一帧的主体区域(x, y, w, h),整帧都是黑色的帧为None
+    """
+    if frames.ndim == 2:
+        frames = frames[np.newaxis]
+    if frames.ndim != 3:
+        raise ValueError(f"需要灰度帧(H, W)或者(N, H, W),当前形状为{frames.shape}")
+
+    frame_count, height, width = frames.shape
+    # 所有帧拼成(N*H, W)的一张图,阈值和按行求和各自只需要调用一次OpenCV
+    flat_frames: np.ndarray = np.ascontiguousarray(frames).reshape(frame_count * height, width)
+    _, is_bright = cv2.threshold(flat_frames, threshold, 1, cv2.THRESH_BINARY)
+    row_counts: np.ndarray = cv2.reduce(is_bright, 1, cv2.REDUCE_SUM, dtype=cv2.CV_32S).reshape(frame_count, height)
+    column_counts: np.ndarray = np.stack([cv2.reduce(x, 0, cv2.REDUCE_SUM, dtype=cv2.CV_32S)[0]
+                                          for x in is_bright.reshape(frame_count, height, width)])
+
+    # (N, H)和(N, W)的一维亮度分布
+    row_profile: np.ndarray = row_counts >= min_content_ratio * width
+    column_profile: np.ndarray = column_counts >= min_content_ratio * height
+
+    has_content: np.ndarray = row_profile.any(axis=1) & column_profile.any(axis=1)
+    # argmax返回第一个True的位置,翻转之后就是最后一个True的位置
+    top: np.ndarray = np.argmax(row_profile, axis=1)
+    bottom: np.ndarray = height - np.argmax(row_profile[:, ::-1], axis=1)
+    left: np.ndarray = np.argmax(column_profile, axis=1)
+    right: np.ndarray = width - np.argmax(column_profile[:, ::-1], axis=1)
+
+    return [(int(x1), int(y1), int(x2 - x1), int(y2 - y1)) if is_content else None
+            for x1, y1, x2, y2, is_content in zip(left, top, right, bottom, has_content)]
+
+
+def find_content_rect(frames: np.ndarray,
+                      threshold: int = 30,
+                      min_content_ratio: float = 0.1) -> tuple[int, int, int, int]:
+    """找出多帧共同的主体区域,取出现次数最多的区域,所有帧都是黑色时返回整帧
+
+    Args:
+        frames: 灰度帧,形状为(H, W)或者(N, H, W)
+        threshold: 亮度阈值,低于这个值认为是黑色
+        min_content_ratio: 一行或者一列被认为是画面内容所需要的亮像素占比
+
+    Returns:
+        主体区域(x, y, w, h)
+    """
+    rects = [x for x in find_content_rects(frames, threshold, min_content_ratio) if x is not None]
+    if not rects:
+        height, width = frames.shape[-2:]
+        return 0, 0, width, height
+    return Counter(rects).most_common(1)[0][0]
+
+
+class ProfileBlackRemover(BlackRemoveAlgorithm):
+    """快速静态去黑边,把每一帧压缩成行和列的亮度分布,再从一维分布里面找出主体区域
+
+    帧会先缩小到AnalysisScale的分析分辨率,结果映射回原始分辨率之后再精修边缘
+    """
+
+    def __init__(self, threshold: int = 30, min_content_ratio: float = 0.1):
+        self.threshold: int = threshold
+        self.min_content_ratio: float = min_content_ratio
+
+    def remove_black(self, input_file_path: str | Path,
+                     progress_callback: ProgressCallback | None = None) -> tuple[int, int, int, int]:
+        input_file_path: Path = Path(input_file_path)
+        # 如果不是视频则报错
+        if input_file_path.suffix not in ['.mp4', '.avi', '.flv', '.mov', '.mkv']:
+            raise ValueError(f"文件不是视频: {input_file_path}")
+
+        # 如果不存在则报错
+        if not input_file_path.exists():
+            raise FileNotFoundError(f"文件不存在: {input_file_path}")
+
+        media_info = MediaProbe().probe(input_file_path)
+        total_frames: int = media_info.frame_count
+        width: int = media_info.display_width
+        height: int = media_info.display_height
+        # 限制最大采样帧数,不然长时间的视频会导致等待时间过长
+        sample_frames: int = min(cfg.get(cfg.video_sample_frame_number), int(total_frames * 0.5))
+
+        report_progress: ProgressCallback = self.get_progress_callback(progress_callback)
+        # 在缩小之后的灰度帧上检测,区域再映射回原始分辨率
+        scale = AnalysisScale(width, height)
+        detected: list[tuple[int, tuple[int, int, int, int]]] = []
+        video = cv2.VideoCapture(str(input_file_path))
+        # 优先让ffmpeg只解码关键帧,失败或者关键帧太少的时候使用OpenCV逐帧采样
+        if keyframe_step := probe_keyframe_sampling(input_file_path, total_frames, sample_frames):
+            try:
+                # 关键帧返回的是第几个采样,进度按照采样数量计算
+                detected = self._detect(read_keyframe_samples(input_file_path, scale, keyframe_step,
+                                                              sample_frames), scale, input_file_path.name,
+                                        lambda current: report_progress(current, sample_frames))
+            except (OSError, subprocess.CalledProcessError) as e:
+                loguru.logger.warning(f'[{input_file_path.name}]只分析关键帧失败,改为逐帧采样: {e}')
+                detected = []
+        # 关键帧的采样序号不是帧序号,无法跳转回去精修
+        is_keyframe_sampling: bool = bool(detected)
+        if not detected:
+            sample_indices: list[int] = get_sample_indices(total_frames, sample_frames)
+            # 根据采样间隔和关键帧间隔选择顺序读取或者跳转读取
+            sampling_mode: SamplingMode = probe_sampling_mode(input_file_path, sample_indices)
+            detected = self._detect(read_sample_frames(video, sample_indices, sampling_mode), scale,
+                                    input_file_path.name, lambda current: report_progress(current, total_frames))
+
+        if detected:
+            x, y, w, h = Counter(rect for _, rect in detected).most_common(1)[0][0]
+            if not is_keyframe_sampling:
+                # 只用检测结果和最终结果一致的几帧在原始分辨率下精修边缘
+                refine_indices: list[int] = [index for index, rect in detected if rect == (x, y, w, h)]
+                x, y, w, h = scale.refine(read_frames(video, refine_indices[:REFINE_FRAME_COUNT]), (x, y, w, h),
+                                          self.threshold, self.min_content_ratio)
+        else:
+            x, y, w, h = 0, 0, width, height
+        video.release()
+
+        report_progress(total_frames, total_frames)
+
+        loguru.logger.debug(f'[{input_file_path.name}]的主体区域坐标为{x, y, w, h}')
+        return x, y, w, h
+
+    def _detect(self, frames: Iterator[tuple[int, np.ndarray]],
+                scale: AnalysisScale,
+                name: str,
+                report_progress: Callable[[int], None]) -> list[tuple[int, tuple[int, int, int, int]]]:
+        """按批检测每一帧的主体区域,返回(帧序号, 原始分辨率下的(x, y, w, h)),整帧都是黑色的帧不返回"""
+        indices: list[int] = []
+        rects: list[tuple[int, int, int, int] | None] = []
+        batch: np.ndarray = np.empty((BATCH_SIZE, scale.height, scale.width), dtype=np.uint8)
+        count: int = 0
+        for i, frame in frames:
+            report_progress(i)
+            # 逐帧采样得到原始分辨率的帧,只分析关键帧时得到分析分辨率的灰度帧
+            if frame.shape[:2] not in ((scale.source_height, scale.source_width), (scale.height, scale.width)):
+                loguru.logger.warning(f'[{name}]第{i}帧的大小{frame.shape[:2]}和视频信息不一致,跳过')
+                continue
+
+            scale.to_gray(frame, dst=batch[count])
+            indices.append(i)
+            count += 1
+            if count == BATCH_SIZE:
+                rects += find_content_rects(batch, self.threshold, self.min_content_ratio)
+                count = 0
+        if count:
+            rects += find_content_rects(batch[:count], self.threshold, self.min_content_ratio)
+
+        return [(index, scale.to_source_rect(rect)) for index, rect in zip(indices, rects) if rect is not None]
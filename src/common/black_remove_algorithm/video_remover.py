@@ -4,14 +4,13 @@ import cv2
 import loguru
 import numpy as np
 
-from src.common.black_remove_algorithm.black_remove_algorithm import BlackRemoveAlgorithm
-from src.signal_bus import SignalBus
-
-signal_bus = SignalBus()
-
+from src.common.black_remove_algorithm.analysis_scale import AnalysisScale
+from src.common.black_remove_algorithm.black_remove_algorithm import BlackRemoveAlgorithm, ProgressCallback
+from src.common.media_probe import MediaProbe
 
 class VideoRemover(BlackRemoveAlgorithm):
-    def remove_black(self, input_file_path: str | Path) -> tuple[int, int, int, int]:
+    def remove_black(self, input_file_path: str | Path,
+                     progress_callback: ProgressCallback | None = None) -> tuple[int, int, int, int]:
         video_path: Path = Path(input_file_path)
         loguru.logger.info(f'正在使用差值法检测视频变化区域: {video_path.name}')
 
@@ -24,12 +23,21 @@ class VideoRemover(BlackRemoveAlgorithm):
             raise FileNotFoundError(f"文件不存在: {video_path}")
 
         # 打开视频文件
+        total_frames = MediaProbe().probe(video_path).frame_count
         cap = cv2.VideoCapture(str(video_path))
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        signal_bus.set_detail_progress_max.emit(total_frames)
+        report_progress: ProgressCallback = self.get_progress_callback(progress_callback)
+        report_progress(0, total_frames)
         ret, frame1 = cap.read()
         ret, frame2 = cap.read()
 
+        # 缩小到分析分辨率再计算帧差,面积阈值按照面积比例换算
+        source_height, source_width = frame1.shape[:2]
+        scale = AnalysisScale(source_width, source_height)
+        frame1 = scale.resize(frame1)
+        frame2 = scale.resize(frame2)
+        min_component_area: float = 1500 * scale.area_ratio
+        min_contour_area: float = 500 * scale.area_ratio
+
         # 初始化累计变化图像
         height, width = frame1.shape[:2]
         accumulated_changes = np.zeros((height, width), dtype=np.uint8)
@@ -56,14 +64,14 @@ class VideoRemover(BlackRemoveAlgorithm):
             # 遍历所有连通区域
             for i in range(1, num_labels):
                 # 如果该连通区域的大小大于阈值，则保留该区域
-                if stats[i, cv2.CC_STAT_AREA] > 1500:  # 500是阈值，可以根据实际情况调整
+                if stats[i, cv2.CC_STAT_AREA] > min_component_area:
                     new_binary[labels == i] = 255
 
             # 找到轮廓
             contours, _ = cv2.findContours(new_binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
             for contour in contours:
-                if cv2.contourArea(contour) < 500:
+                if cv2.contourArea(contour) < min_contour_area:
                     continue
                 x, y, w, h = cv2.boundingRect(contour)
                 cv2.rectangle(frame1, (x, y), (x + w, y + h), (255, 255, 255), -1)
@@ -71,7 +79,10 @@ class VideoRemover(BlackRemoveAlgorithm):
 
             frame1 = frame2
             ret, frame2 = cap.read()
-            signal_bus.set_detail_progress_current.emit(frame_index)
+            if not ret:
+                break
+            frame2 = scale.resize(frame2)
+            report_progress(frame_index, total_frames)
 
         cap.release()
         loguru.logger.debug(f'检测视频变化区域完成: {video_path.name}')
@@ -88,7 +99,10 @@ class VideoRemover(BlackRemoveAlgorithm):
                 max_area = area
                 max_rect = (x, y, w, h)
 
-        signal_bus.set_detail_progress_finish.emit()
+        report_progress(total_frames, total_frames)
+        # 变化区域来自帧差,原始分辨率下没有可以用来精修的边缘,直接向外取整映射回去
+        if max_rect != (0, 0, 0, 0):
+            max_rect = scale.to_source_rect(max_rect)
 
         # 返回变化区域图像和最大矩形区域
         loguru.logger.debug(f'最大变化区域: x={max_rect[0]}, y={max_rect[1]}, w={max_rect[2]}, h={max_rect[3]}')
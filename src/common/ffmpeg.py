@@ -1,18 +1,29 @@
-import re
 import subprocess
+import threading
+from collections import deque
 from pathlib import Path
 
-import cv2
 import loguru
 
+from src.common.ffmpeg_log import FFMPEG_LOG_TAIL_LINES, read_ffmpeg_log
+from src.common.ffmpeg_progress import FFMPEG_PROGRESS_ARGS, FFmpegProgressParser
+from src.common.filter_planner import FilterGraphPlanner
+from src.common.media_probe import MediaProbe
+from src.common.process_runner import ProcessRunner
 from src.config import (AudioNoiseReduction, AudioNormalization, FrameRateAdjustment, ScalingQuality, VideoCodec,
                         VideoNoiseReduction, cfg)
-from src.core.datacls import CropInfo
+from src.core.datacls import CropInfo, MediaInfo
 from src.signal_bus import SignalBus
 from src.utils import TempDir, check_file_readability
 
 signal_bus = SignalBus()
 
+# VideoCodec的前缀和ffprobe中的编码名称的对应关系
+OUTPUT_CODEC_NAME: dict[str, str] = {
+        'H264': 'h264',
+        'H265': 'hevc',
+        }
+
 
 def generate_ffmpeg_command(input_file: str | Path,
                             output_file_path: str | Path,
@@ -21,7 +32,7 @@ def generate_ffmpeg_command(input_file: str | Path,
                             target_height: int,
                             audio_sample_rate: int,
                             rotation_angle: int,
-                            ) -> str:
+                            ) -> list[str]:
     def calculate_dimensions(width: int, height: int, target_width: int, target_height: int):
         if width == 0 or height == 0:
             loguru.logger.critical("视频的宽度或高度为0, 请检查视频")
@@ -47,38 +58,35 @@ def generate_ffmpeg_command(input_file: str | Path,
     has_shake = cfg.get(cfg.shake)
     deband: bool = cfg.get(cfg.deband)
     deblock: bool = cfg.get(cfg.deblock)
-    output_codec: VideoCodec = cfg.get(cfg.output_codec).value
+    output_codec: VideoCodec = cfg.get(cfg.output_codec)
     ffmpeg_path = cfg.get(cfg.ffmpeg_file)
     scaling_quality: ScalingQuality = cfg.get(cfg.scaling_quality)
     is_merging: bool = cfg.get(cfg.merge_video)
 
-    filters = []
-
+    # 按照计算量规划滤镜顺序,输入已经是固定的目标帧率时帧率滤镜会被省略
+    media_info: MediaInfo = MediaProbe().probe(input_file)
+    planner = FilterGraphPlanner(media_info.fps, media_info.is_constant_frame_rate)
     if frame_rate_adjustment_type == FrameRateAdjustment.Normal:
-        filters.append(f"fps=fps={framerate}")
+        planner.add_fps(framerate)
     elif frame_rate_adjustment_type == FrameRateAdjustment.MotionInterpolation:
-        filters.append(f"minterpolate='mi_mode=mci:mc_mode=aobmc:me_mode=bidir:mb_size=16:vsbmc=1:fps={framerate}'")
+        planner.add_motion_interpolation(framerate)
 
     if video_noise_reduction != VideoNoiseReduction.Disable:
-        filters.append(video_noise_reduction.value)
+        planner.add_heavy(video_noise_reduction.value)
 
     if has_shake:
-        filters.append("deshake")
+        planner.add_heavy("deshake")
 
     if deband:
-        filters.append("deband")
+        planner.add_heavy("deband")
 
     if deblock:
-        filters.append("deblock=alpha=1:beta=1")
+        planner.add_heavy("deblock=alpha=1:beta=1")
 
     if crop_position:
-        filters.append(f"crop={crop_position.w}:{crop_position.h}:{crop_position.x}:{crop_position.y}")
+        planner.add_crop(crop_position)
 
-    if rotation_angle == 180:
-        filters.append("transpose=2,transpose=2")
-
-    elif rotation_angle in {90, 270}:
-        filters.append(f"transpose={2 if rotation_angle == 270 else 1}")
+    planner.add_transpose(rotation_angle)
 
     # 缩放(如果剪裁之后的视频分辨率和目标分辨率不一致则需要进行缩放,同时还需要处于合并状态,否则只剪裁不缩放)
     if crop_position and (crop_position.w != target_width and crop_position.h != target_height) and is_merging:
@@ -91,8 +99,9 @@ def generate_ffmpeg_command(input_file: str | Path,
             new_width -= 1
         if new_height >= target_height:
             new_height -= 1
-        filters.append(
-                f"scale={new_width}:{new_height}:flags={scaling_quality.value}:force_original_aspect_ratio=decrease,pad={target_width}:{target_height}:{pad_left}:{pad_top}:black")
+        planner.add_scale(crop_position.w, crop_position.h, new_width, new_height, scaling_quality.value)
+        planner.add_pad(target_width, target_height, pad_left, pad_top)
+    filters: list[str] = planner.plan()
 
     audio_filters = []
     # 音频标准化
@@ -103,22 +112,95 @@ def generate_ffmpeg_command(input_file: str | Path,
     if audio_noise_reduction != AudioNoiseReduction.Disable:
         audio_filters.append(audio_noise_reduction.value.replace("\\", "/"))
 
-    # 音频重新采样
-    audio_filters.append(f"aresample={audio_sample_rate}:resampler=soxr:precision=28:osf=s16:dither_method=triangular")
-
-    video_filter_chain = ','.join(filters)
-    command = f'"{ffmpeg_path}" -i "{input_file}" -filter_complex "{video_filter_chain}"'
+    # 没有标准化和降噪,并且原音频已经是目标采样率的aac时不需要重新采样,直接复制音频流
+    copy_audio: bool = not audio_filters and can_copy_audio_stream(media_info, audio_sample_rate, is_merging)
+    if not copy_audio:
+        # 音频重新采样
+        audio_filters.append(
+                f"aresample={audio_sample_rate}:resampler=soxr:precision=28:osf=s16:dither_method=triangular")
+    copy_video: bool = not filters and can_copy_video_stream(media_info, output_codec, is_merging)
+
+    command: list[str] = [str(ffmpeg_path), '-i', input_file]
+    if filters:
+        command += ['-filter_complex', ','.join(filters)]
     if audio_filters:
-        audio_filter_chain = ','.join(audio_filters)
+        command += ['-af', ','.join(audio_filters)]
+
+    if copy_audio:
+        command += ['-c:a', 'copy']
+    else:
+        command += ['-c:a', 'aac', '-b:a', str(audio_sample_rate), '-strict', 'experimental']
+
+    if copy_video:
+        # 视频不需要任何处理,直接复制视频流,只解码和处理音频,相当于只跑一遍音频然后和原视频流合并
+        loguru.logger.info(f'视频{input_file}不需要重新编码,直接复制视频流'
+                           f'{",音频流同样直接复制" if copy_audio else ""}')
+        command += ['-c:v', 'copy']
+    else:
+        # 音频同步以及重新编码
+        command += ['-vsync', '1']
+        command += output_codec.value.split()
+    command += [str(output_file_path), '-y']
+    loguru.logger.debug(f"FFmpeg命令: {subprocess.list2cmdline(command)}")
+    return command
 
-        command += f" -af \"{audio_filter_chain}\""
 
-    # 音频同步以及重新编码
-    command += f' -c:a aac -b:a {audio_sample_rate} -strict experimental -vsync 1'
-    command += f' {output_codec} "{output_file_path}"'
-    command += ' -y'
-    loguru.logger.debug(f"FFmpeg命令: {command}")
-    return command
+def can_copy_video_stream(media_info: MediaInfo, output_codec: VideoCodec, is_merging: bool) -> bool:
+    """在不需要任何视频滤镜的前提下,判断能否直接复制视频流而不是重新编码
+
+    Args:
+        media_info: 输入视频的信息
+        output_codec: 输出的编码
+        is_merging: 是否需要合并
+
+    Returns:
+        是否可以直接复制视频流
+    """
+    # 合并时concat -c copy要求所有片段的profile/level、时间基、SAR、帧率等参数全部一致,
+    # 复制的流和重新编码的流混在一起无法保证这一点,所以合并时一律重新编码
+    if is_merging:
+        return False
+
+    # 带有旋转信息的视频复制之后旋转信息依旧保留在元数据里面,播放器之间的表现不一致
+    if media_info.rotation != 0:
+        return False
+
+    # 复制视频流时不会经过-vsync 1,可变帧率的视频必须重新编码才能转换成固定帧率
+    if not media_info.is_constant_frame_rate:
+        return False
+
+    if media_info.video_codec != OUTPUT_CODEC_NAME[output_codec.name[:4]]:
+        return False
+
+    return media_info.pix_fmt == 'yuv420p'
+
+
+def can_copy_audio_stream(media_info: MediaInfo, audio_sample_rate: int, is_merging: bool) -> bool:
+    """在不需要任何音频滤镜的前提下,判断能否直接复制音频流而不是重新采样和编码
+
+    Args:
+        media_info: 输入视频的信息
+        audio_sample_rate: 目标采样率
+        is_merging: 是否需要合并
+
+    Returns:
+        是否可以直接复制音频流,没有音频的视频不合并时同样返回True
+    """
+    # 和视频流一样,合并时concat -c copy要求所有片段的音频参数完全一致,一律重新编码
+    if is_merging:
+        return False
+
+    if not media_info.has_audio:
+        return True
+
+    # 重新编码输出的是LC规格的立体声aac,复制的流也需要保持一致
+    if media_info.audio_codec != 'aac' or media_info.audio_profile != 'LC':
+        return False
+
+    if media_info.audio_channels != 2 or media_info.audio_channel_layout not in (None, 'stereo'):
+        return False
+
+    return media_info.sample_rate == audio_sample_rate
 
 
 def merge_videos(video_list: list[Path], output_path: Path):
@@ -134,7 +216,8 @@ def merge_videos(video_list: list[Path], output_path: Path):
 
         loguru.logger.debug(f'正在将视频{input_file}转换为TS格式')
 
-        command = f'"{ffmpeg_exe}" -fflags +genpts -i "{input_file}" -c copy -bsf:v h264_mp4toannexb -vsync 2 -f mpegts "{output_file}" -y'
+        command = [ffmpeg_exe, '-fflags', '+genpts', '-i', input_file, '-c', 'copy', '-bsf:v', 'h264_mp4toannexb',
+                   '-vsync', '2', '-f', 'mpegts', output_file, '-y']
         run_command(input_file, command)
 
     def merge_ts_files(ts_files: list[Path], output_file: Path):
@@ -148,7 +231,8 @@ def merge_videos(video_list: list[Path], output_path: Path):
             for video in ts_files:
                 f.write(f"file '{video}'\n")
 
-        command = f'"{ffmpeg_exe}" -fflags +genpts -f concat -safe 0 -i "{txt_path}" -c copy -bsf:a aac_adtstoasc -vsync 2 "{output_file}" -y'
+        command = [ffmpeg_exe, '-fflags', '+genpts', '-f', 'concat', '-safe', '0', '-i', txt_path, '-c', 'copy',
+                   '-bsf:a', 'aac_adtstoasc', '-vsync', '2', output_file, '-y']
         run_command_without_progress(command)
 
     # Convert each video to TS format and store the paths in ts_files
@@ -173,10 +257,10 @@ def merge_videos(video_list: list[Path], output_path: Path):
     merge_ts_files(ts_files, output_path)
 
 
-def run_command(input_file_path: str | Path, command: str):
+def run_command(input_file_path: str | Path, command: list[str | Path]):
     # Convert input_file_path to a Path object
     input_file_path = Path(input_file_path).resolve()
-    loguru.logger.debug(f'正在处理视频: {input_file_path}haha')
+    loguru.logger.debug(f'正在处理视频: {input_file_path}')
 
     # Check if the file
     if not input_file_path.exists():
@@ -186,65 +270,48 @@ def run_command(input_file_path: str | Path, command: str):
     if not check_file_readability(input_file_path):
         raise PermissionError(f"The file {input_file_path} is not readable.")
 
-    # 获取视频的总帧数
-    cap = cv2.VideoCapture(str(input_file_path))
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    signal_bus.set_detail_progress_max.emit(total_frames)
-    cap.release()
-
-    # 运行ffmpeg命令
-    # process = subprocess.Popen(command, shell=True,
-    #                            universal_newlines=True, encoding='utf-8')
+    # 按照视频时长计算进度,帧数只是估算值,对可变帧率的视频不准确
+    duration: float = MediaProbe().probe(input_file_path).duration
+    progress_total: int = int(duration * 1000)
+    signal_bus.set_detail_progress_max.emit(progress_total)
 
-    # 运行ffmpeg命令
-    process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                               universal_newlines=True, encoding='utf-8')
+    # 运行ffmpeg命令,进度从stdout读取,日志从stderr读取
+    command = [command[0], *FFMPEG_PROGRESS_ARGS, *command[1:]]
+    process_runner = ProcessRunner()
+    process = process_runner.popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   universal_newlines=True, encoding='utf-8', errors='replace')
+    log_tail: deque[str] = deque(maxlen=FFMPEG_LOG_TAIL_LINES)
+    log_thread = threading.Thread(target=read_ffmpeg_log, args=(process.stderr, log_tail), daemon=True)
+    log_thread.start()
 
     # 更新进度条
-    for line in iter(process.stdout.readline, ''):
-        loguru.logger.debug(line.strip())
-        if match := re.search(r'frame=\s*(\d+)', line):
-            current_frame = int(match[1])
-            signal_bus.set_detail_progress_current.emit(current_frame)
-            if current_frame >= total_frames:
-                break
-
-    # 等待子进程完成并读取所有剩余的输出
-    stdout, stderr = process.communicate()
-    if process.returncode != 0:
+    progress_parser = FFmpegProgressParser()
+    for line in process.stdout:
+        if progress := progress_parser.feed(line):
+            signal_bus.set_detail_progress_current.emit(min(int(progress.out_time_us / 1000), progress_total))
+
+    # 等待子进程完成
+    log_thread.join()
+    returncode: int = process_runner.wait(process)
+    if returncode != 0:
+        stderr: str = '\n'.join(log_tail)
         loguru.logger.critical(f"FFmpeg命令运行失败: {command}, 错误信息: {stderr}")
         signal_bus.failed.emit()
-        raise subprocess.CalledProcessError(process.returncode, command, output=stdout, stderr=stderr)
+        raise subprocess.CalledProcessError(returncode, command, stderr=stderr)
 
-    # 终止子进程
-    process.kill()
     signal_bus.set_detail_progress_finish.emit()
 
 
-def run_command_without_progress(command: str):
-    # 将命令变成列表
-    command = command.replace('"', '')
-    # 运行ffmpeg命令
-    # process = subprocess.Popen(command,shell=True,
-    #                            universal_newlines=True, encoding='utf-8')
-
+def run_command_without_progress(command: list[str | Path]):
     # 运行ffmpeg命令
-    process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                               universal_newlines=True, encoding='utf-8')
-
-    # 更新进度条
-    for line in iter(process.stdout.readline, ''):
+    result = ProcessRunner().run(command, stderr=subprocess.STDOUT)
+    for line in result.stdout.splitlines():
         loguru.logger.debug(line.strip())
 
-    # 等待子进程完成并读取所有剩余的输出
-    stdout, stderr = process.communicate()
-    if process.returncode != 0:
-        loguru.logger.critical(f"FFmpeg命令运行失败: {command}, 错误信息: {stderr}")
+    if result.returncode != 0:
+        loguru.logger.critical(f"FFmpeg命令运行失败: {command}, 错误信息: {result.stdout}")
         signal_bus.failed.emit()
-        raise subprocess.CalledProcessError(process.returncode, command, output=stdout, stderr=stderr)
-
-    # 终止子进程
-    process.kill()
+        raise subprocess.CalledProcessError(result.returncode, command, output=result.stdout)
 
 
 if __name__ == '__main__':
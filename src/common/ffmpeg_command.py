@@ -1,11 +1,11 @@
 import os
-import re
 import subprocess
 from pathlib import Path
 
-import cv2
 import loguru
 
+from src.common.media_probe import MediaProbe
+from src.common.process_runner import ProcessRunner
 from src.core.datacls import VideoScaling
 from src.core.paths import FFMPEG_FILE
 from src.signal_bus import SignalBus
@@ -22,7 +22,9 @@ class FFmpegCommand:
         if output_file_path.exists():
             output_file_path.unlink()
             loguru.logger.warning(f'已删除已存在的输出文件: {output_file_path}')
-        cmd = f'"{self.ffmpeg_bin}" -y -hide_banner -i "{input_file_path}" -c:v libx264 -crf 23 -preset slow -qcomp 0.5 -psy-rd 0.3:0 -aq-mode 2 -aq-strength 0.8 -b:a 256k "{output_file_path}"'
+        cmd = [self.ffmpeg_bin, '-y', '-hide_banner', '-i', input_file_path, '-c:v', 'libx264', '-crf', '23',
+               '-preset', 'slow', '-qcomp', '0.5', '-psy-rd', '0.3:0', '-aq-mode', '2', '-aq-strength', '0.8',
+               '-b:a', '256k', output_file_path]
         self._reset_progress("压缩视频")
         self._signal_bus.set_total_progress_max.emit(1)
         loguru.logger.debug('开始压缩视频')
@@ -59,7 +61,7 @@ class FFmpegCommand:
         for video_path, temp_audio in zip(input_video_path_list, extracted_audios):
             loguru.logger.debug(f'正在提取音频:{video_path.video_path}')
             video_path: VideoScaling
-            cmd_extract = f'"{self.ffmpeg_bin}" -i "{video_path.video_path}" -q:a 0 -map a? {temp_audio}'
+            cmd_extract = [self.ffmpeg_bin, '-i', video_path.video_path, '-q:a', '0', '-map', 'a?', temp_audio]
             self._run_command(video_path.video_path, cmd_extract)
             self._signal_bus.advance_total_progress.emit(1)
 
@@ -71,19 +73,18 @@ class FFmpegCommand:
         # loguru.logger.success('音频速度修正完成')
 
         # 生成ffmpeg合并命令中的输入文件列表部分
-        inputs_concat = ' '.join([f'-i "{audio_path}"' for audio_path in extracted_audios])
+        inputs_concat = [arg for audio_path in extracted_audios for arg in ('-i', audio_path)]
 
         # ffmpeg的filter_complex选项用于合并音频
         filter_complex = f"concat=n={len(extracted_audios)}:v=0:a=1"
 
         # ffmpeg命令合并音频并输出到指定路径
-        cmd_merge = f'"{self.ffmpeg_bin}" {inputs_concat} -filter_complex "{filter_complex}" -y {output_file_path}'
+        cmd_merge = [self.ffmpeg_bin, *inputs_concat, '-filter_complex', filter_complex, '-y', output_file_path]
         if output_file_path.exists():
             output_file_path.unlink()
         # 需要彻底等待合并完成，否则会出现文件被占用的情况
         loguru.logger.debug(f'开始合并音频，输出文件: {output_file_path}')
-        process = subprocess.run(cmd_merge, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                                 universal_newlines=True, encoding='utf-8', check=False)
+        process = ProcessRunner().run(cmd_merge, stderr=subprocess.STDOUT)
         if process.returncode != 0:
             loguru.logger.error(f"FFmpeg命令运行失败: {cmd_merge}, 错误信息: {process.stderr}")
             raise subprocess.CalledProcessError(process.returncode, cmd_merge, output=process.stdout,
@@ -120,11 +121,10 @@ class FFmpegCommand:
             raise ValueError(f'视频的缩放只能在0.5到2.0之间，当前的值为{scale_rate}')
 
         # Construct the ffmpeg command
-        cmd = f'"{self.ffmpeg_bin}" -y -i "{audio_path}" -filter:a "atempo={scale_rate}" "{output_path}"'
+        cmd = [self.ffmpeg_bin, '-y', '-i', audio_path, '-filter:a', f'atempo={scale_rate}', output_path]
 
         # Run the command
-        process = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                                 shell=True, universal_newlines=True, encoding='utf-8', check=False)
+        process = ProcessRunner().run(cmd, stderr=subprocess.STDOUT)
 
         # Check the return code
         if process.returncode != 0:
@@ -140,7 +140,8 @@ class FFmpegCommand:
         output_file_path = input_video_path.parent / f"{input_video_path.stem}_merged.mp4"
         if output_file_path.exists():
             output_file_path.unlink()
-        cmd = f'"{self.ffmpeg_bin}" -y -hide_banner -i "{input_video_path}" -i "{input_audio_path}" -c:v copy -c:a aac -strict experimental "{output_file_path}" -y'
+        cmd = [self.ffmpeg_bin, '-y', '-hide_banner', '-i', input_video_path, '-i', input_audio_path,
+               '-c:v', 'copy', '-c:a', 'aac', '-strict', 'experimental', output_file_path, '-y']
         self._reset_progress("合并音频")
         self._signal_bus.set_total_progress_max.emit(1)
         self._run_command(input_video_path, cmd)
@@ -155,7 +156,8 @@ class FFmpegCommand:
         output_file_path = video_without_audio.parent / f"{video_without_audio.stem}_with_audio.mp4"
         if output_file_path.exists():
             output_file_path.unlink()
-        cmd = f'"{self.ffmpeg_bin}" -y -hide_banner -i "{video_without_audio}" -i "{video_with_audio}" -c:v copy -c:a aac -strict experimental "{output_file_path}"'
+        cmd = [self.ffmpeg_bin, '-y', '-hide_banner', '-i', video_without_audio, '-i', video_with_audio,
+               '-c:v', 'copy', '-c:a', 'aac', '-strict', 'experimental', output_file_path]
         self._reset_progress("合并音频")
         self._signal_bus.set_total_progress_max.emit(1)
         self._run_command(video_without_audio, cmd)
@@ -255,7 +257,7 @@ class FFmpegCommand:
         self._signal_bus.set_detail_progress_reset.emit()
         self._signal_bus.set_total_progress_description.emit(total_progress_desc)
 
-    def _run_command(self, input_file_path: str | Path, command: str):
+    def _run_command(self, input_file_path: str | Path, command: list[str | Path]):
         # Convert input_file_path to a Path object
         input_file_path = Path(input_file_path)
 
@@ -268,35 +270,15 @@ class FFmpegCommand:
             raise PermissionError(f"The file {input_file_path} is not readable.")
 
         # 获取视频的总帧数
-        cap = cv2.VideoCapture(str(input_file_path))
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        total_frames = MediaProbe().probe(input_file_path).frame_count
         self._signal_bus.set_detail_progress_max.emit(total_frames)
-        cap.release()
 
         # 运行ffmpeg命令
-        process = subprocess.Popen(command, shell=True,
-                                   universal_newlines=True, encoding='utf-8')
-
-        # # 运行ffmpeg命令
-        # process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-        #                            universal_newlines=True, encoding='utf-8')
-        #
-        # # 更新进度条
-        # for line in iter(process.stdout.readline, ''):
-        #     if match := re.search(r'frame=\s*(\d+)', line):
-        #         current_frame = int(match[1])
-        #         self._signal_bus.set_detail_progress_current.emit(current_frame)
-        #         if current_frame >= total_frames:
-        #             break
-
-        # 等待子进程完成并读取所有剩余的输出
-        stdout, stderr = process.communicate()
+        process = ProcessRunner().run(command, stderr=subprocess.STDOUT)
         if process.returncode != 0:
-            loguru.logger.critical(f"FFmpeg命令运行失败: {command}, 错误信息: {stderr}")
-            raise subprocess.CalledProcessError(process.returncode, command, output=stdout, stderr=stderr)
+            loguru.logger.critical(f"FFmpeg命令运行失败: {command}, 错误信息: {process.stdout}")
+            raise subprocess.CalledProcessError(process.returncode, command, output=process.stdout)
 
-        # 终止子进程
-        process.kill()
         self._signal_bus.set_detail_progress_finish.emit()
 
 
@@ -0,0 +1,205 @@
+import subprocess
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Iterator
+
+import loguru
+import numpy as np
+
+from src.common.ffmpeg_log import FFMPEG_LOG_TAIL_LINES, read_ffmpeg_log
+from src.common.filter_planner import FilterGraphPlanner
+from src.common.process_runner import ProcessRunner
+from src.core.datacls import CropInfo
+from src.core.enums import Orientation
+from src.core.paths import FFMPEG_FILE
+
+# 支持输出的像素格式以及每个像素的通道数
+PIX_FMT_CHANNELS: dict[str, int] = {'bgr24': 3, 'gray': 1}
+
+
+def plan_geometry(width: int,
+                  height: int,
+                  crop: CropInfo | None,
+                  rotation_angle: int,
+                  orientation: Orientation,
+                  target_width: int,
+                  target_height: int,
+                  is_merging: bool,
+                  scaling_flags: str) -> tuple[list[str], int, int]:
+    """把剪裁、旋转、缩放和填充转换为ffmpeg滤镜,效果和CropProcessor、RotateProcessor、ResizeProcessor一致
+
+    Args:
+        width: 解码之后的宽度(已经应用了旋转元数据)
+        height: 解码之后的高度
+        crop: 剪裁区域,为None表示不剪裁
+        rotation_angle: 视频需要旋转的角度{0, 90, 180, 270}
+        orientation: 目标朝向
+        target_width: 目标宽度
+        target_height: 目标高度
+        is_merging: 是否合并,只有合并时才需要缩放到目标分辨率
+        scaling_flags: 缩放算法
+
+    Returns:
+        滤镜列表以及处理之后帧的宽和高
+    """
+    planner = FilterGraphPlanner()
+    if crop is not None:
+        planner.add_crop(crop)
+        width, height = crop.w, crop.h
+
+    # 宽高和朝向不一致时才旋转,旋转方向和RotateProcessor保持一致
+    if (orientation == Orientation.HORIZONTAL and height > width
+            or orientation == Orientation.VERTICAL and width > height):
+        match rotation_angle:
+            case 0 | 270:
+                planner.add_transpose(90)
+            case 90:
+                planner.add_transpose(270)
+            case 180:
+                planner.add_transpose(180)
+            case _:
+                raise ValueError(f"Invalid angle: {rotation_angle}")
+        if rotation_angle != 180:
+            width, height = height, width
+
+    if is_merging and (width, height) != (target_width, target_height):
+        if width == 0 or height == 0:
+            loguru.logger.critical("视频的宽度或高度为0, 请检查视频")
+            raise ValueError("Width or height is 0")
+        scale = min(target_width / width, target_height / height)
+        new_width = int(width * scale)
+        new_height = int(height * scale)
+        pad_top = (target_height - new_height) // 2
+        pad_left = (target_width - new_width) // 2
+        planner.add_scale(width, height, new_width, new_height, scaling_flags)
+        # 缩放时保持宽高比可能会少一个像素,始终填充到目标分辨率,保证每一帧的大小固定
+        planner.add_pad(target_width, target_height, pad_left, pad_top)
+        width, height = target_width, target_height
+    return planner.plan(), width, height
+
+
+class FFmpegFrameReader:
+    """使用ffmpeg解码视频,通过rawvideo管道输出固定大小的BGR帧(或者灰度帧)
+
+    剪裁和缩放在ffmpeg的滤镜里面完成,黑边的像素不需要转换成BGR再复制到Python里面,
+    每一帧使用readinto直接读到预先分配好的缓冲区里面,不会为每一帧重新分配内存
+
+    注意:
+        返回的帧会在之后被复用,需要保留的话请自行复制
+
+    Examples:
+        >>> reader = FFmpegFrameReader(input_video_path, 1280, 720, ['crop=1280:720:0:180'])
+        >>> with reader:
+        ...     for frame in reader:
+        ...         pass
+    """
+
+    def __init__(self, input_video_path: Path,
+                 width: int,
+                 height: int,
+                 video_filters: list[str] | None = None,
+                 buffer_count: int = 2,
+                 input_options: list[str] | None = None,
+                 output_options: list[str] | None = None,
+                 pix_fmt: str = 'bgr24'):
+        """
+        Args:
+            input_video_path: 输入视频的路径
+            width: 滤镜处理之后帧的宽度
+            height: 滤镜处理之后帧的高度
+            video_filters: 解码时使用的滤镜
+            buffer_count: 轮流使用的缓冲区数量,至少为1
+            input_options: 放在-i前面的解码参数,例如['-skip_frame', 'nokey']
+            output_options: 放在输出前面的参数,例如['-frames:v', '100']
+            pix_fmt: 输出的像素格式,bgr24输出(H, W, 3)的帧,gray输出(H, W)的帧
+        """
+        if pix_fmt not in PIX_FMT_CHANNELS:
+            raise ValueError(f"不支持的像素格式: {pix_fmt}")
+
+        self._input_video_path: Path = input_video_path
+        self._width: int = width
+        self._height: int = height
+        self._video_filters: list[str] = video_filters or []
+        self._input_options: list[str] = input_options or []
+        self._output_options: list[str] = output_options or []
+        self._pix_fmt: str = pix_fmt
+        shape: tuple[int, ...] = (height, width, 3) if PIX_FMT_CHANNELS[pix_fmt] == 3 else (height, width)
+        self._buffers: list[np.ndarray] = [np.empty(shape, dtype=np.uint8) for _ in range(max(1, buffer_count))]
+
+        self._process_runner = ProcessRunner()
+        self._process: subprocess.Popen | None = None
+        self._log_thread: threading.Thread | None = None
+        self._log_tail: deque[str] = deque(maxlen=FFMPEG_LOG_TAIL_LINES)
+        self._is_eof: bool = False
+
+    def __enter__(self) -> 'FFmpegFrameReader':
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        if self._process is None:
+            self.open()
+
+        frame_size: int = self._buffers[0].nbytes
+        index: int = 0
+        while True:
+            buffer: np.ndarray = self._buffers[index % len(self._buffers)]
+            if self._read_into(memoryview(buffer).cast('B')) < frame_size:
+                self._is_eof = True
+                return
+            index += 1
+            yield buffer
+
+    def get_command(self) -> list[str]:
+        command: list[str] = [str(FFMPEG_FILE), '-threads', '0', *self._input_options,
+                              '-i', str(self._input_video_path)]
+        if self._video_filters:
+            command += ['-vf', ','.join(self._video_filters)]
+        command += [*self._output_options, '-an', '-sn', '-f', 'rawvideo', '-pix_fmt', self._pix_fmt, 'pipe:1']
+        return command
+
+    def open(self) -> None:
+        command: list[str] = self.get_command()
+        loguru.logger.debug(f"FFmpeg命令: {subprocess.list2cmdline(command)}")
+        # bufsize=0直接从管道读到缓冲区,少一次复制
+        self._process = self._process_runner.popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                                   stdin=subprocess.DEVNULL, bufsize=0)
+        # stderr在单独的线程里面读取,防止管道被写满导致ffmpeg卡住
+        self._log_thread = threading.Thread(target=read_ffmpeg_log, args=(self._process.stderr, self._log_tail),
+                                            daemon=True)
+        self._log_thread.start()
+        self._is_eof = False
+
+    def close(self) -> None:
+        """关闭管道并等待ffmpeg退出
+
+        Raises:
+            subprocess.CalledProcessError: 读完所有帧之后ffmpeg的返回值不为0
+        """
+        if self._process is None:
+            return
+
+        process, self._process = self._process, None
+        # 没有读完就关闭管道,ffmpeg写入失败之后会自己退出
+        process.stdout.close()
+        self._log_thread.join()
+
+        returncode: int = self._process_runner.wait(process)
+        if returncode != 0 and self._is_eof:
+            stderr: str = '\n'.join(self._log_tail)
+            loguru.logger.critical(f"FFmpeg命令运行失败: {process.args}, 错误信息: {stderr}")
+            raise subprocess.CalledProcessError(returncode, process.args, stderr=stderr)
+
+    def _read_into(self, view: memoryview) -> int:
+        # 管道一次可能只返回一部分数据,需要一直读到缓冲区满或者管道关闭
+        total: int = 0
+        while total < len(view):
+            size: int | None = self._process.stdout.readinto(view[total:])
+            if not size:
+                break
+            total += size
+        return total
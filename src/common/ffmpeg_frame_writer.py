@@ -0,0 +1,154 @@
+import subprocess
+import threading
+from collections import deque
+from fractions import Fraction
+from pathlib import Path
+
+import loguru
+import numpy as np
+
+from src.common.ffmpeg_log import FFMPEG_LOG_TAIL_LINES, read_ffmpeg_log
+from src.common.filter_planner import FilterGraphPlanner
+from src.common.media_probe import MediaProbe
+from src.common.process_runner import ProcessRunner
+from src.config import FrameRateAdjustment, VideoCodec, cfg
+from src.core.paths import FFMPEG_FILE
+
+
+class FFmpegFrameWriter:
+    """将处理之后的BGR帧通过管道写入ffmpeg,一次生成最终编码的视频
+
+    原视频的音频在同一个ffmpeg进程里面完成滤镜处理并和新的视频流合并,
+    不需要生成mp4v中间文件,也不需要单独提取、处理、替换音频以及重新编码
+
+    Examples:
+        >>> with FFmpegFrameWriter(input_video_path, output_file_path, 1920, 1080, Fraction(30)) as writer:
+        ...     writer.write(frame)
+    """
+
+    def __init__(self, input_video_path: Path,
+                 output_file_path: Path,
+                 width: int,
+                 height: int,
+                 fps: Fraction,
+                 audio_filters: list[str] | None = None):
+        """
+        Args:
+            input_video_path: 原视频的路径,音频从这里读取
+            output_file_path: 输出视频的路径
+            width: 写入的帧的宽度
+            height: 写入的帧的高度
+            fps: 写入的帧的帧率
+            audio_filters: 音频滤镜,为空时音频只重新编码
+
+        Raises:
+            ValueError: 帧率为0(ffprobe无法读取到有效的帧率),ffmpeg无法使用-r 0
+        """
+        if not fps:
+            raise ValueError(f"无法确定视频的帧率: {input_video_path}")
+
+        self._input_video_path: Path = input_video_path
+        self._output_file_path: Path = output_file_path
+        self._width: int = width
+        self._height: int = height
+        self._fps: Fraction = fps
+        self._audio_filters: list[str] = audio_filters or []
+
+        self._process_runner = ProcessRunner()
+        self._process: subprocess.Popen | None = None
+        self._log_thread: threading.Thread | None = None
+        self._log_tail: deque[str] = deque(maxlen=FFMPEG_LOG_TAIL_LINES)
+
+    def __enter__(self) -> 'FFmpegFrameWriter':
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def get_command(self) -> list[str]:
+        # 第一个输入为管道中的原始帧,第二个输入为原视频,只使用其中的音频,
+        # 原视频没有音频的时候第三个输入为静音,保证每一个输出都有音轨,合并时concat -c copy才不会出错
+        command: list[str] = [str(FFMPEG_FILE),
+                              '-f', 'rawvideo', '-pix_fmt', 'bgr24',
+                              '-s', f'{self._width}x{self._height}', '-r', str(self._fps),
+                              '-thread_queue_size', '512', '-i', 'pipe:0',
+                              '-i', str(self._input_video_path),
+                              '-map', '0:v:0']
+
+        # 帧率和输入一致的时候不需要帧率滤镜
+        planner = FilterGraphPlanner(self._fps)
+        frame_rate_adjustment_type: FrameRateAdjustment = cfg.get(cfg.rate_adjustment_type)
+        framerate: int = cfg.get(cfg.video_fps)
+        if frame_rate_adjustment_type == FrameRateAdjustment.Normal:
+            planner.add_fps(framerate)
+        elif frame_rate_adjustment_type == FrameRateAdjustment.MotionInterpolation:
+            planner.add_motion_interpolation(framerate)
+        if video_filters := planner.plan():
+            command += ['-vf', ','.join(video_filters)]
+
+        audio_sample_rate: int = cfg.get(cfg.audio_sample_rate).value
+        if MediaProbe().probe(self._input_video_path).has_audio:
+            command += ['-map', '1:a:0']
+            if self._audio_filters:
+                command += ['-af', ','.join(self._audio_filters)]
+        else:
+            # 静音是无限长的,由-shortest剪到和视频一样长
+            command[command.index('-map'):command.index('-map')] = [
+                '-f', 'lavfi', '-i', f'anullsrc=channel_layout=stereo:sample_rate={audio_sample_rate}']
+            command += ['-map', '2:a:0']
+        command += ['-c:a', 'aac', '-b:a', str(audio_sample_rate), '-strict', 'experimental']
+
+        video_codec: VideoCodec = cfg.get(cfg.output_codec)
+        command += ['-vsync', '1']
+        command += video_codec.value.split()
+        command += ['-shortest', str(self._output_file_path), '-y']
+        return command
+
+    def open(self) -> None:
+        command: list[str] = self.get_command()
+        loguru.logger.debug(f"FFmpeg命令: {subprocess.list2cmdline(command)}")
+        self._process = self._process_runner.popen(command, stdin=subprocess.PIPE,
+                                                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        # stderr在单独的线程里面读取,防止管道被写满导致ffmpeg卡住
+        self._log_thread = threading.Thread(target=read_ffmpeg_log, args=(self._process.stderr, self._log_tail),
+                                            daemon=True)
+        self._log_thread.start()
+
+    def write(self, frame: np.ndarray) -> None:
+        """写入一帧,帧的宽高必须和创建时的宽高一致"""
+        if self._process is None:
+            raise RuntimeError("请先调用open")
+        if frame.shape[:2] != (self._height, self._width):
+            raise ValueError(f"帧的大小{frame.shape[1]}x{frame.shape[0]}和输出的{self._width}x{self._height}不一致")
+
+        try:
+            # 直接写入内存视图,不需要tobytes复制一次
+            self._process.stdin.write(np.ascontiguousarray(frame).data)
+        except (BrokenPipeError, OSError):
+            # ffmpeg已经退出,在close里面抛出具体的错误
+            self.close()
+            raise
+
+    def close(self) -> None:
+        """关闭管道并等待ffmpeg完成编码
+
+        Raises:
+            subprocess.CalledProcessError: ffmpeg运行失败
+        """
+        if self._process is None:
+            return
+
+        process, self._process = self._process, None
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        self._log_thread.join()
+
+        returncode: int = self._process_runner.wait(process)
+        if returncode != 0:
+            stderr: str = '\n'.join(self._log_tail)
+            loguru.logger.critical(f"FFmpeg命令运行失败: {process.args}, 错误信息: {stderr}")
+            raise subprocess.CalledProcessError(returncode, process.args, stderr=stderr)
+
@@ -1,15 +1,23 @@
 import os
 import re
 import subprocess
+import threading
+from collections import deque
 from pathlib import Path
+from typing import Callable
 
-import cv2
 import loguru
 
+from src.common.ffmpeg_log import FFMPEG_LOG_TAIL_LINES, read_ffmpeg_log
+from src.common.ffmpeg_progress import FFMPEG_PROGRESS_ARGS, FFmpegProgressParser, get_eta
+from src.common.filter_planner import FilterGraphPlanner
+from src.common.media_probe import MediaProbe
+from src.common.process_runner import ProcessRunner
 from src.config import AudioNoiseReduction, AudioSampleRate, FrameRateAdjustment, VideoCodec, cfg
+from src.core.datacls import FFmpegProgress, MediaInfo
 from src.core.paths import FFMPEG_FILE, ROOT
 from src.signal_bus import SignalBus
-from src.utils import TempDir, get_output_file_path
+from src.utils import TempDir, get_output_file_path, trans_second_to_human_time
 from src.settings import FFMPEG_ERROR_WORDS
 
 # ffmpeg的AI降噪模型需要在项目目录下运行
@@ -24,6 +32,7 @@ class FFmpegHandler:
         self._temp_dir = TempDir()
         self._signal_bus = SignalBus()
         self._ffmpeg_path: Path = FFMPEG_FILE
+        self._process_runner = ProcessRunner()
 
         if not self._ffmpeg_path.exists():
             self._signal_bus.failed.emit()
@@ -32,13 +41,11 @@ class FFmpegHandler:
 
     @staticmethod
     def get_video_total_frame(video_path: Path) -> int:
-        cap = cv2.VideoCapture(str(video_path))
-        if not cap.isOpened():
-            raise ValueError("无法打开视频")
+        return MediaProbe().probe(video_path).frame_count
 
-        total_frame = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        cap.release()
-        return total_frame
+    @staticmethod
+    def get_video_duration(video_path: Path) -> float:
+        return MediaProbe().probe(video_path).duration
 
     def reencode_video(self, input_file_path: Path) -> Path:
         """
@@ -72,27 +79,26 @@ class FFmpegHandler:
         audio_sample_rate: AudioSampleRate = cfg.get(cfg.audio_sample_rate)
         audio_sample_rate = audio_sample_rate.value
         audio_filter = [f"aresample={audio_sample_rate}:resampler=soxr:precision=28:osf=s16:dither_method=triangular"]
-        audio_codec = f' -c:a aac -b:a {audio_sample_rate} -strict experimental -vsync 1'
+        audio_codec = ['-c:a', 'aac', '-b:a', str(audio_sample_rate), '-strict', 'experimental', '-vsync', '1']
 
-        video_filter = []
+        # 输入已经是固定的目标帧率的时候不需要帧率滤镜
+        media_info: MediaInfo = MediaProbe().probe(input_file_path)
+        planner = FilterGraphPlanner(media_info.fps, media_info.is_constant_frame_rate)
         frame_rate_adjustment_type: FrameRateAdjustment = cfg.get(cfg.rate_adjustment_type)
         framerate: int = cfg.get(cfg.video_fps)
         if frame_rate_adjustment_type == FrameRateAdjustment.Normal:
-            video_filter.append(f"fps=fps={framerate}")
+            planner.add_fps(framerate)
         elif frame_rate_adjustment_type == FrameRateAdjustment.MotionInterpolation:
-            video_filter.append(
-                f"minterpolate='mi_mode=mci:mc_mode=aobmc:me_mode=bidir:mb_size=16:vsbmc=1:fps={framerate}'")
+            planner.add_motion_interpolation(framerate)
+        video_filter: list[str] = planner.plan()
 
         command = self._get_ffmpeg_command(input_file_path,
                                            output_file_path,
                                            audio_filter=audio_filter,
-                                           video_codec=video_codec.value,
+                                           video_codec=video_codec.value.split(),
                                            video_filter=video_filter,
                                            audio_codec=audio_codec)
-        # 获取视频总帧数
-        total_frame = self.get_video_total_frame(input_file_path)
-
-        self.run_command(command, total_frame)
+        self.run_command(command, self.get_video_duration(input_file_path))
         return output_file_path
 
     def compress_video(self, input_file_path: Path) -> Path:
@@ -112,16 +118,13 @@ class FFmpegHandler:
 
         # 生成压缩命令
         video_codec: VideoCodec = cfg.get(cfg.output_codec)
-        audio_codec = ' -c:a copy '
+        audio_codec = ['-c:a', 'copy']
 
         command = self._get_ffmpeg_command(input_file_path,
                                            output_file_path,
-                                           video_codec=video_codec.value,
+                                           video_codec=video_codec.value.split(),
                                            audio_codec=audio_codec)
-        # 获取视频总帧数
-        total_frame = self.get_video_total_frame(input_file_path)
-
-        self.run_command(command, total_frame)
+        self.run_command(command, self.get_video_duration(input_file_path))
         return output_file_path
 
     def extract_audio_from_video(self, input_file_path: Path) -> Path:
@@ -148,17 +151,16 @@ class FFmpegHandler:
             - 如果输入视频文件中不包含音频轨道，将不会生成音频文件，并可能抛出异常。
         """
         output_file_path = get_output_file_path(input_file_path).with_suffix('.wav')
-        has_audio: bool = self._check_audio_stream_with_ffmpeg(input_file_path)
+        has_audio: bool = self._has_audio_stream(input_file_path)
         if not has_audio:
-            self.run_command(
-                f'"{self._ffmpeg_path}" -f lavfi -i anullsrc=r=44100:cl=stereo -t 10 "{output_file_path}"')
+            self.run_command([self._ffmpeg_path, '-f', 'lavfi', '-i', 'anullsrc=r=44100:cl=stereo', '-t', '10',
+                              output_file_path])
             return output_file_path
-        other_command = [' -vn -acodec pcm_s16le ']
+        other_command = ['-vn', '-acodec', 'pcm_s16le']
         command = self._get_ffmpeg_command(input_file_path,
                                            output_file_path,
                                            other_command=other_command)
-        total_frame = self.get_video_total_frame(input_file_path)
-        self.run_command(command, total_frame)
+        self.run_command(command, self.get_video_duration(input_file_path))
         return output_file_path
 
     def replace_video_audio(self, input_video_path: Path, audio_wav_path: Path) -> Path:
@@ -187,7 +189,7 @@ class FFmpegHandler:
             - 输出视频文件将保存在临时目录中，文件名格式为“原视频文件名_replace_audio.原视频文件扩展名”。
         """
         output_video_path = get_output_file_path(input_video_path, "replace_audio")
-        other_command = [f'-i "{audio_wav_path}" -c:v copy -map 0:v:0 -map 1:a:0 -shortest']
+        other_command = ['-i', str(audio_wav_path), '-c:v', 'copy', '-map', '0:v:0', '-map', '1:a:0', '-shortest']
         command = self._get_ffmpeg_command(input_video_path,
                                            output_video_path,
                                            other_command=other_command)
@@ -261,7 +263,9 @@ class FFmpegHandler:
             txt_content = [f"file '{video}'\n" for video in video_list]
             f.writelines(txt_content)
 
-        command = f'"{self._ffmpeg_path}" -fflags +genpts -f concat -safe 0 -i "{temp_output_video_txt_path}" -c copy -bsf:a aac_adtstoasc -vsync 2 "{output_file}" -y'
+        command = [self._ffmpeg_path, '-fflags', '+genpts', '-f', 'concat', '-safe', '0',
+                   '-i', temp_output_video_txt_path, '-c', 'copy', '-bsf:a', 'aac_adtstoasc', '-vsync', '2',
+                   output_file, '-y']
         self.run_command(command)
         return output_file
 
@@ -278,9 +282,9 @@ class FFmpegHandler:
             编码后的TS格式视频文件的路径。
         """
         output_file: Path = get_output_file_path(input_video_path, "encode2ts").with_suffix('.ts')
-        command = f'"{self._ffmpeg_path}" -fflags +genpts -i "{input_video_path}" -c copy -bsf:v h264_mp4toannexb -vsync 2 -f mpegts "{output_file}" -y'
-        total_frame = self.get_video_total_frame(input_video_path)
-        self.run_command(command, total_frame)
+        command = [self._ffmpeg_path, '-fflags', '+genpts', '-i', input_video_path, '-c', 'copy',
+                   '-bsf:v', 'h264_mp4toannexb', '-vsync', '2', '-f', 'mpegts', output_file, '-y']
+        self.run_command(command, self.get_video_duration(input_video_path))
         return output_file
 
     def get_support_video_format(self) -> list[str]:
@@ -292,69 +296,103 @@ class FFmpegHandler:
                 ['.mp4', '.avi', '.mov', '.flv', '.wmv']
         """
         # 调用ffmpeg -formats命令获取所有支持的格式
-        result = subprocess.run([self._ffmpeg_path, '-formats'], capture_output=True, text=True)
+        result = self._process_runner.run([self._ffmpeg_path, '-formats'],
+                                          cfg.get(cfg.ffmpeg_timeout) * 60 or None)
         formats = re.findall(r'D\s+([a-zA-Z0-9]+)', result.stdout)
         return [f'.{fmt}' for fmt in formats]
 
-    def run_command(self, command: str, progress_total: int = 0):
+    def run_command(self, command: list[str | Path], duration: float = 0,
+                    progress_callback: Callable[[int, int], None] | None = None,
+                    timeout: float | None = None) -> FFmpegProgress | None:
+        """运行FFmpeg命令
+
+        进度从ffmpeg的-progress输出中读取,按照已经输出的时长计算,日志从stderr中单独读取。
+        子进程通过ProcessRunner启动,暂停的时候会被立刻结束
+
+        Args:
+            command: FFmpeg参数列表,第一个元素为ffmpeg的路径
+            duration: 输出的总时长(单位秒),用于计算进度和剩余时间,为0时不显示进度
+            progress_callback: 进度回调(当前值, 最大值),单位毫秒,传入之后进度不再直接发送到详细进度条,
+                多个任务并行时由调用方自行汇总
+            timeout: 超时时间(单位秒),为None时使用配置文件中的设置
+
+        Returns:
+            最后一次的进度信息(包括处理速度),ffmpeg没有输出进度时返回None
+        """
         if not command:
             raise ValueError("命令不能为空")
 
-        if ' -y' not in command:
+        command = [str(x) for x in command]
+        if '-y' not in command:
             # -y参数表示覆盖输出文件,没有这个参数会提示是否覆盖导致程序卡住
-            command += ' -y'
-
-        loguru.logger.debug(f"FFmpeg命令: {command}")
-
-        self._signal_bus.set_detail_progress_reset.emit()
-        if progress_total > 0:
-            self._signal_bus.set_detail_progress_max.emit(progress_total)
-
-        # Use a context manager to ensure the subprocess is properly cleaned up
-        with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                              universal_newlines=True, encoding='utf-8', shell=True) as process:
-            # 更新进度条
-            for line in iter(process.stdout.readline, ''):
-                each_line = line.strip()
-                if any(x in each_line.lower() for x in self.FFMPEG_ERROR_WORD):
-                    loguru.logger.error(each_line)
-                else:
-                    loguru.logger.debug(each_line)
-                if progress_total > 0:
-                    if match := re.search(r'frame=\s*(\d+)', line):
-                        current_frame = int(match[1])
-                        self._signal_bus.set_detail_progress_current.emit(current_frame)
-                        if current_frame >= progress_total:
-                            break
-                elif line == '':
-                    break
-
-            # 等待子进程完成并读取所有剩余的输出
-            stdout, stderr = process.communicate()
-            if process.returncode != 0:
-                loguru.logger.critical(f"FFmpeg命令运行失败: {command}, 错误信息: {stderr}")
-                self._signal_bus.failed.emit()
-                raise subprocess.CalledProcessError(process.returncode, command, output=stdout, stderr=stderr)
-
-        self._signal_bus.set_detail_progress_finish.emit()
-
-    def _check_audio_stream_with_ffmpeg(self, video_path: Path) -> bool:
-        """使用ffmpeg命令检查视频文件是否包含音频流。
-        """
-        temp_audio_file = self._temp_dir.get_temp_dir() / video_path.name
-        command = f'{self._ffmpeg_path} -i "{video_path}" -vn -acodec copy "{temp_audio_file}" -y'
+            command.append('-y')
+        command[1:1] = FFMPEG_PROGRESS_ARGS
+        if timeout is None:
+            timeout = cfg.get(cfg.ffmpeg_timeout) * 60
+
+        loguru.logger.debug(f"FFmpeg命令: {subprocess.list2cmdline(command)}")
+
+        progress_total: int = int(duration * 1000)
+        if progress_callback is None:
+            self._signal_bus.set_detail_progress_reset.emit()
+            if progress_total > 0:
+                self._signal_bus.set_detail_progress_max.emit(progress_total)
+
+        process = self._process_runner.popen(command, timeout, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                             universal_newlines=True, encoding='utf-8', errors='replace')
+        # stderr里面只有日志,在单独的线程里面读取,防止管道被写满导致ffmpeg卡住
+        log_tail: deque[str] = deque(maxlen=FFMPEG_LOG_TAIL_LINES)
+        log_thread = threading.Thread(target=read_ffmpeg_log, args=(process.stderr, log_tail), daemon=True)
+        log_thread.start()
+
+        # 一直读到ffmpeg退出,不能因为进度已满提前停止读取
+        progress_parser = FFmpegProgressParser()
+        last_progress: FFmpegProgress | None = None
+        for line in process.stdout:
+            if not (progress := progress_parser.feed(line)):
+                continue
+            last_progress = progress
+            if progress_total <= 0:
+                continue
+
+            current: int = min(int(progress.out_time_us / 1000), progress_total)
+            if progress_callback is None:
+                self._signal_bus.set_detail_progress_current.emit(current)
+                if (eta := get_eta(progress, duration)) is not None:
+                    self._signal_bus.set_detail_progress_description.emit(
+                            f"速度{progress.speed:.2f}x 预计剩余{trans_second_to_human_time(int(eta))}")
+            else:
+                progress_callback(current, progress_total)
+
+        log_thread.join()
+        # 超时或者暂停的时候这里会直接抛出异常
+        returncode: int = self._process_runner.wait(process)
+        if returncode != 0:
+            stderr: str = '\n'.join(log_tail)
+            loguru.logger.critical(f"FFmpeg命令运行失败: {command}, 错误信息: {stderr}")
+            self._signal_bus.failed.emit()
+            raise subprocess.CalledProcessError(returncode, command, stderr=stderr)
+
+        if last_progress is not None:
+            loguru.logger.debug(f"FFmpeg处理完成,平均速度{last_progress.speed}x,输出大小{last_progress.total_size}字节")
+        if progress_callback is None:
+            self._signal_bus.set_detail_progress_finish.emit()
+        else:
+            progress_callback(progress_total, progress_total)
+        return last_progress
+
+    @staticmethod
+    def _has_audio_stream(media_path: Path) -> bool:
+        """根据媒体的流信息判断是否包含音频流,同一个文件只会读取一次"""
         try:
-            subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, shell=True,
-                           encoding='utf-8',
-                           universal_newlines=True)
-        except subprocess.CalledProcessError as e:
+            has_audio: bool = MediaProbe().probe(media_path).has_audio
+        except (ValueError, OSError, subprocess.SubprocessError) as e:
+            # ffprobe读取失败、不存在或者超时的时候都按照没有音频处理
             loguru.logger.error(f"检查音频流失败: {e}")
             return False
-        has_audio = temp_audio_file.exists()
 
         if not has_audio:
-            loguru.logger.debug(f"视频文件{video_path}不包含音频流")
-
+            loguru.logger.debug(f"视频文件{media_path}不包含音频流")
         return has_audio
 
     def _get_ffmpeg_command(self,
@@ -362,37 +400,35 @@ class FFmpegHandler:
                             output_video_path: Path,
                             video_filter: list[str] | None = None,
                             audio_filter: list[str] | None = None,
-                            video_codec: str | None = None,
-                            audio_codec: str | None = None,
+                            video_codec: list[str] | None = None,
+                            audio_codec: list[str] | None = None,
                             other_command: list[str] | None = None
-                            ) -> str:
-        command: str = f'"{self._ffmpeg_path}" -i "{input_video_path}" '
-        has_audio: bool = self._check_audio_stream_with_ffmpeg(input_video_path)
+                            ) -> list[str | Path]:
+        command: list[str | Path] = [self._ffmpeg_path, '-i', input_video_path]
+        has_audio: bool = self._has_audio_stream(input_video_path)
         # 如果没有音频流，添加静音音频流
-        silence_audio_command = ' -f lavfi -i anullsrc=channel_layout=stereo:sample_rate=44100 -c:a aac -t 10 '
+        silence_audio_command = ['-f', 'lavfi', '-i', 'anullsrc=channel_layout=stereo:sample_rate=44100',
+                                 '-c:a', 'aac', '-t', '10']
         if video_filter:
-            command += ' -filter_complex '
-            command += ' '.join(video_filter)
+            command += ['-filter_complex', ','.join(video_filter)]
 
         if audio_filter and has_audio:
-            command += ' -af '
-            command_without_quote = ','.join(audio_filter)
-            command += f'"{command_without_quote}"'
+            command += ['-af', ','.join(audio_filter)]
         elif audio_filter and not has_audio:
             command += silence_audio_command
 
         if other_command:
-            command += ' '.join(other_command)
+            command += other_command
 
         if audio_codec and has_audio:
-            command += f' {audio_codec} '
+            command += audio_codec
         elif audio_codec and not has_audio:
             command += silence_audio_command
 
         if video_codec:
-            command += f' {video_codec} '
+            command += video_codec
 
-        command += f' "{output_video_path}"'
+        command.append(output_video_path)
         return command
 
 
@@ -0,0 +1,30 @@
+from collections import deque
+from typing import IO
+
+import loguru
+
+from src.settings import FFMPEG_ERROR_WORDS
+
+# 运行失败时保留的最后几行日志
+FFMPEG_LOG_TAIL_LINES: int = 50
+
+
+def read_ffmpeg_log(stream: IO[bytes] | IO[str], log_tail: deque[str]) -> None:
+    """逐行读取ffmpeg的stderr并写入日志,包含错误关键字的行使用error级别
+
+    stdin或者stdout被用作帧管道时stderr以二进制打开,其他时候以文本打开,两种都在这里统一处理
+
+    Args:
+        stream: ffmpeg的stderr
+        log_tail: 保存最后几行日志,运行失败时作为错误信息
+    """
+    for line in stream:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='replace')
+        if not (each_line := line.strip()):
+            continue
+        log_tail.append(each_line)
+        if any(x in each_line.lower() for x in FFMPEG_ERROR_WORDS):
+            loguru.logger.error(each_line)
+        else:
+            loguru.logger.debug(each_line)
@@ -0,0 +1,62 @@
+from src.core.datacls import FFmpegProgress
+
+# 让ffmpeg将机器可读的进度输出到stdout,同时关闭stderr里面的统计信息,日志和进度分开读取
+FFMPEG_PROGRESS_ARGS: list[str] = ['-progress', 'pipe:1', '-nostats']
+
+
+class FFmpegProgressParser:
+    """解析ffmpeg -progress 输出的key=value进度流
+
+    ffmpeg每隔一段时间输出一组key=value,以progress=continue或者progress=end结尾,
+    每读到一组完整的进度就返回一个FFmpegProgress
+    """
+
+    def __init__(self):
+        self._values: dict[str, str] = {}
+
+    def feed(self, line: str) -> FFmpegProgress | None:
+        key, sep, value = line.strip().partition('=')
+        if not sep:
+            return None
+
+        if key != 'progress':
+            self._values[key] = value.strip()
+            return None
+
+        values, self._values = self._values, {}
+        return FFmpegProgress(frame=_to_int(values.get('frame')),
+                              fps=_to_float(values.get('fps')),
+                              out_time_us=max(0, _to_int(values.get('out_time_us'))),
+                              total_size=_to_int(values.get('total_size')),
+                              speed=_to_float(values.get('speed', '').rstrip('x')),
+                              is_end=value.strip() == 'end')
+
+
+def get_eta(progress: FFmpegProgress, duration: float) -> float | None:
+    """根据处理速度估算剩余时间
+
+    Args:
+        progress: 当前进度
+        duration: 输出的总时长,单位秒
+
+    Returns:
+        剩余时间,单位秒,速度未知的时候返回None
+    """
+    if progress.speed <= 0 or duration <= 0:
+        return None
+    return max(0.0, duration - progress.out_time) / progress.speed
+
+
+def _to_int(value: str | None) -> int:
+    # 开始的时候部分字段为N/A
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _to_float(value: str | None) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
@@ -0,0 +1,93 @@
+from dataclasses import dataclass
+from enum import IntEnum
+from fractions import Fraction
+
+from src.core.datacls import CropInfo
+
+
+class FilterStage(IntEnum):
+    """滤镜在滤镜链中的位置,数值越小越靠前
+
+    原则是让计算量大的滤镜处理尽可能少的像素和帧:
+    先降帧率和剪裁,目标分辨率更小的时候先缩小再做降噪等重滤镜,放大和补帧放到最后
+    """
+    FpsDown = 0  # 降低帧率,后面的滤镜处理的帧更少
+    Crop = 1  # 去黑边,后面的滤镜不再处理黑边
+    Transpose = 2
+    ScaleDown = 3  # 缩小,后面的滤镜处理的像素更少
+    Heavy = 4  # 降噪、去抖动、去色带、去色块等重滤镜
+    Interpolate = 5  # 运动补帧,在较小的分辨率上进行
+    ScaleUp = 6  # 放大,放到重滤镜之后
+    Pad = 7  # 填充黑边,重滤镜不需要处理填充的像素
+    FpsUp = 8  # 提高帧率(复制帧),放到最后
+
+
+@dataclass(frozen=True, slots=True)
+class FilterNode:
+    expression: str
+    stage: FilterStage
+
+
+class FilterGraphPlanner:
+    """按照计算量规划ffmpeg视频滤镜的顺序,同时去掉不会产生任何效果的滤镜"""
+
+    def __init__(self, source_fps: Fraction = Fraction(0), is_constant_frame_rate: bool = True):
+        """
+        Args:
+            source_fps: 输入视频的帧率,为0表示未知,未知时不会省略帧率滤镜
+            is_constant_frame_rate: 输入视频是否为固定帧率,可变帧率的平均帧率和目标一致时也不能省略帧率滤镜
+        """
+        self._source_fps: Fraction = source_fps
+        self._is_constant_frame_rate: bool = is_constant_frame_rate
+        self._nodes: list[FilterNode] = []
+
+    def _is_target_fps(self, target_fps: int) -> bool:
+        """输入已经是固定的目标帧率,帧率滤镜不会产生任何效果"""
+        return self._is_constant_frame_rate and self._source_fps == target_fps
+
+    def add_fps(self, target_fps: int) -> None:
+        if self._is_target_fps(target_fps):
+            return
+        stage = FilterStage.FpsUp if 0 < self._source_fps < target_fps else FilterStage.FpsDown
+        self._nodes.append(FilterNode(f"fps=fps={target_fps}", stage))
+
+    def add_motion_interpolation(self, target_fps: int) -> None:
+        if self._is_target_fps(target_fps):
+            return
+        self._nodes.append(FilterNode(
+                f"minterpolate='mi_mode=mci:mc_mode=aobmc:me_mode=bidir:mb_size=16:vsbmc=1:fps={target_fps}'",
+                FilterStage.Interpolate))
+
+    def add_crop(self, crop: CropInfo) -> None:
+        self._nodes.append(FilterNode(f"crop={crop.w}:{crop.h}:{crop.x}:{crop.y}", FilterStage.Crop))
+
+    def add_transpose(self, rotation_angle: int) -> None:
+        if rotation_angle == 180:
+            self._nodes.append(FilterNode("transpose=2,transpose=2", FilterStage.Transpose))
+        elif rotation_angle in {90, 270}:
+            self._nodes.append(FilterNode(f"transpose={2 if rotation_angle == 270 else 1}", FilterStage.Transpose))
+
+    def add_heavy(self, expression: str) -> None:
+        self._nodes.append(FilterNode(expression, FilterStage.Heavy))
+
+    def add_scale(self, source_width: int, source_height: int, width: int, height: int, flags: str) -> None:
+        """
+        Args:
+            source_width: 缩放之前的宽度
+            source_height: 缩放之前的高度
+            width: 缩放之后的宽度
+            height: 缩放之后的高度
+            flags: 缩放算法
+        """
+        if (source_width, source_height) == (width, height):
+            return
+        stage = FilterStage.ScaleDown if width * height < source_width * source_height else FilterStage.ScaleUp
+        self._nodes.append(FilterNode(
+                f"scale={width}:{height}:flags={flags}:force_original_aspect_ratio=decrease", stage))
+
+    def add_pad(self, width: int, height: int, x: int, y: int) -> None:
+        self._nodes.append(FilterNode(f"pad={width}:{height}:{x}:{y}:black", FilterStage.Pad))
+
+    def plan(self) -> list[str]:
+        """返回排序之后的滤镜,同一阶段的滤镜保持添加时的顺序"""
+        return [node.expression for node in sorted(self._nodes, key=lambda node: node.stage)]
@@ -0,0 +1,145 @@
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterable, Iterator
+
+import loguru
+import numpy as np
+
+from src.common.frame_pool import FramePool
+from src.common.processors.base_processor import OpenCVProcessor, ProcessingPlan
+from src.utils import get_physical_cpu_count
+
+# 每一帧复制到共享内存再复制回来的开销,和OpenCVProcessor.relative_cost使用同样的单位
+PARALLEL_COPY_COST: float = 2
+
+# 子进程里面的状态,由_init_worker初始化
+_worker_state: dict = {}
+
+
+def _init_worker(processor_types: list[type[OpenCVProcessor]],
+                 input_name: str,
+                 output_name: str,
+                 ring_size: int,
+                 input_shape: tuple[int, ...],
+                 output_shape: tuple[int, ...]) -> None:
+    input_memory = SharedMemory(name=input_name)
+    output_memory = SharedMemory(name=output_name)
+    _worker_state['input_memory'] = input_memory
+    _worker_state['output_memory'] = output_memory
+    _worker_state['inputs'] = np.ndarray((ring_size, *input_shape), dtype=np.uint8, buffer=input_memory.buf)
+    _worker_state['outputs'] = np.ndarray((ring_size, *output_shape), dtype=np.uint8, buffer=output_memory.buf)
+    # 每一个子进程各自创建处理器并编译成处理计划,超分辨率等模型只需要加载一次
+    _worker_state['plan'] = ProcessingPlan.from_processors([processor_type() for processor_type in processor_types])
+    _worker_state['pool'] = FramePool()
+
+
+def _process_slot(slot: int) -> int:
+    pool: FramePool = _worker_state['pool']
+    frame: np.ndarray = _worker_state['plan'].process(_worker_state['inputs'][slot], pool)
+
+    output: np.ndarray = _worker_state['outputs'][slot]
+    if frame.shape != output.shape:
+        raise ValueError(f"处理之后的帧大小{frame.shape}和预期的{output.shape}不一致")
+    np.copyto(output, frame)
+    pool.release(frame)
+    return slot
+
+
+class FrameParallelExecutor:
+    """在多个进程里面同时处理多帧,结果按照原来的顺序返回
+
+    帧通过multiprocessing.shared_memory组成的环形缓冲区传递,进程之间只传递槽位的序号,
+    不需要对整帧进行序列化。只适用于每一帧互相独立的处理器(例如降噪和超分辨率),
+    链中只要有一个有状态的处理器(例如去抖动)就只能逐帧顺序处理,使用is_supported判断
+
+    Examples:
+        >>> if FrameParallelExecutor.is_supported(processors):
+        ...     with FrameParallelExecutor(processors, (720, 1280, 3), (720, 1280, 3)) as executor:
+        ...         for frame in executor.imap(frames):
+        ...             pass
+    """
+
+    def __init__(self,
+                 processors: list[OpenCVProcessor],
+                 input_shape: tuple[int, ...],
+                 output_shape: tuple[int, ...],
+                 max_workers: int = 0,
+                 ring_size: int = 0):
+        """
+        Args:
+            processors: 需要执行的处理器,子进程中会按照相同的类型重新创建
+            input_shape: 输入帧的形状
+            output_shape: 处理之后帧的形状
+            max_workers: 进程数量,0表示使用物理核心数
+            ring_size: 环形缓冲区的槽位数量,也是同时处理的最大帧数,0表示进程数的两倍
+        """
+        if not self.is_supported(processors):
+            raise ValueError("处理器链中包含有状态的处理器,不能并行处理")
+
+        self._max_workers: int = max_workers or get_physical_cpu_count()
+        self._ring_size: int = ring_size or self._max_workers * 2
+        self._input_shape: tuple[int, ...] = input_shape
+        self._output_shape: tuple[int, ...] = output_shape
+
+        self._input_memory = SharedMemory(create=True, size=self._ring_size * int(np.prod(input_shape)))
+        self._output_memory = SharedMemory(create=True, size=self._ring_size * int(np.prod(output_shape)))
+        self._inputs = np.ndarray((self._ring_size, *input_shape), dtype=np.uint8, buffer=self._input_memory.buf)
+        self._outputs = np.ndarray((self._ring_size, *output_shape), dtype=np.uint8, buffer=self._output_memory.buf)
+
+        loguru.logger.info(f'使用{self._max_workers}个进程并行处理帧,缓冲区槽位数量:{self._ring_size}')
+        self._executor = ProcessPoolExecutor(max_workers=self._max_workers,
+                                             initializer=_init_worker,
+                                             initargs=([type(x) for x in processors],
+                                                       self._input_memory.name,
+                                                       self._output_memory.name,
+                                                       self._ring_size,
+                                                       input_shape,
+                                                       output_shape))
+
+    def __enter__(self) -> 'FrameParallelExecutor':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def is_supported(processors: list[OpenCVProcessor]) -> bool:
+        """处理器链不为空并且全部都是无状态的处理器时才能并行处理"""
+        return bool(processors) and not any(processor.is_stateful for processor in processors)
+
+    @staticmethod
+    def is_worthwhile(processors: list[OpenCVProcessor]) -> bool:
+        """处理器链的开销比进程之间复制帧的开销更大时,并行处理才会更快"""
+        return sum(processor.relative_cost for processor in processors) > PARALLEL_COPY_COST
+
+    def imap(self, frames: Iterable[np.ndarray]) -> Iterator[np.ndarray]:
+        """并行处理所有帧,按照输入的顺序返回处理之后的帧
+
+        输入的帧在提交之前会复制到共享内存里面,所以输入可以复用缓冲区;返回的帧是独立的副本
+        """
+        pending: deque[Future] = deque()
+        for index, frame in enumerate(frames):
+            # 槽位已经用完的时候先取回最早的一帧,取回之后那一个槽位刚好就是下一帧要使用的槽位
+            if len(pending) == self._ring_size:
+                yield self._collect(pending.popleft())
+
+            slot: int = index % self._ring_size
+            np.copyto(self._inputs[slot], frame)
+            pending.append(self._executor.submit(_process_slot, slot))
+
+        while pending:
+            yield self._collect(pending.popleft())
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        # 释放numpy对共享内存的引用之后才能关闭
+        del self._inputs, self._outputs
+        self._input_memory.close()
+        self._output_memory.close()
+        self._input_memory.unlink()
+        self._output_memory.unlink()
+
+    def _collect(self, future: Future) -> np.ndarray:
+        slot: int = future.result()
+        return self._outputs[slot].copy()
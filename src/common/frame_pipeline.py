@@ -0,0 +1,189 @@
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+import loguru
+import numpy as np
+
+from src.common.frame_pool import FramePool
+
+# 队列为空或者已满的时候每隔多久检查一次是否需要停止,单位秒
+POLL_INTERVAL: float = 0.1
+
+
+class _EndOfStream:
+    """队列中的结束标记"""
+
+
+_END = _EndOfStream()
+
+
+@dataclass(slots=True)
+class StageStats:
+    """单个阶段的运行统计,等待时间包括等待上游的数据和等待下游的队列空出位置"""
+    name: str
+    frames: int = 0
+    busy_seconds: float = 0.0
+    wait_seconds: float = 0.0
+
+    @property
+    def utilization(self) -> float:
+        total: float = self.busy_seconds + self.wait_seconds
+        return self.busy_seconds / total if total > 0 else 0.0
+
+
+class FramePipeline:
+    """解码 -> 处理 -> 编码 三个阶段的流水线
+
+    解码和编码各自在一个线程里面运行,处理在调用run的线程里面运行,阶段之间使用有界队列连接。
+    下游处理不过来的时候上游会阻塞在队列上(背压),内存占用最多为队列深度对应的帧数。
+    OpenCV和ffmpeg管道读写的时候会释放GIL,所以解码和编码可以和处理器链同时进行
+
+    注意:
+        如果解码阶段复用缓冲区(例如FFmpegFrameReader),缓冲区的数量至少要为get_required_buffer_count的返回值
+
+    Examples:
+        >>> pipeline = FramePipeline(reader, manager.process, writer.write, queue_depth=8)
+        >>> pipeline.run()
+        >>> pipeline.get_stats()
+    """
+
+    def __init__(self,
+                 source: Iterable[np.ndarray],
+                 process: Callable[[np.ndarray], np.ndarray],
+                 sink: Callable[[np.ndarray], None],
+                 queue_depth: int = 8,
+                 on_frame_finished: Callable[[], None] | None = None,
+                 is_running: Callable[[], bool] | None = None,
+                 frame_pool: FramePool | None = None):
+        """
+        Args:
+            source: 解码阶段,按顺序产出帧
+            process: 处理阶段,输入一帧返回处理之后的帧
+            sink: 编码阶段,写入处理之后的帧
+            queue_depth: 每一个队列最多缓存多少帧
+            on_frame_finished: 每一帧编码完成之后调用,用于更新进度
+            is_running: 返回False的时候所有阶段尽快停止
+            frame_pool: 处理阶段使用的缓冲池,每一帧编码完成之后放回去
+        """
+        self._source = source
+        self._process = process
+        self._sink = sink
+        self._queue_depth: int = max(1, queue_depth)
+        self._on_frame_finished = on_frame_finished
+        self._is_running = is_running or (lambda: True)
+        self._frame_pool = frame_pool
+
+        self._decode_queue: queue.Queue = queue.Queue(self._queue_depth)
+        self._encode_queue: queue.Queue = queue.Queue(self._queue_depth)
+        self._stop_event = threading.Event()
+        self._errors: list[BaseException] = []
+        self._stats: dict[str, StageStats] = {name: StageStats(name) for name in ('decode', 'process', 'encode')}
+
+    @staticmethod
+    def get_required_buffer_count(queue_depth: int) -> int:
+        """解码阶段复用缓冲区时需要的缓冲区数量
+
+        处理器没有生成新的帧的时候,同一个缓冲区可能同时在两个队列以及三个阶段里面
+        """
+        return 2 * max(1, queue_depth) + 3
+
+    def run(self) -> None:
+        """运行流水线,直到所有帧编码完成、被停止或者任意一个阶段出错,出错时在这里重新抛出异常"""
+        decode_thread = threading.Thread(target=self._run_stage, args=(self._decode_loop,), daemon=True)
+        encode_thread = threading.Thread(target=self._run_stage, args=(self._encode_loop,), daemon=True)
+        decode_thread.start()
+        encode_thread.start()
+
+        self._run_stage(self._process_loop)
+        decode_thread.join()
+        encode_thread.join()
+
+        self._log_stats()
+        if self._errors:
+            raise self._errors[0]
+
+    def get_stats(self) -> dict[str, StageStats]:
+        """各个阶段的统计,利用率最高的阶段就是瓶颈"""
+        return self._stats
+
+    def _run_stage(self, loop: Callable[[], None]) -> None:
+        try:
+            loop()
+        except BaseException as e:
+            self._errors.append(e)
+            self._stop_event.set()
+
+    def _decode_loop(self) -> None:
+        stats: StageStats = self._stats['decode']
+        start: float = time.perf_counter()
+        for frame in self._source:
+            stats.busy_seconds += time.perf_counter() - start
+            if self._should_stop() or not self._put(self._decode_queue, frame, stats):
+                return
+            stats.frames += 1
+            start = time.perf_counter()
+        self._put(self._decode_queue, _END, stats)
+
+    def _process_loop(self) -> None:
+        stats: StageStats = self._stats['process']
+        while (frame := self._get(self._decode_queue, stats)) is not _END:
+            if self._should_stop():
+                return
+            start: float = time.perf_counter()
+            processed_frame: np.ndarray = self._process(frame)
+            stats.busy_seconds += time.perf_counter() - start
+            if not self._put(self._encode_queue, processed_frame, stats):
+                return
+            stats.frames += 1
+        self._put(self._encode_queue, _END, stats)
+
+    def _encode_loop(self) -> None:
+        stats: StageStats = self._stats['encode']
+        while (frame := self._get(self._encode_queue, stats)) is not _END:
+            start: float = time.perf_counter()
+            self._sink(frame)
+            if self._frame_pool is not None:
+                self._frame_pool.release(frame)
+            stats.busy_seconds += time.perf_counter() - start
+            stats.frames += 1
+            if self._on_frame_finished is not None:
+                self._on_frame_finished()
+
+    def _should_stop(self) -> bool:
+        if not self._is_running():
+            self._stop_event.set()
+        return self._stop_event.is_set()
+
+    def _put(self, q: queue.Queue, item, stats: StageStats) -> bool:
+        start: float = time.perf_counter()
+        try:
+            while not self._should_stop():
+                try:
+                    q.put(item, timeout=POLL_INTERVAL)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            stats.wait_seconds += time.perf_counter() - start
+
+    def _get(self, q: queue.Queue, stats: StageStats):
+        start: float = time.perf_counter()
+        try:
+            while not self._should_stop():
+                try:
+                    return q.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+            return _END
+        finally:
+            stats.wait_seconds += time.perf_counter() - start
+
+    def _log_stats(self) -> None:
+        summary: str = ', '.join(f'{stats.name}: {stats.frames}帧 利用率{stats.utilization:.0%}'
+                                 for stats in self._stats.values())
+        bottleneck: StageStats = max(self._stats.values(), key=lambda x: x.utilization)
+        loguru.logger.info(f'帧处理流水线统计({summary}),瓶颈为{bottleneck.name}阶段')
@@ -0,0 +1,58 @@
+import threading
+import weakref
+
+import numpy as np
+
+
+class FramePool:
+    """按照形状和类型复用帧缓冲区,一条流水线使用一个
+
+    4K的帧每一帧都重新分配内存的时候,分配和缺页的开销在性能分析里面非常明显。
+    处理器通过acquire取得输出缓冲区,帧用完之后(例如编码完成)通过release放回去,
+    下一帧就可以直接复用。release只接受由这个缓冲池分配的数组,其他数组(例如解码器的缓冲区)会被忽略
+
+    注意:
+        放回去之后这个数组随时会被覆盖,调用release之后不能再使用它
+
+    Examples:
+        >>> pool = FramePool()
+        >>> dst = pool.acquire((720, 1280, 3), np.uint8)
+        >>> pool.release(dst)
+    """
+
+    def __init__(self):
+        # 处理和编码在不同的线程里面,取出和放回需要加锁
+        self._lock = threading.Lock()
+        self._free: dict[tuple[tuple[int, ...], np.dtype], list[np.ndarray]] = {}
+        # 只保存弱引用,被处理器丢弃而没有放回来的缓冲区可以正常被回收
+        self._owned: weakref.WeakValueDictionary[int, np.ndarray] = weakref.WeakValueDictionary()
+        self._free_ids: set[int] = set()
+
+    def acquire(self, shape: tuple[int, ...], dtype: np.dtype | type = np.uint8) -> np.ndarray:
+        """取出一个空闲的缓冲区,没有空闲的时候分配一个新的,内容是未初始化的"""
+        key = (tuple(shape), np.dtype(dtype))
+        with self._lock:
+            free: list[np.ndarray] = self._free.get(key)
+            if free:
+                buffer: np.ndarray = free.pop()
+                self._free_ids.discard(id(buffer))
+                return buffer
+
+        buffer = np.empty(key[0], dtype=key[1])
+        with self._lock:
+            self._owned[id(buffer)] = buffer
+        return buffer
+
+    def release(self, frame: np.ndarray) -> None:
+        """把缓冲区放回缓冲池,不是由这个缓冲池分配的数组直接忽略"""
+        with self._lock:
+            # 比较对象本身而不是id,防止被回收的缓冲区的id被其他数组复用;重复放回也直接忽略
+            if self._owned.get(id(frame)) is not frame or id(frame) in self._free_ids:
+                return
+            self._free_ids.add(id(frame))
+            self._free.setdefault((frame.shape, frame.dtype), []).append(frame)
+
+    def get_allocated_count(self) -> int:
+        """由这个缓冲池分配并且还没有被回收的缓冲区数量"""
+        with self._lock:
+            return len(self._owned)
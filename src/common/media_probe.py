@@ -0,0 +1,205 @@
+import json
+import subprocess
+import threading
+from fractions import Fraction
+from pathlib import Path
+
+import loguru
+
+from src.common.process_runner import ProcessRunner
+from src.config import cfg
+from src.core.datacls import MediaInfo
+from src.core.paths import FFPROBE_FILE
+
+# 每一帧都是关键帧的编码,不需要读取数据包就知道GOP为1
+INTRA_ONLY_CODECS: frozenset[str] = frozenset({'mjpeg', 'prores', 'dnxhd', 'ffv1', 'huffyuv', 'rawvideo',
+                                               'png', 'utvideo', 'qtrle', 'v210', 'cfhd'})
+# 估算GOP大小时读取开头多少个视频数据包
+KEYFRAME_PROBE_PACKETS: int = 600
+
+
+class MediaProbe:
+    """通过一次ffprobe读取媒体的全部信息
+
+    同一个文件在分析、去黑边、编码的时候都需要用到帧数、宽高、帧率、音频等信息,
+    以前每一步都要重新打开一次视频,在网络硬盘上每次打开都要几百毫秒,现在统一在这里读取并缓存
+
+    缓存以(路径, 文件大小, 修改时间)作为键,文件被修改之后会自动重新读取
+    """
+    _cache: dict[tuple[str, int, int], MediaInfo] = {}
+    _keyframe_interval_cache: dict[tuple[str, int, int], int] = {}
+    _lock = threading.Lock()
+
+    def probe(self, media_path: str | Path) -> MediaInfo:
+        media_path = Path(media_path)
+        if not media_path.exists():
+            raise FileNotFoundError(f"文件不存在: {media_path}")
+
+        stat = media_path.stat()
+        key = (str(media_path.resolve()), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+
+        media_info = self.parse(media_path, self._run_ffprobe(media_path))
+        with self._lock:
+            self._cache[key] = media_info
+        loguru.logger.debug(f'读取媒体信息完成: {media_info}')
+        return media_info
+
+    def probe_keyframe_interval(self, media_path: str | Path) -> int:
+        """估算视频的关键帧间隔(GOP大小),只读取开头的数据包标记,不解码
+
+        Returns:
+            平均多少帧一个关键帧,无法确定时返回0
+        """
+        media_path = Path(media_path)
+        if self.probe(media_path).video_codec in INTRA_ONLY_CODECS:
+            return 1
+
+        stat = media_path.stat()
+        key = (str(media_path.resolve()), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if key in self._keyframe_interval_cache:
+                return self._keyframe_interval_cache[key]
+
+        command = [str(FFPROBE_FILE),
+                   '-v', 'error',
+                   '-select_streams', 'v:0',
+                   '-read_intervals', f'%+#{KEYFRAME_PROBE_PACKETS}',
+                   '-show_entries', 'packet=flags',
+                   '-of', 'csv=p=0',
+                   str(media_path)]
+        result = _run_ffprobe_command(command)
+        if result.returncode != 0:
+            loguru.logger.warning(f'ffprobe读取{media_path}的关键帧失败: {result.stderr}')
+            return 0
+
+        keyframe_interval: int = self.parse_keyframe_interval(result.stdout.splitlines())
+        with self._lock:
+            self._keyframe_interval_cache[key] = keyframe_interval
+        loguru.logger.debug(f'[{media_path.name}]的关键帧间隔约为{keyframe_interval}帧')
+        return keyframe_interval
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._keyframe_interval_cache.clear()
+
+    @staticmethod
+    def parse(media_path: Path, probe_data: dict) -> MediaInfo:
+        """将ffprobe输出的json解析为MediaInfo
+
+        Args:
+            media_path: 媒体文件路径
+            probe_data: ffprobe -show_streams -show_format -of json 的输出
+
+        Returns:
+            媒体信息
+        """
+        streams: list[dict] = probe_data.get('streams', [])
+        video_stream: dict = next((each for each in streams if each.get('codec_type') == 'video'
+                                   and not each.get('disposition', {}).get('attached_pic')), {})
+        audio_stream: dict | None = next((each for each in streams if each.get('codec_type') == 'audio'), None)
+        format_info: dict = probe_data.get('format', {})
+
+        avg_frame_rate: Fraction = _parse_rate(video_stream.get('avg_frame_rate'))
+        r_frame_rate: Fraction = _parse_rate(video_stream.get('r_frame_rate'))
+        fps: Fraction = avg_frame_rate or r_frame_rate
+        duration: float = _parse_float(format_info.get('duration')) or _parse_float(video_stream.get('duration'))
+        frame_count: int = _parse_int(video_stream.get('nb_frames'))
+        if not frame_count and fps and duration:
+            frame_count = round(duration * fps)
+
+        # 没有音频流的时候音频相关的字段全部为空
+        audio_info: dict = audio_stream or {}
+
+        return MediaInfo(path=media_path,
+                         width=_parse_int(video_stream.get('width')),
+                         height=_parse_int(video_stream.get('height')),
+                         fps=fps,
+                         duration=duration,
+                         frame_count=frame_count,
+                         rotation=_parse_rotation(video_stream),
+                         video_codec=video_stream.get('codec_name', ''),
+                         pix_fmt=video_stream.get('pix_fmt', ''),
+                         has_audio=audio_stream is not None,
+                         audio_codec=audio_info.get('codec_name'),
+                         sample_rate=_parse_int(audio_info.get('sample_rate')) or None,
+                         audio_profile=audio_info.get('profile'),
+                         audio_channels=_parse_int(audio_info.get('channels')),
+                         audio_channel_layout=audio_info.get('channel_layout'),
+                         is_constant_frame_rate=bool(avg_frame_rate) and avg_frame_rate == r_frame_rate,
+                         start_time=_parse_float(video_stream.get('start_time')))
+
+    @staticmethod
+    def parse_keyframe_interval(packet_flags: list[str]) -> int:
+        """根据数据包的flags(例如K__表示关键帧)计算平均关键帧间隔
+
+        读取范围内只有一个关键帧的时候,GOP至少和读取的数据包数量一样长
+
+        Args:
+            packet_flags: ffprobe -show_entries packet=flags -of csv=p=0 的每一行
+
+        Returns:
+            平均多少帧一个关键帧,没有关键帧时返回0
+        """
+        packet_flags = [each.strip() for each in packet_flags if each.strip()]
+        keyframe_positions: list[int] = [i for i, flags in enumerate(packet_flags) if 'K' in flags]
+        if not keyframe_positions:
+            return 0
+        if len(keyframe_positions) == 1:
+            return len(packet_flags)
+        return round((keyframe_positions[-1] - keyframe_positions[0]) / (len(keyframe_positions) - 1))
+
+    @staticmethod
+    def _run_ffprobe(media_path: Path) -> dict:
+        command = [str(FFPROBE_FILE),
+                   '-v', 'error',
+                   '-show_streams',
+                   '-show_format',
+                   '-of', 'json',
+                   str(media_path)]
+        result = _run_ffprobe_command(command)
+        if result.returncode != 0:
+            loguru.logger.error(f'ffprobe读取{media_path}失败: {result.stderr}')
+            raise ValueError(f"无法读取媒体信息: {media_path}")
+        return json.loads(result.stdout)
+
+
+def _run_ffprobe_command(command: list[str]) -> subprocess.CompletedProcess:
+    # 通过ProcessRunner启动,暂停的时候会被结束,同时使用和ffmpeg一样的超时时间
+    timeout: float = cfg.get(cfg.ffmpeg_timeout) * 60
+    return ProcessRunner().run(command, timeout or None, stdin=subprocess.DEVNULL)
+
+
+def _parse_rate(rate: str | None) -> Fraction:
+    # ffprobe在无法确定帧率的时候会输出0/0
+    if not rate or rate.endswith('/0'):
+        return Fraction(0)
+    return Fraction(rate)
+
+
+def _parse_float(value: str | None) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _parse_int(value: str | int | None) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _parse_rotation(video_stream: dict) -> int:
+    # 旧的文件把旋转写在rotate标签里面(顺时针),新的写在Display Matrix里面(逆时针)
+    rotate_tag = video_stream.get('tags', {}).get('rotate')
+    if rotate_tag is not None:
+        return _parse_int(rotate_tag) % 360
+    for side_data in video_stream.get('side_data_list', []):
+        if 'rotation' in side_data:
+            return -_parse_int(side_data['rotation']) % 360
+    return 0
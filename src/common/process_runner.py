@@ -0,0 +1,162 @@
+import os
+import signal
+import subprocess
+import sys
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import loguru
+
+from src.signal_bus import SignalBus
+from src.utils import singleton
+
+# 发送终止信号之后等待子进程退出的时间,超过这个时间直接强制结束
+TERMINATE_GRACE_SECONDS: float = 3.0
+
+Command = list[str | Path]
+
+
+@dataclass(slots=True)
+class _RunningProcess:
+    process: subprocess.Popen
+    timer: threading.Timer | None = None
+    stop_reason: str | None = None  # 'timeout'或者'cancel',为None表示正常运行
+
+
+class ProcessCancelledError(RuntimeError):
+    """子进程因为用户暂停而被终止"""
+
+
+@singleton
+class ProcessRunner:
+    """统一启动和管理外部子进程(ffmpeg, ffprobe等)
+
+    - 只接受参数列表,不经过shell,路径里面的空格和引号不需要额外转义
+    - 每一个子进程都在独立的进程组中启动,并登记在注册表里面
+    - 收到set_running(False)信号的时候结束所有正在运行的进程组,CPU立刻释放,不需要等待ffmpeg自己跑完
+    - 支持给单个任务设置超时时间,超时之后结束整个进程组
+    """
+
+    def __init__(self):
+        self._signal_bus = SignalBus()
+        self._lock = threading.Lock()
+        self._running_processes: dict[int, _RunningProcess] = {}
+
+        self._signal_bus.set_running.connect(self._set_running)
+
+    def popen(self, command: Command, timeout: float | None = None, **kwargs) -> subprocess.Popen:
+        """启动子进程,必须使用wait等待结束,否则进程不会从注册表中移除
+
+        Args:
+            command: 参数列表
+            timeout: 超时时间,单位秒,为None或者0表示不限制
+            **kwargs: 传递给subprocess.Popen的其他参数
+
+        Returns:
+            已经启动的子进程
+        """
+        if not command:
+            raise ValueError("命令不能为空")
+        command = [str(x) for x in command]
+        kwargs.pop('shell', None)
+        if sys.platform == 'win32':
+            kwargs['creationflags'] = (kwargs.get('creationflags', 0)
+                                       | subprocess.CREATE_NEW_PROCESS_GROUP
+                                       | subprocess.CREATE_NO_WINDOW)
+        else:
+            kwargs['start_new_session'] = True
+
+        process = subprocess.Popen(command, **kwargs)
+        running_process = _RunningProcess(process)
+        if timeout:
+            running_process.timer = threading.Timer(timeout, self._on_timeout, args=(process.pid,))
+            running_process.timer.daemon = True
+            running_process.timer.start()
+        with self._lock:
+            self._running_processes[process.pid] = running_process
+        return process
+
+    def wait(self, process: subprocess.Popen) -> int:
+        """等待子进程结束并从注册表中移除
+
+        Raises:
+            subprocess.TimeoutExpired: 子进程超时被结束
+            ProcessCancelledError: 子进程因为暂停被结束
+        """
+        process.wait()
+        returncode: int = process.returncode
+        with self._lock:
+            running_process = self._running_processes.pop(process.pid, None)
+        if running_process is None:
+            return returncode
+
+        if running_process.timer is not None:
+            running_process.timer.cancel()
+        # 结束信号到达之前已经正常退出的进程按照成功处理
+        if returncode == 0:
+            return returncode
+        if running_process.stop_reason == 'timeout':
+            raise subprocess.TimeoutExpired(process.args, running_process.timer.interval)
+        if running_process.stop_reason == 'cancel':
+            raise ProcessCancelledError("您暂停了程序")
+        return returncode
+
+    def run(self, command: Command, timeout: float | None = None, **kwargs) -> subprocess.CompletedProcess:
+        """和subprocess.run类似,输出默认以文本的形式捕获"""
+        kwargs.setdefault('stdout', subprocess.PIPE)
+        kwargs.setdefault('stderr', subprocess.PIPE)
+        kwargs.setdefault('encoding', 'utf-8')
+        kwargs.setdefault('errors', 'replace')
+        process = self.popen(command, timeout, **kwargs)
+        try:
+            stdout, stderr = process.communicate()
+        finally:
+            returncode = self.wait(process)
+        return subprocess.CompletedProcess(process.args, returncode, stdout, stderr)
+
+    def terminate_all(self) -> None:
+        with self._lock:
+            running_processes = list(self._running_processes.values())
+        if running_processes:
+            loguru.logger.info(f'正在结束{len(running_processes)}个子进程')
+        for running_process in running_processes:
+            # 已经退出但是还没有调用wait的进程不需要结束,也不能标记为取消
+            if running_process.process.poll() is not None:
+                continue
+            running_process.stop_reason = running_process.stop_reason or 'cancel'
+            # 在后台线程里面结束,等待进程退出的时候不会卡住界面
+            threading.Thread(target=self._kill_process_group, args=(running_process.process,), daemon=True).start()
+
+    def _on_timeout(self, pid: int) -> None:
+        with self._lock:
+            running_process = self._running_processes.get(pid)
+        if running_process is None:
+            return
+        loguru.logger.error(f'子进程运行超时,已结束: {running_process.process.args}')
+        running_process.stop_reason = 'timeout'
+        self._kill_process_group(running_process.process)
+
+    @staticmethod
+    def _kill_process_group(process: subprocess.Popen) -> None:
+        if process.poll() is not None:
+            return
+
+        if sys.platform == 'win32':
+            # taskkill /T 会连同子进程一起结束
+            subprocess.run(['taskkill', '/F', '/T', '/PID', str(process.pid)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                           creationflags=subprocess.CREATE_NO_WINDOW)
+            return
+
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait(TERMINATE_GRACE_SECONDS)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    def _set_running(self, flag: bool) -> None:
+        if not flag:
+            self.terminate_all()
@@ -11,6 +11,11 @@ class AudioFFmpegProcessor(AudioProcessor):
         self._ffmpeg_handler = FFmpegHandler()
 
     def process(self, input_wav_path: Path) -> Path:
+        return self._ffmpeg_handler.audio_process(input_wav_path, audio_filter=self.get_audio_filters())
+
+    @staticmethod
+    def get_audio_filters() -> list[str]:
+        """根据配置生成音频滤镜,可以直接用在处理视频的ffmpeg命令里面"""
         audio_filters: list[str] = []
 
         # 音频降噪
@@ -29,8 +34,7 @@ class AudioFFmpegProcessor(AudioProcessor):
         audio_sample_rate: AudioSampleRate = cfg.get(cfg.audio_sample_rate)
         audio_filters.append(
             f"aresample={audio_sample_rate.value}:resampler=soxr:precision=28:osf=s16:dither_method=triangular")
-
-        return self._ffmpeg_handler.audio_process(input_wav_path, audio_filter=audio_filters)
+        return audio_filters
 
 
 if __name__ == '__main__':
@@ -1,13 +1,41 @@
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Generic, TypeVar
+from typing import Callable, Generic, TypeVar
 
 import numpy as np
 
+from src.common.frame_pool import FramePool
 from src.core.datacls import FFmpegDTO
+from src.core.dicts import VideoInfoDict
 
 T = TypeVar("T")
 
+FrameFunc = Callable[[np.ndarray], np.ndarray]
+# (输入帧, 输出缓冲区) -> 输出缓冲区
+FrameIntoFunc = Callable[[np.ndarray, np.ndarray], np.ndarray]
+# 输入帧的形状 -> 输出帧的形状
+ShapeFunc = Callable[[tuple[int, ...]], tuple[int, ...]]
+
+
+@dataclass(frozen=True, slots=True)
+class ShapeContext:
+    """推算输出形状时使用的参数,处理一个视频之前从ProcessorGlobalVar和配置中读取一次"""
+    video_info: VideoInfoDict
+    is_merging: bool
+
+
+@dataclass(frozen=True, slots=True)
+class ProcessorCapabilities:
+    """处理器的特性,调度的时候用来判断哪些处理器可以并行、合并、调整顺序或者交给ffmpeg"""
+    name: str
+    is_stateful: bool
+    is_pointwise: bool
+    changes_geometry: bool
+    relative_cost: float
+    ffmpeg_filter: str | None
+    supports_process_into: bool
+
 
 class BaseProcessor(ABC, Generic[T]):
     @abstractmethod
@@ -17,6 +45,29 @@ class BaseProcessor(ABC, Generic[T]):
 
 class OpenCVProcessor(BaseProcessor):
     is_enable: bool = True
+    # 处理结果依赖之前的帧(例如去抖动),这类处理器只能逐帧顺序处理,不能多进程并行
+    is_stateful: bool = False
+    # 每一个输出像素只取决于同一位置的输入像素(可以使用整帧的统计量),不需要邻域,可以和其他逐像素处理合并或者分块处理
+    is_pointwise: bool = False
+    # 会改变帧的大小或者像素的位置(剪裁、旋转、缩放),需要重写output_shape
+    changes_geometry: bool = False
+    # 相对的处理开销,以一次逐像素运算为1,只用来比较处理器之间的快慢
+    relative_cost: float = 1.0
+    # 效果相同(或者足够接近)的ffmpeg滤镜名称,多个滤镜使用逗号分隔,为None表示只能在OpenCV里面处理
+    ffmpeg_filter: str | None = None
+    # 实现了process_into,可以直接把结果写入缓冲池里面的缓冲区,
+    # 输出的类型必须和输入一致,形状和输入一致或者(会改变几何的处理器)和output_shape推算的一致
+    supports_process_into: bool = False
+
+    @classmethod
+    def get_capabilities(cls) -> ProcessorCapabilities:
+        return ProcessorCapabilities(name=cls.__name__,
+                                     is_stateful=cls.is_stateful,
+                                     is_pointwise=cls.is_pointwise,
+                                     changes_geometry=cls.changes_geometry,
+                                     relative_cost=cls.relative_cost,
+                                     ffmpeg_filter=cls.ffmpeg_filter,
+                                     supports_process_into=cls.supports_process_into)
 
     @abstractmethod
     def process(self, frame: np.ndarray) -> np.ndarray:
@@ -31,6 +82,50 @@ class OpenCVProcessor(BaseProcessor):
         """
         raise NotImplementedError("Not implemented yet")
 
+    def compile(self) -> FrameFunc:
+        """处理一个视频之前调用一次,提前读取配置和参数,返回只负责处理帧的函数
+
+        默认直接返回process,需要读取配置或者ProcessorGlobalVar的处理器应该重写这个方法,
+        这样逐帧处理的时候就不再需要访问配置
+        """
+        return self.process
+
+    @staticmethod
+    def output_shape(input_shape: tuple[int, ...], context: ShapeContext) -> tuple[int, ...]:
+        """
+        根据输入帧的形状推算处理之后帧的形状,不读取也不处理任何帧
+
+        必须是纯函数,只能依赖参数;默认形状不变,会改变帧大小的处理器需要重写
+
+        Args:
+            input_shape: 输入帧的形状(高, 宽, 通道)
+            context: 剪裁、旋转、目标分辨率等参数
+
+        Returns:
+            处理之后帧的形状
+        """
+        return input_shape
+
+    def process_into(self, frame: np.ndarray, dst: np.ndarray) -> np.ndarray:
+        """
+        将输入的帧进行处理并把结果写入dst,不分配新的帧
+
+        默认先调用process再复制,支持的处理器应该重写这个方法并且把supports_process_into设置为True
+
+        Args:
+            frame: 输入的帧
+            dst: 和输入的帧类型一样、形状为output_shape推算结果的输出缓冲区,不能和frame是同一个数组
+
+        Returns:
+            dst
+        """
+        np.copyto(dst, self.process(frame))
+        return dst
+
+    def compile_into(self) -> FrameIntoFunc:
+        """和compile一样,返回写入输出缓冲区的处理函数"""
+        return self.process_into
+
 
 class FFmpegProcessor(BaseProcessor):
     is_enable: bool = True
@@ -81,6 +176,64 @@ class AudioProcessor(BaseProcessor):
         raise NotImplementedError("Not implemented yet")
 
 
+@dataclass(frozen=True, slots=True)
+class IntoStep:
+    """处理计划中把结果写入输出缓冲区的一步"""
+    func: FrameIntoFunc
+    output_shape: ShapeFunc | None = None  # 为None表示输出的形状和输入一致
+
+
+@dataclass(frozen=True, slots=True)
+class ProcessingPlan:
+    """一个视频的处理计划,由OpenCVProcessorManager.compile_plan生成,处理过程中不再读取任何配置"""
+    steps: tuple[FrameFunc | IntoStep, ...] = ()
+
+    @classmethod
+    def from_processors(cls, processors: list[OpenCVProcessor],
+                        context: ShapeContext | None = None) -> 'ProcessingPlan':
+        """编译每一个处理器,支持process_into的处理器使用写入输出缓冲区的版本
+
+        Args:
+            processors: 启用的处理器
+            context: 推算输出形状使用的参数,为None时会改变几何的处理器每一帧分配新的输出帧
+        """
+        steps: list[FrameFunc | IntoStep] = []
+        for processor in processors:
+            if not processor.supports_process_into:
+                steps.append(processor.compile())
+            elif not processor.changes_geometry:
+                steps.append(IntoStep(processor.compile_into()))
+            elif context is not None:
+                steps.append(IntoStep(processor.compile_into(),
+                                      lambda shape, p=processor: p.output_shape(shape, context)))
+            else:
+                steps.append(processor.compile())
+        return cls(tuple(steps))
+
+    def process(self, frame: np.ndarray, pool: FramePool | None = None) -> np.ndarray:
+        """
+        按顺序执行处理计划
+
+        Args:
+            frame: 输入的帧
+            pool: 输出缓冲区从这里取,中间结果用完之后马上放回去;为None时每一步都分配新的帧
+
+        Returns:
+            处理后的帧,如果来自缓冲池,用完之后需要调用pool.release放回去
+        """
+        for step in self.steps:
+            if isinstance(step, IntoStep):
+                shape: tuple[int, ...] = frame.shape if step.output_shape is None else step.output_shape(frame.shape)
+                dst: np.ndarray = np.empty(shape, frame.dtype) if pool is None else pool.acquire(shape, frame.dtype)
+                result: np.ndarray = step.func(frame, dst)
+                if pool is not None:
+                    pool.release(frame)
+                frame = result
+            else:
+                frame = step(frame)
+        return frame
+
+
 class BaseProcessorManager(ABC, Generic[T]):
     def __init__(self):
         self._processors: list[BaseProcessor] = []
@@ -5,6 +5,10 @@ from src.common.processors.base_processor import OpenCVProcessor
 
 
 class BilateralDenoiseProcessor(OpenCVProcessor):
+    supports_process_into = True
+    relative_cost = 12
+    ffmpeg_filter = 'bilateral'
+
     def process(self, frame: np.ndarray) -> np.ndarray:
         """
         使用cv2.bilateralFilter对输入的帧进行降噪处理
@@ -16,3 +20,6 @@ class BilateralDenoiseProcessor(OpenCVProcessor):
             处理后的帧，一个numpy数组
         """
         return cv2.bilateralFilter(frame, d=9, sigmaColor=75, sigmaSpace=75)
+
+    def process_into(self, frame: np.ndarray, dst: np.ndarray) -> np.ndarray:
+        return cv2.bilateralFilter(frame, d=9, sigmaColor=75, sigmaSpace=75, dst=dst)
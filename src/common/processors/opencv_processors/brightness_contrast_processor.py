@@ -1,10 +1,13 @@
 import cv2
 import numpy as np
 
-from src.common.processors.base_processor import OpenCVProcessor
+from src.common.processors.base_processor import FrameFunc, FrameIntoFunc, OpenCVProcessor
 
 
 class BrightnessContrastProcessor(OpenCVProcessor):
+    supports_process_into = True
+    relative_cost = 4
+
     def __init__(self, clip_limit=2.0, tile_grid_size=(8, 8)):
         """
         初始化自适应直方图均衡化处理器
@@ -41,6 +44,39 @@ class BrightnessContrastProcessor(OpenCVProcessor):
 
         return cv2.cvtColor(limg, cv2.COLOR_LAB2BGR)
 
+    def compile(self) -> FrameFunc:
+        # CLAHE对象只创建一次
+        clahe = cv2.createCLAHE(clipLimit=self.clip_limit, tileGridSize=self.tile_grid_size)
+
+        def adjust(frame: np.ndarray) -> np.ndarray:
+            l, a, b = cv2.split(cv2.cvtColor(frame, cv2.COLOR_BGR2LAB))
+            return cv2.cvtColor(cv2.merge((clahe.apply(l), a, b)), cv2.COLOR_LAB2BGR)
+
+        return adjust
+
+    def process_into(self, frame: np.ndarray, dst: np.ndarray) -> np.ndarray:
+        return self.compile_into()(frame, dst)
+
+    def compile_into(self) -> FrameIntoFunc:
+        clahe = cv2.createCLAHE(clipLimit=self.clip_limit, tileGridSize=self.tile_grid_size)
+        # LAB帧和L通道只在第一帧(或者大小变化)的时候分配,不再拆分和合并三个通道
+        lab: np.ndarray | None = None
+        lightness: np.ndarray | None = None
+
+        def adjust_into(frame: np.ndarray, dst: np.ndarray) -> np.ndarray:
+            nonlocal lab, lightness
+            if lab is None or lab.shape != frame.shape:
+                lab = np.empty_like(frame)
+                lightness = np.empty(frame.shape[:2], dtype=frame.dtype)
+
+            cv2.cvtColor(frame, cv2.COLOR_BGR2LAB, dst=lab)
+            cv2.extractChannel(lab, 0, dst=lightness)
+            clahe.apply(lightness, dst=lightness)
+            cv2.insertChannel(lightness, lab, 0)
+            return cv2.cvtColor(lab, cv2.COLOR_LAB2BGR, dst=dst)
+
+        return adjust_into
+
 
 # Example usage
 if __name__ == "__main__":
@@ -1,14 +1,30 @@
 import numpy as np
 
-from src.common.processors.base_processor import OpenCVProcessor
+from src.common.processors.base_processor import FrameFunc, OpenCVProcessor, ShapeContext
 from src.common.processors.processor_global_var import ProcessorGlobalVar
 
 
 class CropProcessor(OpenCVProcessor):
+    changes_geometry = True
+    # 只是切片视图,几乎没有开销
+    relative_cost = 0
+    ffmpeg_filter = 'crop'
+
     def __init__(self):
         self._processor_global_var = ProcessorGlobalVar()
 
     def process(self, frame: np.ndarray) -> np.ndarray:
+        return self.compile()(frame)
+
+    @staticmethod
+    def output_shape(input_shape: tuple[int, ...], context: ShapeContext) -> tuple[int, ...]:
+        crop_width: int = context.video_info.get("crop_width")
+        crop_height: int = context.video_info.get("crop_height")
+        if crop_width is None or crop_height is None:
+            return input_shape
+        return crop_height, crop_width, *input_shape[2:]
+
+    def compile(self) -> FrameFunc:
         crop_x: int = self._processor_global_var.get("crop_x")
         crop_y: int = self._processor_global_var.get("crop_y")
         crop_width: int = self._processor_global_var.get("crop_width")
@@ -16,7 +32,7 @@ class CropProcessor(OpenCVProcessor):
 
         # 如果全部都为None，则不进行裁剪
         if crop_x is None and crop_y is None and crop_width is None and crop_height is None:
-            return frame
+            return lambda frame: frame
 
         # 如果只有一个参数为None对那个参数进行报错
         if crop_x is None:
@@ -28,4 +44,6 @@ class CropProcessor(OpenCVProcessor):
         elif crop_height is None:
             raise ValueError("crop_height 为None")
 
-        return frame[crop_y:crop_y + crop_height, crop_x:crop_x + crop_width]
+        rows = slice(crop_y, crop_y + crop_height)
+        columns = slice(crop_x, crop_x + crop_width)
+        return lambda frame: frame[rows, columns]
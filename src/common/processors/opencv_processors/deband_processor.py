@@ -1,10 +1,17 @@
 import cv2
 import numpy as np
 
-from src.common.processors.base_processor import OpenCVProcessor
+from src.common.processors.base_processor import FrameIntoFunc, OpenCVProcessor
+
+# 高斯噪声的标准差
+NOISE_SIGMA: float = 10
 
 
 class DebandProcessor(OpenCVProcessor):
+    supports_process_into = True
+    relative_cost = 5
+    ffmpeg_filter = 'deband'
+
     def process(self, frame: np.ndarray) -> np.ndarray:
         """
         使用opencv对输入的帧进行去色带处理
@@ -32,6 +39,32 @@ class DebandProcessor(OpenCVProcessor):
 
         return reduce_color_banding(frame)
 
+    def process_into(self, frame: np.ndarray, dst: np.ndarray) -> np.ndarray:
+        return self.compile_into()(frame, dst)
+
+    def compile_into(self) -> FrameIntoFunc:
+        rng = np.random.default_rng()
+        # 噪声和加噪声之后的float32帧只在第一帧(或者大小变化)的时候分配
+        noise: np.ndarray | None = None
+        noisy_frame: np.ndarray | None = None
+
+        def deband(frame: np.ndarray, dst: np.ndarray) -> np.ndarray:
+            nonlocal noise, noisy_frame
+            if noise is None or noise.shape != frame.shape:
+                noise = np.empty(frame.shape, dtype=np.float32)
+                noisy_frame = np.empty(frame.shape, dtype=np.float32)
+
+            # 给图像添加高斯噪声
+            rng.standard_normal(dtype=np.float32, out=noise)
+            np.multiply(noise, NOISE_SIGMA, out=noise)
+            np.add(frame, noise, out=noisy_frame)
+            np.clip(noisy_frame, 0, 255, out=noisy_frame)
+            np.copyto(dst, noisy_frame, casting='unsafe')
+            # 使用高斯模糊平滑图像
+            return cv2.GaussianBlur(dst, (5, 5), 0, dst=dst)
+
+        return deband
+
 
 if __name__ == '__main__':
     img_path = r"E:\load\python\Project\VideoFusion\TempAndTest\images\deband1 (2).jpg"
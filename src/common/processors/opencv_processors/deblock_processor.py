@@ -5,6 +5,10 @@ from src.common.processors.base_processor import OpenCVProcessor
 
 
 class DeblockProcessor(OpenCVProcessor):
+    supports_process_into = True
+    relative_cost = 4
+    ffmpeg_filter = 'deblock'
+
     def process(self, frame: np.ndarray) -> np.ndarray:
         """
         使用cv2.medianBlur对输入的帧进行去色块处理
@@ -18,6 +22,9 @@ class DeblockProcessor(OpenCVProcessor):
         # 使用中值滤波去色块，这里的5是滤波器的大小
         return cv2.medianBlur(frame, 5)
 
+    def process_into(self, frame: np.ndarray, dst: np.ndarray) -> np.ndarray:
+        return cv2.medianBlur(frame, 5, dst=dst)
+
 
 if __name__ == '__main__':
     img_path = r"E:\load\python\Project\VideoFusion\TempAndTest\images\deband1 (2).jpg"
@@ -8,6 +8,9 @@ class DeshakeProcessor(OpenCVProcessor):
     """
     https://github.com/lengkujiaai/video_stabilization
     """
+    is_stateful: bool = True
+    relative_cost = 10
+    ffmpeg_filter = 'deshake'
 
     def __init__(self, max_corners=200, quality_level=0.01, min_distance=30, block_size=3, smoothing_radius=50):
         self.prev_pts = None
@@ -0,0 +1,202 @@
+from typing import Any, Callable
+
+import cv2
+import numpy as np
+
+from src.common.processors.base_processor import FrameFunc, FrameIntoFunc, OpenCVProcessor, ShapeContext
+from src.common.processors.opencv_processors.resize_processor import ResizeProcessor
+from src.common.processors.processor_global_var import ProcessorGlobalVar
+from src.config import cfg
+from src.core.datacls import CropInfo
+from src.core.enums import Orientation
+from src.utils import calculate_dimensions
+
+# 剪裁之后帧的形状 -> (仿射矩阵, 输出宽, 输出高),不需要变换的时候矩阵为None
+TransformFunc = Callable[[tuple[int, ...]], tuple[np.ndarray | None, int, int]]
+
+
+def get_clockwise_angle(width: int, height: int, angle: int, orientation: Orientation) -> int:
+    """宽高和朝向不一致时才旋转,返回剪裁之后需要顺时针旋转的角度,旋转方向和RotateProcessor保持一致"""
+    if not (orientation == Orientation.HORIZONTAL and height > width
+            or orientation == Orientation.VERTICAL and width > height):
+        return 0
+    match angle:
+        case 0 | 270:
+            return 90
+        case 90:
+            return 270
+        case 180:
+            return 180
+        case _:
+            raise ValueError(f"Invalid angle: {angle}")
+
+
+def get_geometry_transform(width: int,
+                           height: int,
+                           clockwise_angle: int,
+                           target: tuple[int, int] | None) -> tuple[np.ndarray, int, int]:
+    """把顺时针旋转、保持比例缩放以及居中填充合并成一个仿射变换
+
+    Args:
+        width: 剪裁之后帧的宽度
+        height: 剪裁之后帧的高度
+        clockwise_angle: 顺时针旋转的角度{0, 90, 180, 270}
+        target: 缩放并填充到的(宽, 高),为None表示不缩放
+
+    Returns:
+        2x3的仿射矩阵(输入坐标到输出坐标)以及输出帧的宽和高
+    """
+    w, h = width, height
+    match clockwise_angle:
+        case 0:
+            matrix = np.eye(3)
+        case 90:
+            matrix = np.array([[0, -1, h - 1], [1, 0, 0], [0, 0, 1]], dtype=np.float64)
+            w, h = h, w
+        case 180:
+            matrix = np.array([[-1, 0, w - 1], [0, -1, h - 1], [0, 0, 1]], dtype=np.float64)
+        case 270:
+            matrix = np.array([[0, 1, 0], [-1, 0, w - 1], [0, 0, 1]], dtype=np.float64)
+            w, h = h, w
+        case _:
+            raise ValueError(f"Invalid angle: {clockwise_angle}")
+
+    if target is not None:
+        target_width, target_height = target
+        new_width, new_height, pad_top, _, pad_left, _ = calculate_dimensions(w, h, target_width, target_height)
+        scale_x, scale_y = new_width / w, new_height / h
+        # 和cv2.resize一样按照像素中心对齐
+        scale = np.array([[scale_x, 0, 0.5 * scale_x - 0.5 + pad_left],
+                          [0, scale_y, 0.5 * scale_y - 0.5 + pad_top],
+                          [0, 0, 1]], dtype=np.float64)
+        matrix = scale @ matrix
+        w, h = target_width, target_height
+    return matrix[:2], w, h
+
+
+class GeometryProcessor(OpenCVProcessor):
+    """剪裁、旋转、缩放和填充合并成一次warpAffine
+
+    CropProcessor、RotateProcessor、ResizeProcessor每一个都会生成一帧新的图像,填充的时候还会再复制一次,
+    这里只计算一个仿射变换,直接写入输出缓冲区。效果和依次使用这三个处理器一致,
+    那三个处理器保留下来作为参考实现
+
+    注意:
+        OpenCVVideoEngine在ffmpeg解码的时候已经完成了剪裁、旋转和缩放,会通过set_geometry_enable关闭这个处理器,
+        只有直接处理原始帧的时候(例如OpenCVProcessorManager.process)才会用到
+    """
+    changes_geometry = True
+    relative_cost = 2
+    ffmpeg_filter = 'crop,transpose,scale,pad'
+    supports_process_into = True
+
+    def __init__(self):
+        self._processor_global_var = ProcessorGlobalVar()
+        # (剪裁之后的形状, 旋转, 朝向, 目标分辨率) -> (仿射矩阵, 输出宽, 输出高)
+        self._transform_cache: dict[tuple, tuple[np.ndarray | None, int, int]] = {}
+
+    def process(self, frame: np.ndarray) -> np.ndarray:
+        return self.compile()(frame)
+
+    def process_into(self, frame: np.ndarray, dst: np.ndarray) -> np.ndarray:
+        return self.compile_into()(frame, dst)
+
+    @staticmethod
+    def output_shape(input_shape: tuple[int, ...], context: ShapeContext) -> tuple[int, ...]:
+        video_info = context.video_info
+        crop: CropInfo | None = GeometryProcessor._get_crop(video_info.get)
+        height, width = (crop.h, crop.w) if crop is not None else input_shape[:2]
+        clockwise_angle: int = get_clockwise_angle(width, height,
+                                                   video_info.get('rotation_angle'), video_info.get('orientation'))
+        if clockwise_angle in (90, 270):
+            width, height = height, width
+        if context.is_merging:
+            width, height = video_info.get('target_width'), video_info.get('target_height')
+        return height, width, *input_shape[2:]
+
+    def compile(self) -> FrameFunc:
+        """每一帧都返回新分配的帧,需要复用缓冲区的时候使用compile_into"""
+        crop_slices, get_transform, interpolation = self._prepare()
+
+        def transform(frame: np.ndarray) -> np.ndarray:
+            cropped_frame: np.ndarray = frame[crop_slices]
+            matrix, width, height = get_transform(cropped_frame.shape)
+            if matrix is None:
+                return cropped_frame.copy()
+            return cv2.warpAffine(cropped_frame, matrix, (width, height),
+                                  flags=interpolation, borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+
+        return transform
+
+    def compile_into(self) -> FrameIntoFunc:
+        """结果写入调用方提供的缓冲区(例如从FramePool取出的),形状必须和output_shape推算的一致"""
+        crop_slices, get_transform, interpolation = self._prepare()
+
+        def transform_into(frame: np.ndarray, dst: np.ndarray) -> np.ndarray:
+            cropped_frame: np.ndarray = frame[crop_slices]
+            matrix, width, height = get_transform(cropped_frame.shape)
+            if dst.shape[:2] != (height, width):
+                raise ValueError(f"输出缓冲区的大小{dst.shape}和预期的{(height, width)}不一致")
+            if matrix is None:
+                np.copyto(dst, cropped_frame)
+                return dst
+            # 常数边界会覆盖dst的每一个像素,填充区域不需要提前清零
+            return cv2.warpAffine(cropped_frame, matrix, (width, height), dst=dst,
+                                  flags=interpolation, borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+
+        return transform_into
+
+    def _prepare(self) -> tuple[tuple[slice, slice], TransformFunc, int]:
+        """读取剪裁、旋转和目标分辨率,返回(剪裁的切片, 根据剪裁之后的形状取得变换的函数, 插值方式)"""
+        crop: CropInfo | None = self._get_crop(self._processor_global_var.get)
+        angle: int = self._processor_global_var.get('rotation_angle')
+        orientation: Orientation = self._processor_global_var.get("orientation")
+        if orientation is None:
+            raise ValueError("orientation is required")
+        if angle is None:
+            raise ValueError("angle is required")
+
+        target: tuple[int, int] | None = None
+        if cfg.get(cfg.merge_video):
+            target = (self._processor_global_var.get("target_width"), self._processor_global_var.get("target_height"))
+
+        # 剪裁直接使用切片视图,变换只作用在剪裁区域上,剪裁区域外面的像素不会被插值进来
+        crop_slices: tuple[slice, slice] = self._get_crop_slices(crop)
+        return (crop_slices, lambda shape: self._get_transform(shape, angle, orientation, target),
+                ResizeProcessor.get_interpolation())
+
+    @staticmethod
+    def _get_crop_slices(crop: CropInfo | None) -> tuple[slice, slice]:
+        if crop is None:
+            return slice(None), slice(None)
+        return slice(crop.y, crop.y + crop.h), slice(crop.x, crop.x + crop.w)
+
+    @staticmethod
+    def _get_crop(get: Callable[[str], Any]) -> CropInfo | None:
+        crop_x: int = get("crop_x")
+        crop_y: int = get("crop_y")
+        crop_width: int = get("crop_width")
+        crop_height: int = get("crop_height")
+        if crop_x is None or crop_y is None or crop_width is None or crop_height is None:
+            return None
+        return CropInfo(crop_x, crop_y, crop_width, crop_height)
+
+    def _get_transform(self, shape: tuple[int, ...],
+                       angle: int,
+                       orientation: Orientation,
+                       target: tuple[int, int] | None) -> tuple[np.ndarray | None, int, int]:
+        """返回剪裁之后的帧需要的仿射变换,不需要变换的时候矩阵为None"""
+        key = (shape, angle, orientation, target)
+        if key in self._transform_cache:
+            return self._transform_cache[key]
+
+        height, width = shape[:2]
+        clockwise_angle: int = get_clockwise_angle(width, height, angle, orientation)
+
+        result: tuple[np.ndarray | None, int, int]
+        if clockwise_angle == 0 and (target is None or target == (width, height)):
+            result = (None, width, height)
+        else:
+            result = get_geometry_transform(width, height, clockwise_angle, target)
+        self._transform_cache[key] = result
+        return result
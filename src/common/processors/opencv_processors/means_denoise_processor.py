@@ -5,6 +5,10 @@ from src.common.processors.base_processor import OpenCVProcessor
 
 
 class MeansDenoiseProcessor(OpenCVProcessor):
+    supports_process_into = True
+    relative_cost = 60
+    ffmpeg_filter = 'nlmeans'
+
     def process(self, frame: np.ndarray) -> np.ndarray:
         """
         使用cv2.fastNlMeansDenoisingColored对输入的帧进行降噪处理
@@ -16,3 +20,6 @@ class MeansDenoiseProcessor(OpenCVProcessor):
             处理后的帧，一个numpy数组
         """
         return cv2.fastNlMeansDenoisingColored(frame, None, 10, 10, 7, 21)
+
+    def process_into(self, frame: np.ndarray, dst: np.ndarray) -> np.ndarray:
+        return cv2.fastNlMeansDenoisingColored(frame, dst, 10, 10, 7, 21)
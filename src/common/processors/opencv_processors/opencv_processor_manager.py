@@ -1,14 +1,13 @@
 import numpy as np
 
-from src.common.processors.base_processor import BaseProcessorManager, OpenCVProcessor, T
+from src.common.processors.base_processor import (BaseProcessorManager, OpenCVProcessor, ProcessingPlan,
+                                                  ShapeContext, T)
 from src.common.processors.opencv_processors.bilateral_denoise_processor import BilateralDenoiseProcessor
 from src.common.processors.opencv_processors.brightness_contrast_processor import BrightnessContrastProcessor
-from src.common.processors.opencv_processors.crop_processor import CropProcessor
 from src.common.processors.opencv_processors.deband_processor import DebandProcessor
 from src.common.processors.opencv_processors.deblock_processor import DeblockProcessor
+from src.common.processors.opencv_processors.geometry_processor import GeometryProcessor
 from src.common.processors.opencv_processors.means_denoise_processor import MeansDenoiseProcessor
-from src.common.processors.opencv_processors.resize_processor import ResizeProcessor
-from src.common.processors.opencv_processors.rotate_processor import RotateProcessor
 from src.common.processors.opencv_processors.super_resolution_processor import (SuperResolutionESPCNProcessor,
                                                                                 SuperResolutionLapSRNProcessor)
 from src.common.processors.opencv_processors.white_balance_processor import WhiteBalanceProcessor
@@ -20,9 +19,8 @@ class OpenCVProcessorManager(BaseProcessorManager[np.ndarray]):
     def __init__(self):
         super().__init__()
         self._processor_global_var = ProcessorGlobalVar()
-        self._crop_processor = CropProcessor()
-        self._rotate_processor = RotateProcessor()
-        self._resize_processor = ResizeProcessor()
+        # 剪裁、旋转、缩放合并为一次仿射变换
+        self._geometry_processor = GeometryProcessor()
         self._white_balance_processor = WhiteBalanceProcessor()
         self._brightness_contrast_processor = BrightnessContrastProcessor()
         self._means_denoise_processor = MeansDenoiseProcessor()
@@ -33,9 +31,7 @@ class OpenCVProcessorManager(BaseProcessorManager[np.ndarray]):
         self._super_resolution_lapsrn_processor = SuperResolutionLapSRNProcessor()
 
         self._processors: list[OpenCVProcessor] = [
-                self._crop_processor,
-                self._rotate_processor,
-                self._resize_processor,
+                self._geometry_processor,
                 self._white_balance_processor,
                 self._brightness_contrast_processor,
                 self._means_denoise_processor,
@@ -48,8 +44,33 @@ class OpenCVProcessorManager(BaseProcessorManager[np.ndarray]):
     def get_processors(self) -> list[OpenCVProcessor]:
         return self._processors
 
-    def get_crop_processor(self) -> CropProcessor:
-        return self._crop_processor
+    def get_enabled_processors(self) -> list[OpenCVProcessor]:
+        """按照当前的配置返回所有启用的处理器"""
+        self._check_enabled_processors()
+        return [processor for processor in self._processors if processor.is_enable]
+
+    def compile_plan(self) -> ProcessingPlan:
+        """处理一个视频之前调用一次,把启用的处理器以及它们的参数解析成固定的处理步骤
+
+        process每一帧都会重新读取配置,逐帧处理的时候应该使用这里返回的计划
+        """
+        return ProcessingPlan.from_processors(self.get_enabled_processors(), self._get_shape_context())
+
+    def get_output_shape(self, input_shape: tuple[int, ...]) -> tuple[int, ...]:
+        """根据启用的处理器推算处理之后帧的形状,不需要解码或者处理任何帧"""
+        context: ShapeContext = self._get_shape_context()
+        for processor in self.get_enabled_processors():
+            input_shape = processor.output_shape(input_shape, context)
+        return input_shape
+
+    def get_geometry_processor(self) -> GeometryProcessor:
+        return self._geometry_processor
+
+    def set_geometry_enable(self, is_enable: bool):
+        """剪裁、旋转和缩放在ffmpeg解码的时候已经完成时,关闭所有会改变帧大小的处理器"""
+        for processor in self._processors:
+            if processor.changes_geometry:
+                processor.is_enable = is_enable
 
     def add_processor(self, processor: OpenCVProcessor):
         self._processors.append(processor)
@@ -64,6 +85,9 @@ class OpenCVProcessorManager(BaseProcessorManager[np.ndarray]):
             x = processor.process(x)
         return x
 
+    def _get_shape_context(self) -> ShapeContext:
+        return ShapeContext(dict(self._processor_global_var.get_data()), cfg.get(cfg.merge_video))
+
     def _check_enabled_processors(self):
         """读取配置文件，判断哪些处理器是启用的
         """
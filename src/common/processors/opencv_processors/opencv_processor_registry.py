@@ -0,0 +1,50 @@
+from src.common.processors.base_processor import OpenCVProcessor, ProcessorCapabilities
+from src.common.processors.opencv_processors.bilateral_denoise_processor import BilateralDenoiseProcessor
+from src.common.processors.opencv_processors.brightness_contrast_processor import BrightnessContrastProcessor
+from src.common.processors.opencv_processors.crop_processor import CropProcessor
+from src.common.processors.opencv_processors.deband_processor import DebandProcessor
+from src.common.processors.opencv_processors.deblock_processor import DeblockProcessor
+from src.common.processors.opencv_processors.deshake_processor import DeshakeProcessor
+from src.common.processors.opencv_processors.geometry_processor import GeometryProcessor
+from src.common.processors.opencv_processors.means_denoise_processor import MeansDenoiseProcessor
+from src.common.processors.opencv_processors.resize_processor import ResizeProcessor
+from src.common.processors.opencv_processors.rotate_processor import RotateProcessor
+from src.common.processors.opencv_processors.super_resolution_processor import (SuperResolutionESPCNProcessor,
+                                                                                SuperResolutionLapSRNProcessor)
+from src.common.processors.opencv_processors.white_balance_processor import WhiteBalanceProcessor
+
+# 所有内置的OpenCV处理器,只保存类型,不会创建实例(超分辨率等处理器创建的时候需要加载模型)
+_processor_types: dict[str, type[OpenCVProcessor]] = {
+        processor_type.__name__: processor_type for processor_type in (
+            GeometryProcessor,
+            CropProcessor,
+            RotateProcessor,
+            ResizeProcessor,
+            WhiteBalanceProcessor,
+            BrightnessContrastProcessor,
+            MeansDenoiseProcessor,
+            BilateralDenoiseProcessor,
+            DebandProcessor,
+            DeblockProcessor,
+            DeshakeProcessor,
+            SuperResolutionESPCNProcessor,
+            SuperResolutionLapSRNProcessor,
+            )
+        }
+
+
+def register_processor(processor_type: type[OpenCVProcessor]) -> type[OpenCVProcessor]:
+    """注册一个处理器,可以作为类装饰器使用"""
+    _processor_types[processor_type.__name__] = processor_type
+    return processor_type
+
+
+def get_processor_type(name: str) -> type[OpenCVProcessor]:
+    if name not in _processor_types:
+        raise KeyError(f"未知的处理器: {name}")
+    return _processor_types[name]
+
+
+def get_all_capabilities() -> list[ProcessorCapabilities]:
+    """列出所有已注册处理器的特性"""
+    return [processor_type.get_capabilities() for processor_type in _processor_types.values()]
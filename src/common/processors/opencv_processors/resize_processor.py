@@ -2,7 +2,7 @@ import cv2
 import loguru
 import numpy as np
 
-from src.common.processors.base_processor import OpenCVProcessor
+from src.common.processors.base_processor import FrameFunc, OpenCVProcessor, ShapeContext
 from src.common.processors.processor_global_var import ProcessorGlobalVar
 from src.config import ScalingQuality, cfg
 
@@ -17,7 +17,9 @@ class ResizeCache:
         self.pad_right = None
 
     def is_set(self):
-        return all([self.new_width, self.new_height, self.pad_top, self.pad_bottom, self.pad_left, self.pad_right])
+        # 填充的大小可能为0,不能用all判断
+        return all(x is not None for x in (self.new_width, self.new_height, self.pad_top, self.pad_bottom,
+                                           self.pad_left, self.pad_right))
 
     def set_values(self, new_width, new_height, pad_top, pad_bottom, pad_left, pad_right):
         self.new_width = new_width
@@ -32,6 +34,10 @@ class ResizeCache:
 
 
 class ResizeProcessor(OpenCVProcessor):
+    changes_geometry = True
+    relative_cost = 2
+    ffmpeg_filter = 'scale,pad'
+
     def __init__(self):
         self._processor_global_var = ProcessorGlobalVar()
         self._cache = ResizeCache()
@@ -71,21 +77,7 @@ class ResizeProcessor(OpenCVProcessor):
             pad_right = self._cache.pad_right
 
         # 缩放视频帧到新的尺寸
-        resize_algorithm: ScalingQuality = cfg.get(cfg.scaling_quality)
-        match resize_algorithm:
-            case ScalingQuality.Nearest:
-                resized_frame = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_NEAREST)
-            case ScalingQuality.Bilinear:
-                resized_frame = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
-            case ScalingQuality.Bicubic:
-                resized_frame = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_CUBIC)
-            case ScalingQuality.Lanczos:
-                resized_frame = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_LANCZOS4)
-            case ScalingQuality.Sinc:
-                resized_frame = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_CUBIC)
-            case _:
-                loguru.logger.error(f"Invalid scaling quality: {resize_algorithm}")
-                resized_frame = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+        resized_frame = cv2.resize(frame, (new_width, new_height), interpolation=self.get_interpolation())
 
         return cv2.copyMakeBorder(
                 resized_frame,
@@ -97,6 +89,53 @@ class ResizeProcessor(OpenCVProcessor):
                 value=[0, 0, 0],
                 )
 
+    @staticmethod
+    def output_shape(input_shape: tuple[int, ...], context: ShapeContext) -> tuple[int, ...]:
+        if not context.is_merging:
+            return input_shape
+        return context.video_info.get("target_height"), context.video_info.get("target_width"), *input_shape[2:]
+
+    def compile(self) -> FrameFunc:
+        # 不需要合并就不需要调整分辨率
+        is_merge: bool = cfg.get(cfg.merge_video)
+        if not is_merge:
+            return lambda frame: frame
+
+        target_width: int = self._processor_global_var.get("target_width")
+        target_height: int = self._processor_global_var.get("target_height")
+        interpolation: int = self.get_interpolation()
+        # 同一个视频所有帧的大小都一样,第一帧的时候计算一次,每一次编译都是新的缓存
+        cache = ResizeCache()
+
+        def resize(frame: np.ndarray) -> np.ndarray:
+            if not cache.is_set():
+                height, width = frame.shape[:2]
+                cache.set_values(*self._calculate_dimensions(width, height, target_width, target_height))
+
+            resized_frame = cv2.resize(frame, (cache.new_width, cache.new_height), interpolation=interpolation)
+            return cv2.copyMakeBorder(resized_frame, cache.pad_top, cache.pad_bottom, cache.pad_left,
+                                      cache.pad_right, cv2.BORDER_CONSTANT, value=[0, 0, 0])
+
+        return resize
+
+    @staticmethod
+    def get_interpolation() -> int:
+        resize_algorithm: ScalingQuality = cfg.get(cfg.scaling_quality)
+        match resize_algorithm:
+            case ScalingQuality.Nearest:
+                return cv2.INTER_NEAREST
+            case ScalingQuality.Bilinear:
+                return cv2.INTER_LINEAR
+            case ScalingQuality.Bicubic:
+                return cv2.INTER_CUBIC
+            case ScalingQuality.Lanczos:
+                return cv2.INTER_LANCZOS4
+            case ScalingQuality.Sinc:
+                return cv2.INTER_CUBIC
+            case _:
+                loguru.logger.error(f"Invalid scaling quality: {resize_algorithm}")
+                return cv2.INTER_LINEAR
+
     def _calculate_dimensions(self, width: int, height: int, target_width: int, target_height: int):
         if width == 0 or height == 0:
             loguru.logger.critical("视频的宽度或高度为0, 请检查视频")
@@ -1,17 +1,34 @@
 import cv2
 import numpy as np
 
-from src.common.processors.base_processor import OpenCVProcessor
+from src.common.processors.base_processor import FrameFunc, OpenCVProcessor, ShapeContext
 from src.common.processors.processor_global_var import ProcessorGlobalVar
 from src.core.enums import Orientation
 
 
 class RotateProcessor(OpenCVProcessor):
+    changes_geometry = True
+    ffmpeg_filter = 'transpose'
+
     def __init__(self):
         self._processor_global_var = ProcessorGlobalVar()
         # 获取旋转的角度{0, 90, 180, 270}
 
     def process(self, frame: np.ndarray) -> np.ndarray:
+        return self.compile()(frame)
+
+    @staticmethod
+    def output_shape(input_shape: tuple[int, ...], context: ShapeContext) -> tuple[int, ...]:
+        height, width = input_shape[:2]
+        orientation: Orientation = context.video_info.get("orientation")
+        # 只有宽高和朝向不一致时才旋转,旋转180度宽高不变
+        if context.video_info.get("rotation_angle") != 180 and (
+                orientation == Orientation.HORIZONTAL and height > width
+                or orientation == Orientation.VERTICAL and width > height):
+            return width, height, *input_shape[2:]
+        return input_shape
+
+    def compile(self) -> FrameFunc:
         angle: int = self._processor_global_var.get('rotation_angle')
         orientation: Orientation = self._processor_global_var.get("orientation")
 
@@ -34,13 +51,16 @@ class RotateProcessor(OpenCVProcessor):
             case _:
                 raise ValueError(f"Invalid angle: {angle}")
 
-        frame_width: int = frame.shape[1]
-        frame_height: int = frame.shape[0]
+        def rotate(frame: np.ndarray) -> np.ndarray:
+            frame_width: int = frame.shape[1]
+            frame_height: int = frame.shape[0]
+
+            # 如果视频的宽高和视频的朝向不一致，则旋转视频
+            # 例如视频的宽300，高100，此时视频是一个横屏视频，但是视频的朝向是竖屏,此时就要旋转
+            # 视频的宽高和视频的朝向一致，则不需要旋转
+            if (((orientation == Orientation.HORIZONTAL) and (frame_height > frame_width))
+                    or (orientation == Orientation.VERTICAL and frame_width > frame_height)):
+                frame = cv2.rotate(frame, cv2_angle)
+            return frame
 
-        # 如果视频的宽高和视频的朝向不一致，则旋转视频
-        # 例如视频的宽300，高100，此时视频是一个横屏视频，但是视频的朝向是竖屏,此时就要旋转
-        # 视频的宽高和视频的朝向一致，则不需要旋转
-        if (((orientation == Orientation.HORIZONTAL) and (frame_height > frame_width))
-                or (orientation == Orientation.VERTICAL and frame_width > frame_height)):
-            frame = cv2.rotate(frame, cv2_angle)
-        return frame
+        return rotate
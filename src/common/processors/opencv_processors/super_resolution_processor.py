@@ -6,6 +6,8 @@ from src.core.paths import ESPCN_x2_FILE, LapSRN_x2_FILE
 
 
 class SuperResolutionESPCNProcessor(OpenCVProcessor):
+    relative_cost = 100
+
     def __init__(self, scale_factor=2):
         """
         图像超分辨率处理器，使用ESPCN模型
@@ -41,6 +43,8 @@ class SuperResolutionESPCNProcessor(OpenCVProcessor):
 
 
 class SuperResolutionLapSRNProcessor(SuperResolutionESPCNProcessor):
+    relative_cost = 150
+
     def __init__(self, scale_factor=2):
         super().__init__()
         self.model.readModel(str(LapSRN_x2_FILE))
@@ -5,6 +5,10 @@ from src.common.processors.base_processor import OpenCVProcessor
 
 
 class WhiteBalanceProcessor(OpenCVProcessor):
+    supports_process_into = True
+    is_pointwise = True
+    relative_cost = 2
+
     def __init__(self):
         # Using the SimpleWB white balance algorithm
         self.white_balance = cv2.xphoto.createSimpleWB()
@@ -21,6 +25,9 @@ class WhiteBalanceProcessor(OpenCVProcessor):
         """
         return self.white_balance.balanceWhite(frame)
 
+    def process_into(self, frame: np.ndarray, dst: np.ndarray) -> np.ndarray:
+        return self.white_balance.balanceWhite(frame, dst=dst)
+
 
 # Example usage
 if __name__ == "__main__":
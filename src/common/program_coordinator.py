@@ -2,17 +2,21 @@ import os
 import time
 from collections import Counter
 from pathlib import Path
+from typing import Callable, Iterable
 
 import loguru
 
 from src.common.black_remove_algorithm.black_remove_algorithm import BlackRemoveAlgorithm
+from src.common.black_remove_algorithm.cropdetect_black_remover import CropDetectBlackRemover
 from src.common.black_remove_algorithm.img_black_remover import IMGBlackRemover
+from src.common.black_remove_algorithm.profile_black_remover import ProfileBlackRemover
 from src.common.black_remove_algorithm.video_remover import VideoRemover
 from src.common.processors.processor_global_var import ProcessorGlobalVar
 from src.common.task_resumer.task_resumer import TaskResumer
 from src.common.task_resumer.task_resumer_manager import TaskResumerManager
+from src.common.task_scheduler.video_analysis_pool import VideoAnalysisPool
+from src.common.task_scheduler.video_process_pool import VideoProcessPool
 from src.common.video_handler import VideoHandler
-from src.common.video_info_reader import VideoInfoReader
 from src.config import BlackBorderAlgorithm, VideoProcessEngine, VideoResolution, cfg
 from src.core.datacls import VideoInfo
 from src.core.enums import Orientation, Rotation
@@ -49,37 +53,50 @@ class ProgramCoordinator:
             self._task_resumer_manager.append_task(task_resumer)
         self._task_resumer_manager.save()
 
-        # 读取视频信息
+        is_merge: bool = cfg.get(cfg.merge_video)
+        uncompleted_task_list: list[TaskResumer] = self._task_resumer_manager.uncompleted_task_list
+        process_workers: int = self._get_process_workers()
         black_remove_algorithm_impl = self._get_black_remove_algorithm()
-        video_info_list: list[VideoInfo] = []
-        finished_video_path_list: list[Path] = []
-        for each_path in input_video_path_list:
-            video_info = VideoInfoReader(each_path).get_video_info(black_remove_algorithm_impl)
-            loguru.logger.debug(video_info)
-            video_info_list.append(video_info)
+        video_analysis_pool = VideoAnalysisPool(cfg.get(cfg.video_analysis_workers))
+        if cfg.get(cfg.pipeline_mode):
+            # 边分析边处理
+            finished_video_path_list = self._process_videos_pipelined(uncompleted_task_list,
+                                                                      input_video_path_list,
+                                                                      orientation,
+                                                                      video_analysis_pool,
+                                                                      black_remove_algorithm_impl,
+                                                                      process_workers)
+        else:
+            # 读取视频信息(并行分析,结果按照输入顺序存放)
+            video_info_list: list[VideoInfo | None] = [None] * len(input_video_path_list)
+            for index, video_info in video_analysis_pool.analyze(input_video_path_list, black_remove_algorithm_impl):
+                video_info_list[index] = video_info
+                self._signal_bus.advance_total_progress.emit(1)
 
-            self._signal_bus.advance_total_progress.emit(1)
+            self._update_target_resolution(video_info_list, orientation)
+            self._signal_bus.set_total_progress_finish.emit()
+            self._signal_bus.set_detail_progress_finish.emit()
+            loguru.logger.debug(f'任务恢复器保存完成,任务数:{len(self._task_resumer_manager.task_list)}')
 
-        target_width, target_height = self._get_video_resolution(video_info_list, orientation)
-        self._processor_global_var.get_data()['target_width'] = target_width
-        self._processor_global_var.get_data()['target_height'] = target_height
-        self._signal_bus.set_total_progress_finish.emit()
-        self._signal_bus.set_detail_progress_finish.emit()
-        loguru.logger.debug(f'任务恢复器保存完成,任务数:{len(self._task_resumer_manager.task_list)}')
-
-        self._signal_bus.set_total_progress_reset.emit()
-        self._signal_bus.set_detail_progress_reset.emit()
-        self._signal_bus.set_total_progress_description.emit("处理视频")
-        self._signal_bus.set_total_progress_max.emit(len(video_info_list))
+            self._signal_bus.set_total_progress_reset.emit()
+            self._signal_bus.set_detail_progress_reset.emit()
+            self._signal_bus.set_total_progress_description.emit("处理视频")
+            self._signal_bus.set_total_progress_max.emit(len(video_info_list))
 
-        # 逐个处理视频
-        is_merge: bool = cfg.get(cfg.merge_video)
-        for index, each_resumer in enumerate(self._task_resumer_manager.uncompleted_task_list):
-            video_info: VideoInfo = video_info_list[index]
-            output_file_path = self._process_single_video(each_resumer, finished_video_path_list, video_info)
-            if not is_merge:
-                move_file_to_output_dir([output_file_path])
-                loguru.logger.debug(f'已完成视频{output_file_path}的处理,已移动到输出目录')
+            finished_video_path_list: list[Path] = []
+            if process_workers > 1:
+                # 并行处理视频
+                finished_video_path_list = self._process_videos_parallel(uncompleted_task_list,
+                                                                         enumerate(video_info_list),
+                                                                         len(video_info_list),
+                                                                         process_workers)
+            else:
+                # 逐个处理视频
+                for each_resumer, video_info in zip(uncompleted_task_list, video_info_list):
+                    output_file_path = self._process_single_video(each_resumer, finished_video_path_list, video_info)
+                    if not is_merge:
+                        move_file_to_output_dir([output_file_path])
+                        loguru.logger.debug(f'已完成视频{output_file_path}的处理,已移动到输出目录')
 
         if is_merge:
             finished_video_path = self._video_handler.merge_videos(finished_video_path_list)
@@ -103,17 +120,7 @@ class ProgramCoordinator:
 
     def _process_single_video(self, each_resumer: TaskResumer, finished_video_path_list: list[Path],
                               video_info: VideoInfo) -> Path:
-        self._processor_global_var.get_data()['fps'] = video_info.fps
-        self._processor_global_var.get_data()['total_frames'] = video_info.frame_count
-        self._processor_global_var.get_data()['width'] = video_info.width
-        self._processor_global_var.get_data()['height'] = video_info.height
-        if video_info.crop:
-            self._update_processor_global_var_with_crop_info(video_info.crop.x,
-                                                             video_info.crop.y,
-                                                             video_info.crop.w,
-                                                             video_info.crop.h)
-        else:
-            self._update_processor_global_var_with_crop_info()
+        self._update_processor_global_var_with_video_info(video_info)
         engine_type: VideoProcessEngine = cfg.get(cfg.video_process_engine)
         finished_video_path: Path = self._video_handler.process_video(video_info.video_path, engine_type)
         finished_video_path_list.append(finished_video_path)
@@ -123,6 +130,79 @@ class ProgramCoordinator:
         loguru.logger.info(f'处理视频{video_info.video_path}完成')
         return finished_video_path
 
+    def _process_videos_pipelined(self, task_list: list[TaskResumer],
+                                  video_path_list: list[Path],
+                                  orientation: Orientation,
+                                  video_analysis_pool: VideoAnalysisPool,
+                                  black_remove_algorithm: BlackRemoveAlgorithm | None,
+                                  max_workers: int) -> list[Path]:
+        """边分析边处理
+
+        先只读取视频的元数据(不去黑边)来决定目标分辨率,然后去黑边分析和视频处理同时进行,
+        某一个视频分析完成之后立刻开始处理,总耗时接近分析和处理两者中较长的那一个
+
+        注意: 自动分辨率在这个模式下按照未剪裁的尺寸计算
+        """
+        self._signal_bus.set_total_progress_description.emit("探测视频")
+        probe_info_list: list[VideoInfo] = video_analysis_pool.analyze_all(video_path_list, None)
+        self._update_target_resolution(probe_info_list, orientation)
+
+        self._signal_bus.set_total_progress_reset.emit()
+        self._signal_bus.set_detail_progress_reset.emit()
+        self._signal_bus.set_total_progress_description.emit("分析并处理视频")
+        self._signal_bus.set_total_progress_max.emit(len(video_path_list))
+
+        # 详细进度条和总进度条都只显示处理进度,分析进度不再单独显示
+        video_infos = video_analysis_pool.analyze(video_path_list, black_remove_algorithm, report_progress=False)
+        return self._process_videos_parallel(task_list, video_infos, len(video_path_list), max_workers,
+                                             video_analysis_pool.stop)
+
+    def _process_videos_parallel(self, task_list: list[TaskResumer],
+                                 video_infos: Iterable[tuple[int, VideoInfo]],
+                                 video_count: int,
+                                 max_workers: int,
+                                 stop_input: Callable[[], None] | None = None) -> list[Path]:
+        """并行处理视频,返回的路径顺序和输入顺序一致
+
+        任务恢复器的保存以及文件移动都在当前线程完成,工作线程只负责处理视频
+        """
+        is_merge: bool = cfg.get(cfg.merge_video)
+        engine_type: VideoProcessEngine = cfg.get(cfg.video_process_engine)
+        video_info_list: list[VideoInfo | None] = [None] * video_count
+
+        def process(index: int, video_info: VideoInfo, progress_callback: Callable[[int, int], None]) -> Path:
+            video_info_list[index] = video_info
+            if engine_type == VideoProcessEngine.OpenCV:
+                # OpenCV引擎只会有一个工作线程,依旧通过全局变量传递视频信息
+                self._update_processor_global_var_with_video_info(video_info)
+            return self._video_handler.process_video(video_info.video_path,
+                                                     engine_type,
+                                                     video_info=video_info,
+                                                     progress_callback=progress_callback)
+
+        finished_video_path_list: list[Path | None] = [None] * video_count
+        video_process_pool = VideoProcessPool(max_workers)
+        for index, finished_video_path in video_process_pool.process(video_infos, process, stop_input):
+            finished_video_path_list[index] = finished_video_path
+            task_list[index].output_video_path = finished_video_path
+            self._task_resumer_manager.save()
+            self._signal_bus.advance_total_progress.emit(1)
+            loguru.logger.info(f'处理视频{video_info_list[index].video_path}完成')
+
+            if not is_merge:
+                move_file_to_output_dir([finished_video_path])
+                loguru.logger.debug(f'已完成视频{finished_video_path}的处理,已移动到输出目录')
+        return finished_video_path_list
+
+    def _get_process_workers(self) -> int:
+        """获取同时处理的视频数量,OpenCV引擎的处理器带有状态且依赖全局变量,只能逐个处理"""
+        process_workers: int = cfg.get(cfg.video_process_workers)
+        engine_type: VideoProcessEngine = cfg.get(cfg.video_process_engine)
+        if engine_type != VideoProcessEngine.FFmpeg and process_workers > 1:
+            loguru.logger.warning(f'{engine_type}引擎不支持并行处理,将逐个处理视频')
+            return 1
+        return process_workers
+
     def _get_black_remove_algorithm(self) -> BlackRemoveAlgorithm | None:
         black_remove_algorithm_enum: BlackBorderAlgorithm = cfg.get(cfg.video_black_border_algorithm)
         match black_remove_algorithm_enum:
@@ -130,12 +210,34 @@ class ProgramCoordinator:
                 black_remove_algorithm_impl = VideoRemover()
             case BlackBorderAlgorithm.Static:
                 black_remove_algorithm_impl = IMGBlackRemover()
+            case BlackBorderAlgorithm.Profile:
+                black_remove_algorithm_impl = ProfileBlackRemover()
+            case BlackBorderAlgorithm.CropDetect:
+                black_remove_algorithm_impl = CropDetectBlackRemover()
             case BlackBorderAlgorithm.Disable:
                 black_remove_algorithm_impl = None
             case _:
                 raise ValueError(f"不支持的黑边去除算法{black_remove_algorithm_enum}")
         return black_remove_algorithm_impl
 
+    def _update_target_resolution(self, video_info_list: list[VideoInfo], orientation: Orientation):
+        target_width, target_height = self._get_video_resolution(video_info_list, orientation)
+        self._processor_global_var.get_data()['target_width'] = target_width
+        self._processor_global_var.get_data()['target_height'] = target_height
+
+    def _update_processor_global_var_with_video_info(self, video_info: VideoInfo):
+        self._processor_global_var.get_data()['fps'] = video_info.fps
+        self._processor_global_var.get_data()['total_frames'] = video_info.frame_count
+        self._processor_global_var.get_data()['width'] = video_info.width
+        self._processor_global_var.get_data()['height'] = video_info.height
+        if video_info.crop:
+            self._update_processor_global_var_with_crop_info(video_info.crop.x,
+                                                             video_info.crop.y,
+                                                             video_info.crop.w,
+                                                             video_info.crop.h)
+        else:
+            self._update_processor_global_var_with_crop_info()
+
     def _update_processor_global_var_with_crop_info(self, x: int | None = None,
                                                     y: int | None = None,
                                                     width: int | None = None,
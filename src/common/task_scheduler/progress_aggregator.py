@@ -0,0 +1,45 @@
+import threading
+from typing import Callable
+
+from src.signal_bus import SignalBus
+
+
+class ProgressAggregator:
+    """汇总多个并行任务的进度
+
+    每一个任务通过create_callback获取自己的进度回调,所有任务的进度之和会被发送到详细进度条,
+    这样多个FFmpeg进程同时运行时进度条不会来回跳动
+    """
+
+    def __init__(self):
+        self._signal_bus = SignalBus()
+        self._lock = threading.Lock()
+        self._progress: dict[int, tuple[int, int]] = {}
+
+    def reset(self):
+        with self._lock:
+            self._progress.clear()
+        self._signal_bus.set_detail_progress_reset.emit()
+
+    def create_callback(self, job_id: int) -> Callable[[int, int], None]:
+        def callback(current: int, total: int):
+            self._update(job_id, current, total)
+
+        return callback
+
+    def finish(self, job_id: int):
+        """任务结束之后将该任务的进度直接拉满"""
+        with self._lock:
+            _, total = self._progress.get(job_id, (0, 0))
+        self._update(job_id, total, total)
+
+    def _update(self, job_id: int, current: int, total: int):
+        with self._lock:
+            previous_total = self._progress.get(job_id, (0, 0))[1]
+            self._progress[job_id] = (current, total)
+            total_sum = sum(x[1] for x in self._progress.values())
+            current_sum = sum(x[0] for x in self._progress.values())
+
+        if total != previous_total:
+            self._signal_bus.set_detail_progress_max.emit(total_sum)
+        self._signal_bus.set_detail_progress_current.emit(current_sum)
@@ -0,0 +1,117 @@
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Iterator
+
+import loguru
+
+from src.common.black_remove_algorithm.black_remove_algorithm import BlackRemoveAlgorithm, ProgressCallback
+from src.common.task_scheduler.progress_aggregator import ProgressAggregator
+from src.common.video_info_reader import VideoInfoReader
+from src.core.datacls import VideoInfo
+from src.signal_bus import SignalBus
+from src.utils import get_physical_cpu_count
+
+
+class VideoAnalysisPool:
+    """并行分析视频信息(包括去黑边)
+
+    使用线程而不是进程: OpenCV在解码和图像处理的时候会释放GIL,线程已经可以吃满多核,
+    同时去黑边算法对象和信号总线也不需要跨进程传递
+
+    每一个视频的分析进度通过ProgressAggregator汇总之后再发送到详细进度条,总进度条由调用方负责
+    """
+
+    def __init__(self, max_workers: int = 0):
+        """
+        Args:
+            max_workers: 同时分析的视频数量,0表示使用物理核心数
+        """
+        if max_workers < 0:
+            raise ValueError(f"并行数量不能小于0,当前为{max_workers}")
+
+        self._max_workers: int = max_workers or get_physical_cpu_count()
+        self._signal_bus = SignalBus()
+        self._progress_aggregator = ProgressAggregator()
+        self._is_running = threading.Event()
+        self._is_stopped = threading.Event()
+
+        self._signal_bus.set_running.connect(self._set_running)
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    def analyze(self,
+                video_path_list: list[Path],
+                black_remove_algorithm: BlackRemoveAlgorithm | None,
+                report_progress: bool = True) -> Iterator[tuple[int, VideoInfo]]:
+        """并行读取视频信息,每分析完一个视频就返回一次(任务序号, 视频信息)
+
+        Args:
+            video_path_list: 需要分析的视频
+            black_remove_algorithm: 去黑边算法,为None表示不去黑边
+            report_progress: 是否把分析进度发送到详细进度条,边分析边处理的时候详细进度条显示的是处理进度
+
+        Returns:
+            (任务序号, 视频信息)的迭代器,顺序为完成的顺序,调用stop之后不再返回新的结果
+        """
+        self._is_running.set()
+        self._is_stopped.clear()
+        if report_progress:
+            self._progress_aggregator.reset()
+        loguru.logger.info(f'开始并行分析{len(video_path_list)}个视频,并行数量:{self._max_workers}')
+
+        executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix='VideoAnalysis')
+        futures: dict[Future, int] = {}
+        try:
+            for index, video_path in enumerate(video_path_list):
+                future = executor.submit(self._run_job, index, video_path, black_remove_algorithm, report_progress)
+                futures[future] = index
+
+            pending = set(futures)
+            while pending and not self._is_stopped.is_set():
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if self._is_stopped.is_set():
+                        return
+                    yield futures[future], future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def analyze_all(self,
+                    video_path_list: list[Path],
+                    black_remove_algorithm: BlackRemoveAlgorithm | None) -> list[VideoInfo]:
+        """并行读取视频信息,返回的顺序和输入顺序一致"""
+        video_info_list: list[VideoInfo | None] = [None] * len(video_path_list)
+        for index, video_info in self.analyze(video_path_list, black_remove_algorithm):
+            video_info_list[index] = video_info
+        return video_info_list
+
+    def stop(self) -> None:
+        """停止分析,还没有开始的视频不再分析,正在进行的analyze在当前视频完成之后结束,可以在其他线程调用"""
+        self._is_stopped.set()
+
+    def _run_job(self, index: int,
+                 video_path: Path,
+                 black_remove_algorithm: BlackRemoveAlgorithm | None,
+                 report_progress: bool) -> VideoInfo:
+        if not self._is_running.is_set():
+            raise RuntimeError("您暂停了程序")
+        if self._is_stopped.is_set():
+            raise RuntimeError("分析已经停止")
+
+        progress_callback: ProgressCallback = (self._progress_aggregator.create_callback(index) if report_progress
+                                               else lambda current, total: None)
+        video_info = VideoInfoReader(video_path).get_video_info(black_remove_algorithm,
+                                                                progress_callback=progress_callback)
+        if report_progress:
+            self._progress_aggregator.finish(index)
+        loguru.logger.debug(video_info)
+        return video_info
+
+    def _set_running(self, flag: bool):
+        if flag:
+            self._is_running.set()
+        else:
+            self._is_running.clear()
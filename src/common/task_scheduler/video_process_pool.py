@@ -0,0 +1,140 @@
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+import loguru
+
+from src.common.task_scheduler.progress_aggregator import ProgressAggregator
+from src.core.datacls import VideoInfo
+from src.signal_bus import SignalBus
+
+# (任务序号, 视频信息, 进度回调) -> 处理完成的视频路径
+VideoProcessFunc = Callable[[int, VideoInfo, Callable[[int, int], None]], Path]
+
+
+class _FeedFinished:
+    """输入的视频已经全部提交"""
+
+    def __init__(self, total: int):
+        self.total = total
+
+
+class VideoProcessPool:
+    """并行处理视频
+
+    每一个任务都会启动一个独立的FFmpeg子进程进行编码,池里面的线程只负责等待子进程并收集结果,
+    所以真正的并行度就是同时运行的FFmpeg进程数量,线程本身几乎不占用CPU
+
+    输入是一个(任务序号, 视频信息)的可迭代对象,可以是已经准备好的列表,也可以是边分析边产出的生成器,
+    视频信息一旦产出就会被提交编码,不需要等待所有视频分析完成
+
+    结果按照完成的顺序返回,同时附带任务序号,调用方通过序号还原输入顺序
+    """
+
+    def __init__(self, max_workers: int):
+        if max_workers < 1:
+            raise ValueError(f"并行数量必须大于0,当前为{max_workers}")
+
+        self._max_workers: int = max_workers
+        self._signal_bus = SignalBus()
+        self._progress_aggregator = ProgressAggregator()
+        self._is_running = threading.Event()
+
+        self._signal_bus.set_running.connect(self._set_running)
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    def process(self, video_infos: Iterable[tuple[int, VideoInfo]],
+                func: VideoProcessFunc,
+                stop_input: Callable[[], None] | None = None) -> Iterator[tuple[int, Path]]:
+        """并行处理视频,每完成一个视频就返回一次(任务序号, 输出路径)
+
+        任意一个任务失败(包括输入的生成器抛出异常)都会取消剩下还没有开始的任务,并将异常抛出给调用方
+
+        Args:
+            video_infos: (任务序号, 视频信息)的可迭代对象
+            func: 处理单个视频的函数
+            stop_input: 提前结束时调用,通知输入的生产者(例如VideoAnalysisPool.stop)不要再产生新的输入,
+                输入的生成器在读取线程里面被关闭
+
+        Returns:
+            (任务序号, 输出路径)的迭代器,顺序为完成的顺序
+        """
+        self._is_running.set()
+        self._progress_aggregator.reset()
+        loguru.logger.info(f'开始并行处理视频,并行数量:{self._max_workers}')
+
+        result_queue: queue.Queue = queue.Queue()
+        stop_feeding = threading.Event()
+        # 提交和关闭线程池互斥,关闭之后不会再有新的任务被提交
+        submit_lock = threading.Lock()
+        executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix='VideoProcess')
+
+        def on_done(index: int, future: Future):
+            result_queue.put((index, future))
+
+        def feed():
+            # 在单独的线程里面消费输入,这样输入是一个阻塞的生成器时也不会影响结果的返回
+            total: int = 0
+            iterator: Iterator[tuple[int, VideoInfo]] = iter(video_infos)
+            try:
+                for index, video_info in iterator:
+                    with submit_lock:
+                        if stop_feeding.is_set():
+                            break
+                        future = executor.submit(self._run_job, func, index, video_info)
+                    future.add_done_callback(lambda f, i=index: on_done(i, f))
+                    total += 1
+            except BaseException as e:
+                if not stop_feeding.is_set():
+                    result_queue.put(e)
+                return
+            finally:
+                # 生成器只能在迭代它的线程里面关闭,关闭之后生成器里面的finally(例如关闭分析线程池)才会执行
+                if hasattr(iterator, 'close'):
+                    iterator.close()
+            result_queue.put(_FeedFinished(total))
+
+        feeder = threading.Thread(target=feed, name='VideoProcessFeeder', daemon=True)
+        feeder.start()
+
+        finished_count: int = 0
+        total_count: int | None = None
+        try:
+            while total_count is None or finished_count < total_count:
+                item = result_queue.get()
+                if isinstance(item, _FeedFinished):
+                    total_count = item.total
+                    continue
+                if isinstance(item, BaseException):
+                    raise item
+
+                index, future = item
+                finished_count += 1
+                yield index, future.result()
+        finally:
+            with submit_lock:
+                stop_feeding.set()
+            if stop_input is not None:
+                stop_input()
+            executor.shutdown(wait=True, cancel_futures=True)
+            self._signal_bus.set_detail_progress_finish.emit()
+
+    def _run_job(self, func: VideoProcessFunc, index: int, video_info: VideoInfo) -> Path:
+        if not self._is_running.is_set():
+            raise RuntimeError("您暂停了程序")
+
+        output_file_path = func(index, video_info, self._progress_aggregator.create_callback(index))
+        self._progress_aggregator.finish(index)
+        loguru.logger.debug(f'[{threading.current_thread().name}]处理视频{video_info.video_path}完成')
+        return output_file_path
+
+    def _set_running(self, flag: bool):
+        if flag:
+            self._is_running.set()
+        else:
+            self._is_running.clear()
@@ -51,16 +51,17 @@ class ImageUtils:
         Returns:
             bool: 是否有黑边
         """
-        # 读取图像
-        img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
         threshold = self.threshold
         border_width = self.border_width
 
-        # 检查上下左右四个边缘的像素值
-        top_edge = img[:border_width, :]
-        bottom_edge = img[-border_width:, :]
-        left_edge = img[:, :border_width]
-        right_edge = img[:, -border_width:]
+        # 只把上下左右四个边缘的条带转换为灰度,不需要转换整帧
+        def to_gray(edge: np.ndarray) -> np.ndarray:
+            return cv2.cvtColor(edge, cv2.COLOR_BGR2GRAY) if edge.ndim == 3 else edge
+
+        top_edge = to_gray(img[:border_width, :])
+        bottom_edge = to_gray(img[-border_width:, :])
+        left_edge = to_gray(img[:, :border_width])
+        right_edge = to_gray(img[:, -border_width:])
 
         # 如果这些像素值的平均值都小于给定的阈值（默认为50），那么函数返回True，表示图像有黑边
         return (
@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Callable
 
 import loguru
 
@@ -7,7 +8,7 @@ from src.common.ffmpeg_handler import FFmpegHandler
 from src.common.processors.processor_global_var import ProcessorGlobalVar
 from src.common.video_engines.base_video_engine import BaseVideoEngine
 from src.config import AudioSampleRate, cfg
-from src.core.datacls import CropInfo
+from src.core.datacls import CropInfo, VideoInfo
 from src.core.enums import Orientation, Rotation
 from src.signal_bus import SignalBus
 from src.utils import get_output_file_path
@@ -23,7 +24,19 @@ class FFmpegVideoEngine(BaseVideoEngine):
         self._ffmpeg_handler: FFmpegHandler = FFmpegHandler()
         self._signal_bus.set_running.connect(self._set_running)
 
-    def process_video(self, input_video_path: Path) -> Path:
+    def process_video(self, input_video_path: Path,
+                      video_info: VideoInfo | None = None,
+                      progress_callback: Callable[[int, int], None] | None = None) -> Path:
+        """处理单个视频
+
+        Args:
+            input_video_path: 输入视频路径
+            video_info: 视频信息,传入时剪裁和宽高从这里读取而不是ProcessorGlobalVar,并行处理时必须传入
+            progress_callback: 进度回调,详见FFmpegHandler.run_command
+
+        Returns:
+            处理完成的视频路径
+        """
         self.is_running = True
         video_orientation: Orientation = self._processor_global_var.get_data()['orientation']
         video_rotation: Rotation = Rotation(self._processor_global_var.get_data()['rotation_angle'])
@@ -36,15 +49,16 @@ class FFmpegVideoEngine(BaseVideoEngine):
 
         # 将视频信息转换为VideoInfo对象
         output_file_path = get_output_file_path(input_video_path, 'ffmpeg_processed')
-        ffmpeg_command: str = self._generate_ffmpeg_commands(input_video_path,
+        ffmpeg_command: list[str] = self._generate_ffmpeg_commands(input_video_path,
                                                              output_file_path,
                                                              best_width,
                                                              best_height,
                                                              target_audio_sample_rate,
-                                                             video_orientation, video_rotation)
+                                                             video_orientation, video_rotation,
+                                                             video_info)
 
-        total_frames = self._ffmpeg_handler.get_video_total_frame(input_video_path)
-        self._ffmpeg_handler.run_command(ffmpeg_command, total_frames)
+        duration: float = self._ffmpeg_handler.get_video_duration(input_video_path)
+        self._ffmpeg_handler.run_command(ffmpeg_command, duration, progress_callback)
         return output_file_path
 
     def _get_audio_sample_rate(self) -> int:
@@ -75,7 +89,8 @@ class FFmpegVideoEngine(BaseVideoEngine):
                                   best_height: int,
                                   best_audio_sample_rate: int,
                                   video_orientation: Orientation,
-                                  video_rotation: Rotation) -> str:
+                                  video_rotation: Rotation,
+                                  video_info: VideoInfo | None = None) -> list[str]:
         """
         生成ffmpeg命令
 
@@ -86,28 +101,34 @@ class FFmpegVideoEngine(BaseVideoEngine):
             best_audio_sample_rate: 最佳音频采样率
             video_orientation: 视频方向
             video_rotation: 视频旋转角度
+            video_info: 视频信息,为None时从ProcessorGlobalVar读取
 
         Returns:
-            (ffmpeg命令, 输出视频路径), 输出视频路径
+            ffmpeg参数列表
         """
-        crop_x = self._processor_global_var.get_data()['crop_x']
-        crop_y = self._processor_global_var.get_data()['crop_y']
-        crop_width = self._processor_global_var.get_data()['crop_width']
-        crop_height = self._processor_global_var.get_data()['crop_height']
-        original_width = self._processor_global_var.get_data()['width']
-        original_height = self._processor_global_var.get_data()['height']
         crop: CropInfo | None = None
-        # 如果[crop_x, crop_y, crop_width, crop_height]都不为None,则说明需要裁剪
-        if (crop_x is not None
-                and crop_y is not None
-                and crop_width is not None
-                and crop_height is not None):
-            crop = CropInfo(
-                    x=crop_x,
-                    y=crop_y,
-                    w=crop_width,
-                    h=crop_height
-                    )
+        if video_info is not None:
+            crop = video_info.crop
+            original_width = video_info.width
+            original_height = video_info.height
+        else:
+            crop_x = self._processor_global_var.get_data()['crop_x']
+            crop_y = self._processor_global_var.get_data()['crop_y']
+            crop_width = self._processor_global_var.get_data()['crop_width']
+            crop_height = self._processor_global_var.get_data()['crop_height']
+            original_width = self._processor_global_var.get_data()['width']
+            original_height = self._processor_global_var.get_data()['height']
+            # 如果[crop_x, crop_y, crop_width, crop_height]都不为None,则说明需要裁剪
+            if (crop_x is not None
+                    and crop_y is not None
+                    and crop_width is not None
+                    and crop_height is not None):
+                crop = CropInfo(
+                        x=crop_x,
+                        y=crop_y,
+                        w=crop_width,
+                        h=crop_height
+                        )
 
         # 旋转角度
         rotate_angle: int = 0
@@ -1,23 +1,28 @@
 from pathlib import Path
+from typing import Callable, Iterable
 
-import cv2
-import loguru
+import numpy as np
 
-from src.common.ffmpeg_handler import FFmpegHandler
-from src.common.processors.audio_processors.audio_processor_manager import AudioProcessorManager
+from src.common.ffmpeg_frame_reader import FFmpegFrameReader, plan_geometry
+from src.common.ffmpeg_frame_writer import FFmpegFrameWriter
+from src.common.frame_parallel_executor import FrameParallelExecutor
+from src.common.frame_pipeline import FramePipeline
+from src.common.frame_pool import FramePool
+from src.common.media_probe import MediaProbe
+from src.common.processors.audio_processors.audio_ffmpeg_processor import AudioFFmpegProcessor
 from src.common.processors.opencv_processors.opencv_processor_manager import OpenCVProcessorManager
 from src.common.processors.processor_global_var import ProcessorGlobalVar
 from src.common.video_engines.base_video_engine import BaseVideoEngine
+from src.config import ScalingQuality, cfg
+from src.core.datacls import CropInfo, MediaInfo
 from src.signal_bus import SignalBus
-from src.utils import TempDir, get_output_file_path
+from src.utils import TempDir, get_output_file_path, get_physical_cpu_count
 
 
 class OpenCVVideoEngine(BaseVideoEngine):
     def __init__(self):
         self._signal_bus: SignalBus = SignalBus()
         self._temp_dir: TempDir = TempDir()
-        self._ffmpeg_handler: FFmpegHandler = FFmpegHandler()
-        self._audio_processor_manager: AudioProcessorManager = AudioProcessorManager()
         self._video_processor_manager: OpenCVProcessorManager = OpenCVProcessorManager()
         self._processor_global_var: ProcessorGlobalVar = ProcessorGlobalVar()
 
@@ -25,97 +30,93 @@ class OpenCVVideoEngine(BaseVideoEngine):
         self._signal_bus.set_running.connect(self._set_running)
 
     def process_video(self, input_video_path: Path) -> Path:
-        if (self._processor_global_var.get_data()['crop_x'] is None
-                and self._processor_global_var.get_data()['crop_y'] is None):
-            self._video_processor_manager.get_crop_processor().is_enable = False
-
         video_after_processed = self._video_process(input_video_path)
 
-        try:
-            audio_extractor = self._ffmpeg_handler.extract_audio_from_video(input_video_path)
-        except Exception as e:
-            loguru.logger.error(f'提取音频失败，原因：{e}')
-            audio_extractor = None
-
-        if not audio_extractor:
-            loguru.logger.debug(f'视频{input_video_path}没有音频')
-            return video_after_processed
-        audio_after_processed = self._audio_process(audio_extractor)
-
         if not self.is_running:
             raise ValueError("您暂停了程序")
-
-        # 合并视频和音频
-        video_with_audio: Path = self._ffmpeg_handler.replace_video_audio(video_after_processed, audio_after_processed)
-        return self._ffmpeg_handler.reencode_video(video_with_audio)
+        return video_after_processed
 
     def _video_process(self, input_video_path: Path) -> Path:
         """
-        读取输入视频，逐帧处理，然后写入输出视频,以及音频处理
+        使用ffmpeg解码视频并完成剪裁和缩放,逐帧处理,然后通过管道写入ffmpeg,
+        音频处理和最终编码在同一个ffmpeg进程里面完成
 
         Args:
             input_video_path: 输入视频的路径
         """
         self._signal_bus.set_detail_progress_reset.emit()
 
-        cap = cv2.VideoCapture(str(input_video_path))
-        if not cap.isOpened():
-            raise ValueError("无法打开输入视频")
-
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        # 因为处理后的视频的宽高可能会发生变化，所以需要重新获取宽高
-        width, height = self._get_after_process_width_and_height(input_video_path)
-
-        # MP4V比较通用，但是不支持透明度
-        fourcc = cv2.VideoWriter.fourcc(*'mp4v')
-        output_file_path = get_output_file_path(input_video_path, "video_processed")
-        out = cv2.VideoWriter(str(output_file_path), fourcc, fps, (width, height))
-
-        self._signal_bus.set_detail_progress_max.emit(total_frames)
-        for _ in range(total_frames):
-            ret, frame = cap.read()
-            if not ret or not self.is_running:
-                break
-
-            # 对帧进行处理
-            processed_frame = self._video_processor_manager.process(frame)
-
-            # 写入处理后的帧
-            out.write(processed_frame)
-            self._signal_bus.advance_detail_progress.emit(1)
-
-        # 释放资源
-        cap.release()
-        out.release()
+        media_info = MediaProbe().probe(input_video_path)
+        total_frames = media_info.frame_count
+
+        # 剪裁、旋转和缩放已经在ffmpeg里面完成,Python里面只处理逐像素以及AI相关的处理器
+        video_filters, width, height = self._get_geometry_filters(media_info)
+        self._video_processor_manager.set_geometry_enable(False)
+        # 配置和参数在这里解析一次,逐帧处理的时候不再读取配置
+        plan = self._video_processor_manager.compile_plan()
+
+        # 处理之后的宽高直接根据处理器推算,不需要先处理一帧
+        input_shape: tuple[int, ...] = (height, width, 3)
+        output_shape: tuple[int, ...] = self._video_processor_manager.get_output_shape(input_shape)
+        output_height, output_width = output_shape[:2]
+
+        queue_depth: int = cfg.get(cfg.frame_queue_depth)
+        buffer_count: int = FramePipeline.get_required_buffer_count(queue_depth)
+        output_file_path = get_output_file_path(input_video_path, "video_processed").with_suffix('.mp4')
+        with FFmpegFrameReader(input_video_path, width, height, video_filters, buffer_count) as reader, \
+                FFmpegFrameWriter(input_video_path, output_file_path, output_width, output_height, media_info.fps,
+                                  AudioFFmpegProcessor.get_audio_filters()) as writer:
+            self._signal_bus.set_detail_progress_max.emit(total_frames)
+
+            # 每一帧互相独立并且处理开销足够大的时候在多个进程里面同时处理多帧,否则逐帧处理
+            processors = self._video_processor_manager.get_enabled_processors()
+            workers: int = cfg.get(cfg.frame_process_workers) or get_physical_cpu_count()
+            if (workers > 1 and FrameParallelExecutor.is_supported(processors)
+                    and FrameParallelExecutor.is_worthwhile(processors)):
+                with FrameParallelExecutor(processors, input_shape, output_shape, workers) as executor:
+                    self._run_pipeline(executor.imap(reader), lambda x: x, writer, queue_depth)
+            else:
+                # 处理器的输出缓冲区在编码完成之后放回缓冲池,下一帧直接复用
+                pool = FramePool()
+                self._run_pipeline(reader, lambda x: plan.process(x, pool), writer, queue_depth, pool)
 
         self._signal_bus.set_detail_progress_finish.emit()
         return output_file_path
 
-    def _audio_process(self, input_video_path: Path) -> Path:
-        """
-        读取输入视频，逐帧处理，然后写入输出视频,以及音频处理
-
-        Args:
-            input_video_path: 输入视频的路径
-        """
-        output_file_path = get_output_file_path(input_video_path, "audio_processed")
-        self._audio_processor_manager.process(input_video_path)
-        return output_file_path
-
-    def _get_after_process_width_and_height(self, input_video_path: Path, ) -> tuple[int, int]:
-        cap = cv2.VideoCapture(str(input_video_path))
-        if not cap.isOpened():
-            raise ValueError("无法打开输入视频")
-
-        ret, frame = cap.read()
-        if not ret:
-            raise ValueError("无法读取视频的第一帧")
-        processed_frame = self._video_processor_manager.process(frame)
-
-        height, width = processed_frame.shape[:2]
-        cap.release()
-        return width, height
+    def _run_pipeline(self,
+                      frames: Iterable[np.ndarray],
+                      process: Callable[[np.ndarray], np.ndarray],
+                      writer: FFmpegFrameWriter,
+                      queue_depth: int,
+                      frame_pool: FramePool | None = None) -> None:
+        # 解码、处理和编码同时进行
+        pipeline = FramePipeline(frames,
+                                 process,
+                                 writer.write,
+                                 queue_depth,
+                                 on_frame_finished=lambda: self._signal_bus.advance_detail_progress.emit(1),
+                                 is_running=lambda: self.is_running,
+                                 frame_pool=frame_pool)
+        pipeline.run()
+
+    def _get_geometry_filters(self, media_info: MediaInfo) -> tuple[list[str], int, int]:
+        """根据ProcessorGlobalVar中的剪裁、旋转和目标分辨率生成解码时使用的滤镜"""
+        global_var = self._processor_global_var
+        crop: CropInfo | None = None
+        if global_var.get('crop_x') is not None and global_var.get('crop_y') is not None:
+            crop = CropInfo(global_var.get('crop_x'), global_var.get('crop_y'),
+                            global_var.get('crop_width'), global_var.get('crop_height'))
+
+        scaling_quality: ScalingQuality = cfg.get(cfg.scaling_quality)
+        return plan_geometry(media_info.display_width,
+                             media_info.display_height,
+                             crop,
+                             global_var.get('rotation_angle'),
+                             global_var.get('orientation'),
+                             global_var.get('target_width'),
+                             global_var.get('target_height'),
+                             cfg.get(cfg.merge_video),
+                             scaling_quality.value)
 
     def _set_running(self, is_running: bool):
         self.is_running = is_running
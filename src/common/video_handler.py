@@ -1,8 +1,10 @@
 from pathlib import Path
+from typing import Callable
 
 import cv2
 
 from src.common.ffmpeg_handler import FFmpegHandler
+from src.common.media_probe import MediaProbe
 from src.common.processors.audio_processors.audio_processor_manager import AudioProcessorManager
 from src.common.processors.exe_processors.exe_processor_manager import EXEProcessorManager
 from src.common.processors.opencv_processors.opencv_processor_manager import OpenCVProcessorManager
@@ -10,6 +12,7 @@ from src.common.processors.processor_global_var import ProcessorGlobalVar
 from src.common.video_engines.ffmpeg_video_engine import FFmpegVideoEngine
 from src.common.video_engines.opencv_video_engine import OpenCVVideoEngine
 from src.config import VideoProcessEngine
+from src.core.datacls import VideoInfo
 from src.core.enums import Orientation
 from src.signal_bus import SignalBus
 from src.utils import TempDir, get_output_file_path
@@ -31,11 +34,15 @@ class VideoHandler:
         self._signal_bus.set_running.connect(self._set_running)
 
     def process_video(self, input_video_path: Path,
-                      engine_type: VideoProcessEngine = VideoProcessEngine.FFmpeg) -> Path:
+                      engine_type: VideoProcessEngine = VideoProcessEngine.FFmpeg,
+                      video_info: VideoInfo | None = None,
+                      progress_callback: Callable[[int, int], None] | None = None) -> Path:
         if engine_type == VideoProcessEngine.OpenCV:
             video_after_processed = self._open_cv_video_engine.process_video(input_video_path)
         elif engine_type == VideoProcessEngine.FFmpeg:
-            video_after_processed = self._ffmpeg_video_engine.process_video(input_video_path)
+            video_after_processed = self._ffmpeg_video_engine.process_video(input_video_path,
+                                                                            video_info,
+                                                                            progress_callback)
         else:
             raise ValueError(f"不支持的视频处理引擎{engine_type}")
 
@@ -103,17 +110,10 @@ class VideoHandler:
         return output_file_path
 
     def _get_after_process_width_and_height(self, input_video_path: Path, ) -> tuple[int, int]:
-        cap = cv2.VideoCapture(str(input_video_path))
-        if not cap.isOpened():
-            raise ValueError("无法打开输入视频")
-
-        ret, frame = cap.read()
-        if not ret:
-            raise ValueError("无法读取视频的第一帧")
-        processed_frame = self._video_processor_manager.process(frame)
-
-        height, width = processed_frame.shape[:2]
-        cap.release()
+        # 根据处理器推算处理之后的宽高,不需要解码第一帧,也不会影响去抖动等有状态处理器
+        media_info = MediaProbe().probe(input_video_path)
+        input_shape = (media_info.display_height, media_info.display_width, 3)
+        height, width = self._video_processor_manager.get_output_shape(input_shape)[:2]
         return width, height
 
     def _set_running(self, is_running: bool):
@@ -1,10 +1,11 @@
 from pathlib import Path
 
-import cv2
-
-from src.common.black_remove_algorithm.black_remove_algorithm import BlackRemoveAlgorithm
+from src.common.analysis_cache import AnalysisCache
+from src.common.black_remove_algorithm.black_remove_algorithm import BlackRemoveAlgorithm, ProgressCallback
 from src.common.black_remove_algorithm.img_black_remover import IMGBlackRemover
-from src.core.datacls import CropInfo, VideoInfo
+from src.common.media_probe import MediaProbe
+from src.config import cfg
+from src.core.datacls import CropInfo, MediaInfo, VideoInfo
 
 
 class VideoInfoReader:
@@ -13,13 +14,37 @@ class VideoInfoReader:
 
     def get_video_info(self,
                        black_remove_algorithm: BlackRemoveAlgorithm | None,
-                       crop_enabled: bool = True) -> VideoInfo:
-        video = cv2.VideoCapture(str(self.video_path))
-        frame_count = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
-        fps = int(video.get(cv2.CAP_PROP_FPS))
-        width = int(video.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(video.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        video.release()
+                       crop_enabled: bool = True,
+                       progress_callback: ProgressCallback | None = None) -> VideoInfo:
+        if not cfg.get(cfg.analysis_cache_enabled):
+            return self._read_video_info(black_remove_algorithm, crop_enabled, progress_callback)
+
+        # 输入视频和分析参数都没有变化的时候直接使用上一次的分析结果
+        analysis_cache = AnalysisCache()
+        algorithm_name: str = type(black_remove_algorithm).__name__ if crop_enabled else 'NoneType'
+        if crop_enabled:
+            # 分析分辨率、边缘精修和关键帧采样都会影响检测结果
+            algorithm_name += (f'@{cfg.get(cfg.black_border_analysis_height)}'
+                               f'{"+refine" if cfg.get(cfg.black_border_refine_enabled) else ""}'
+                               f'{"+keyframe" if cfg.get(cfg.black_border_keyframe_only) else ""}')
+        sample_frame_number: int = cfg.get(cfg.video_sample_frame_number)
+        if video_info := analysis_cache.get(self.video_path, algorithm_name, sample_frame_number):
+            return video_info
+
+        video_info = self._read_video_info(black_remove_algorithm, crop_enabled, progress_callback)
+        analysis_cache.put(video_info, algorithm_name, sample_frame_number)
+        return video_info
+
+    def _read_video_info(self,
+                         black_remove_algorithm: BlackRemoveAlgorithm | None,
+                         crop_enabled: bool,
+                         progress_callback: ProgressCallback | None = None) -> VideoInfo:
+        media_info: MediaInfo = MediaProbe().probe(self.video_path)
+        frame_count = media_info.frame_count
+        fps = int(media_info.fps)
+        # 解码时会按照旋转信息自动旋转,所以使用显示尺寸
+        width = media_info.display_width
+        height = media_info.display_height
 
         if not crop_enabled:
             return VideoInfo(video_path=self.video_path,
@@ -36,7 +61,7 @@ class VideoInfoReader:
                              height=height)
 
         # 获取剪裁信息
-        x, y, w, h = black_remove_algorithm.remove_black(self.video_path)
+        x, y, w, h = black_remove_algorithm.remove_black(self.video_path, progress_callback)
         if w == width and h == height:
             return VideoInfo(video_path=self.video_path,
                              fps=fps,
@@ -24,6 +24,10 @@ class BlackBorderAlgorithm(Enum):
     Disable = 0
     Static = auto()
     Dynamic = auto()
+    # 静态算法的快速版本,只统计每一行和每一列的亮度
+    Profile = auto()
+    # 使用ffmpeg的cropdetect滤镜,整个分析过程都在ffmpeg里面完成
+    CropDetect = auto()
 
 
 # 音频响度标准化标准
@@ -184,6 +188,9 @@ class Config(QConfig):
                                       EnumSerializer(PreviewFrame))
     preview_auto_play = ConfigItem("General", "预览视频自动播放", False, BoolValidator())
     merge_video = ConfigItem("General", "是否合并视频", True, BoolValidator())
+    video_process_workers = RangeConfigItem("General", "并行处理视频数", 1, RangeValidator(1, 32))
+    pipeline_mode = ConfigItem("General", "边分析边处理", False, BoolValidator())
+    ffmpeg_timeout = RangeConfigItem("General", "FFmpeg超时时间", 0, RangeValidator(0, 1440))  # 单位分钟,0表示不限制
 
     # 视频质量
     output_dir = ConfigItem("Video", "输出文件路径", str(OUTPUT_DIR), OutputDirValidator())
@@ -192,6 +199,12 @@ class Config(QConfig):
     deblock = ConfigItem("Video", "视频去色块", False, BoolValidator())
     video_fps = RangeConfigItem("Video", "目标视频帧率", 30, RangeValidator(1, 144))
     video_sample_frame_number = RangeConfigItem("Video", "去黑边采样帧数", 500, RangeValidator(100, 2000))
+    video_analysis_workers = RangeConfigItem("Video", "并行分析视频数", 0, RangeValidator(0, 64))  # 0表示物理核心数
+    # 去黑边之前把帧缩小到这个高度,0表示使用原始分辨率
+    black_border_analysis_height = RangeConfigItem("Video", "去黑边分析分辨率", 360, RangeValidator(0, 2160))
+    black_border_refine_enabled = ConfigItem("Video", "去黑边边缘精修", True, BoolValidator())
+    black_border_keyframe_only = ConfigItem("Video", "去黑边只分析关键帧", True, BoolValidator())
+    analysis_cache_enabled = ConfigItem("Video", "缓存视频分析结果", True, BoolValidator())
     video_resolution = OptionsConfigItem("Video", "输出视频分辨率", VideoResolution.P720,
                                          OptionsValidator(VideoResolution), EnumSerializer(VideoResolution))
     video_black_border_algorithm = OptionsConfigItem("Video", "黑边去除算法", BlackBorderAlgorithm.Dynamic,
@@ -220,6 +233,8 @@ class Config(QConfig):
     super_resolution_algorithm = OptionsConfigItem("OpenCV", "超分辨率算法", SuperResolutionAlgorithm.Disable,
                                                    OptionsValidator(SuperResolutionAlgorithm),
                                                    EnumSerializer(SuperResolutionAlgorithm))
+    frame_queue_depth = RangeConfigItem("OpenCV", "帧队列深度", 8, RangeValidator(1, 64))
+    frame_process_workers = RangeConfigItem("OpenCV", "并行处理帧的进程数", 0, RangeValidator(0, 64))  # 0表示物理核心数
 
     # AI功能
     video_auto_cut = ConfigItem("AI", "自动剪辑", False, BoolValidator())
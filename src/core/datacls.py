@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from fractions import Fraction
 from pathlib import Path
 from typing import Optional
 
@@ -31,3 +32,48 @@ class VideoScaling:
 class FFmpegDTO:
     video_info: VideoInfo
     ffmpeg_command: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class MediaInfo:
+    """ffprobe读取到的媒体信息,宽高为编码尺寸,显示尺寸需要考虑旋转"""
+    path: Path
+    width: int
+    height: int
+    fps: Fraction  # 精确帧率,例如30000/1001
+    duration: float  # 单位秒
+    frame_count: int  # 容器里面没有记录帧数的时候由时长和帧率估算
+    rotation: int = 0  # 显示时需要顺时针旋转的角度,取值0/90/180/270
+    video_codec: str = ""
+    pix_fmt: str = ""
+    has_audio: bool = False
+    audio_codec: str | None = None
+    sample_rate: int | None = None
+    audio_profile: str | None = None  # 例如aac的LC/HE-AAC
+    audio_channels: int = 0
+    audio_channel_layout: str | None = None  # 例如stereo/5.1
+    is_constant_frame_rate: bool = False  # avg_frame_rate和r_frame_rate一致时认为是固定帧率
+    start_time: float = 0.0  # 视频流第一帧的时间戳,单位秒,不一定从0开始
+
+    @property
+    def display_width(self) -> int:
+        return self.height if self.rotation in (90, 270) else self.width
+
+    @property
+    def display_height(self) -> int:
+        return self.width if self.rotation in (90, 270) else self.height
+
+
+@dataclass(frozen=True, slots=True)
+class FFmpegProgress:
+    """ffmpeg -progress 输出的一次进度快照"""
+    frame: int = 0
+    fps: float = 0.0
+    out_time_us: int = 0  # 已经输出的媒体时长,单位微秒
+    total_size: int = 0  # 已经输出的文件大小,单位字节
+    speed: float = 0.0  # 相对实时的处理速度,例如2.0表示1秒可以处理2秒的视频
+    is_end: bool = False
+
+    @property
+    def out_time(self) -> float:
+        return self.out_time_us / 1_000_000
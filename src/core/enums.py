@@ -16,3 +16,8 @@ class Rotation(Enum):
 class FileProcessType(Enum):
     UNCOMPLETED = 0
     COMPLETED = 1
+
+
+class SamplingMode(Enum):
+    SEQUENTIAL = 0  # 按顺序grab,只在采样帧上retrieve
+    SEEK = 1  # 每一个采样帧都跳转到对应位置
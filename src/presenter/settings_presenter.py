@@ -1,6 +1,7 @@
 import loguru
 from PySide6.QtWidgets import QFileDialog
 
+from src.common.analysis_cache import AnalysisCache
 from src.components.message_dialog import MessageDialog
 from src.config import BlackBorderAlgorithm, SuperResolutionAlgorithm, VideoProcessEngine, cfg
 from src.core.version import __version__
@@ -70,6 +71,10 @@ class SettingsPresenter:
             return
         self.get_view().video_sample_rate_card.setEnabled(True)
 
+    def _clear_analysis_cache(self):
+        AnalysisCache().clear()
+        self.get_view().show_success_infobar("提示", "视频分析缓存已经清空", duration=1000, is_closable=True)
+
     def _check_update(self):
         current_version = __version__
 
@@ -134,6 +139,7 @@ class SettingsPresenter:
         self._view.temp_dir_card.clicked.connect(self._select_temp_dir)
         self._view.output_dir_path_card.clicked.connect(self._select_output_file_path)
         self._view.update_card.clicked.connect(self._check_update)
+        self._view.clear_analysis_cache_card.clicked.connect(self._clear_analysis_cache)
         self._message_dialog.ok_btn.clicked.connect(self._message_dialog.close)
         self._message_dialog.cancel_btn.clicked.connect(self._message_dialog.close)
         self.get_view().engine_card.comboBox.currentIndexChanged.connect(self._engine_changed)
@@ -4,7 +4,6 @@ import ctypes
 import json
 import os
 import shutil
-import subprocess
 import threading
 import time
 from functools import wraps
@@ -16,7 +15,6 @@ import loguru
 from PySide6.QtCore import QObject, QThread, Signal
 
 from src.config import cfg
-from src.core.paths import FFPROBE_FILE
 from src import settings
 
 
@@ -117,6 +115,15 @@ class ForceStopThread:
                 loguru.logger.debug(f'Thread {self.thread_id} forcefully terminated')
 
 
+def get_physical_cpu_count() -> int:
+    """获取物理核心数量
+
+    标准库只能获取逻辑核心数量,这里按照常见的超线程(一个物理核心对应两个逻辑核心)进行估算
+    """
+    logical_cpu_count: int = os.cpu_count() or 1
+    return max(1, logical_cpu_count // 2)
+
+
 def calculate_dimensions(width: int, height: int, target_width: int, target_height: int):
     if width == 0 or height == 0:
         loguru.logger.critical("视频的宽度或高度为0, 请检查视频")
@@ -207,25 +214,13 @@ def check_file_readability(file_path: Path) -> bool:
 
 
 def get_audio_sample_rate(file_path: Path) -> int:
-    # 使用FFmpeg命令获取媒体文件的信息，并输出为json格式
-    cmd = [
-        FFPROBE_FILE,
-        '-v', 'error',
-        '-select_streams', 'a:0',
-        '-show_entries', 'stream=sample_rate',
-        '-of', 'json',
-        file_path
-    ]
-
-    # 运行FFmpeg命令并获取输出
-    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8',
-                            creationflags=subprocess.CREATE_NO_WINDOW)
-
-    # 解析输出的json数据
-    output = json.loads(result.stdout)
-    loguru.logger.debug(f'视频信息:{output}')
-
-    return int(output['streams'][0]['sample_rate'])
+    # MediaProbe通过ProcessRunner间接依赖这个模块,在这里导入避免循环导入
+    from src.common.media_probe import MediaProbe
+
+    sample_rate: int | None = MediaProbe().probe(file_path).sample_rate
+    if sample_rate is None:
+        raise ValueError(f"文件没有音频流: {file_path}")
+    return sample_rate
 
 
 def get_output_file_path(input_file_path: Path, process_info: str = "out") -> Path:
@@ -74,6 +74,17 @@ class SettingView(MessageBaseView):
         self.merge_video_card = SwitchSettingCard(Icon(FluentIcon.CHEVRON_RIGHT), "合并视频",
                                                   "对视频处理完毕之后是否将视频合并成一个", cfg.merge_video,
                                                   self.general_group)
+        self.video_process_workers_card = RangeSettingCard(cfg.video_process_workers, Icon(FluentIcon.CHEVRON_RIGHT),
+                                                           "并行处理视频数",
+                                                           "同时运行的FFmpeg编码任务数量,多核CPU可以适当调大",
+                                                           self.general_group)
+        self.pipeline_mode_card = SwitchSettingCard(Icon(FluentIcon.CHEVRON_RIGHT), "边分析边处理",
+                                                    "某一个视频分析完成之后立刻开始处理,不再等待所有视频分析完成",
+                                                    cfg.pipeline_mode, self.general_group)
+        self.ffmpeg_timeout_card = RangeSettingCard(cfg.ffmpeg_timeout, Icon(FluentIcon.CHEVRON_RIGHT),
+                                                    "FFmpeg超时时间(分钟)",
+                                                    "单个FFmpeg任务运行超过这个时间会被强制结束,0表示不限制",
+                                                    self.general_group)
         self.update_card = PrimaryPushSettingCard("检查更新", Icon(FluentIcon.CHEVRON_RIGHT), "检查更新",
                                                   "检查当前软件版本",
                                                   self.general_group)
@@ -100,13 +111,34 @@ class SettingView(MessageBaseView):
                                                                      Icon(FluentIcon.CHEVRON_RIGHT),
                                                                      "视频黑边去除算法",
                                                                      "通过算法去除视频的黑边或者logo等,留下视频的主体画面",
-                                                                     ["关闭", "静态", "动态"],
+                                                                     ["关闭", "静态", "动态", "快速", "FFmpeg"],
                                                                      self.video_group)
         self.video_sample_rate_card = RangeSettingCard(cfg.video_sample_frame_number, Icon(FluentIcon.CHEVRON_RIGHT),
                                                        "去黑边采样帧数",
                                                        "设置静态去黑边的采样帧数,数值越大效果越好,但是速度越慢",
                                                        self.video_group)
         self.video_sample_rate_card.slider.setSingleStep(1)
+        self.video_analysis_workers_card = RangeSettingCard(cfg.video_analysis_workers, Icon(FluentIcon.CHEVRON_RIGHT),
+                                                            "并行分析视频数",
+                                                            "同时分析(去黑边)的视频数量,0表示使用CPU物理核心数",
+                                                            self.video_group)
+        self.black_border_analysis_height_card = RangeSettingCard(cfg.black_border_analysis_height,
+                                                                  Icon(FluentIcon.CHEVRON_RIGHT),
+                                                                  "去黑边分析分辨率",
+                                                                  "去黑边之前把画面缩小到这个高度再分析,0表示使用原始分辨率",
+                                                                  self.video_group)
+        self.black_border_refine_card = SwitchSettingCard(Icon(FluentIcon.CHEVRON_RIGHT), "去黑边边缘精修",
+                                                          "缩小分析之后在原始分辨率下重新确定黑边的边缘,只读取边缘附近的像素",
+                                                          cfg.black_border_refine_enabled, self.video_group)
+        self.black_border_keyframe_only_card = SwitchSettingCard(Icon(FluentIcon.CHEVRON_RIGHT), "去黑边只分析关键帧",
+                                                                 "静态和快速去黑边只解码关键帧,长视频的分析速度大幅提升",
+                                                                 cfg.black_border_keyframe_only, self.video_group)
+        self.analysis_cache_card = SwitchSettingCard(Icon(FluentIcon.CHEVRON_RIGHT), "缓存视频分析结果",
+                                                     "视频和去黑边设置都没有变化时直接使用上一次的分析结果,跳过去黑边分析",
+                                                     cfg.analysis_cache_enabled, self.video_group)
+        self.clear_analysis_cache_card = PushSettingCard("清空缓存", Icon(FluentIcon.CHEVRON_RIGHT), "清空视频分析缓存",
+                                                         "去黑边结果不正确或者需要重新分析时可以清空缓存",
+                                                         self.video_group)
         self.audio_normalization_card = ComboBoxSettingCard(cfg.audio_normalization, Icon(FluentIcon.CHEVRON_RIGHT),
                                                             "视频音量自动调整",
                                                             "将声音过大或者过小的视频音频自动调整到合适的响度",
@@ -168,6 +200,14 @@ class SettingView(MessageBaseView):
                                                                    "使用超分算法先放大再缩小来大量减少画面中的噪点",
                                                                    ["关闭", "ESPCN(速度快)", "LAPSRN(效果好)"],
                                                                    self.opencv_only_group)
+        self.frame_queue_depth_card = RangeSettingCard(cfg.frame_queue_depth, Icon(FluentIcon.CHEVRON_RIGHT),
+                                                       "帧队列深度",
+                                                       "解码、处理和编码同时进行,每一个阶段之间最多缓存的帧数",
+                                                       self.opencv_only_group)
+        self.frame_process_workers_card = RangeSettingCard(cfg.frame_process_workers, Icon(FluentIcon.CHEVRON_RIGHT),
+                                                           "并行处理帧的进程数",
+                                                           "降噪和超分辨率时同时处理多帧,0表示使用CPU物理核心数,1表示关闭",
+                                                           self.opencv_only_group)
 
         # AI 功能
         self.video_auto_cut = SwitchSettingCard(Icon(FluentIcon.CHEVRON_RIGHT), "视频自动剪辑",
@@ -198,6 +238,10 @@ class SettingView(MessageBaseView):
                 "如果您发现您的画面黑边,请尝试勾选此选项,但是单帧画面效果不是很好,请通过预览视频查看效果")
         self.preview_frame_card.setToolTip("设置预览视频的封面为第几帧的图片")
         self.merge_video_card.setToolTip("所有视频的分辨率会被重新计算调整到最佳的分辨率,然后合并成一个视频文件")
+        self.video_process_workers_card.setToolTip(
+                "仅FFmpeg引擎生效,OpenCV引擎始终逐个处理;数值过大时会受限于硬盘读写速度或者编码器数量")
+        self.pipeline_mode_card.setToolTip(
+                "开启之后最佳分辨率将按照视频未去黑边的尺寸计算,如果需要更精确的最佳分辨率请关闭此选项")
 
         output_file_path = cfg.get(cfg.output_dir)
         self.output_dir_path_card.setToolTip(f'当前输出文件夹路径为: {output_file_path}')
@@ -224,16 +268,28 @@ class SettingView(MessageBaseView):
                 "最佳分辨率能使合成之后视频的黑边最少，但是会分析视频的时间")
         self.video_sample_rate_card.setToolTip(
                 '静态去黑边会从视频内读取一定数量的帧,然后通过这些帧计算出黑边的位置,然后进行拟合,数值越大效果越好,但是速度越慢')
+        self.black_border_analysis_height_card.setToolTip(
+                "分析耗时大约和分辨率的平方成正比,360P已经足够找到黑边,开启边缘精修之后边缘仍然精确到像素")
+        self.black_border_keyframe_only_card.setToolTip(
+                "关键帧的解码不依赖其他帧,只解码关键帧可以跳过绝大部分解码工作,关键帧太少的短视频会自动改为逐帧采样")
+        self.video_analysis_workers_card.setToolTip(
+                "分析阶段需要解码视频来寻找黑边,多个视频同时分析可以充分利用多核CPU,内存较小时请调低")
         self.scaling_quality_card.setToolTip(
                 '<html><head/><body><p><img src=":/tooltip/images/tooltip/upscale.png"/></p></body></html>')
         self.super_resolution_algorithm_card.setToolTip(
                 "如果需要补齐细节,请使用其他专业的超分软件进行处理")
+        self.frame_queue_depth_card.setToolTip(
+                "数值越大越能平滑各个阶段速度的波动,但是内存占用越高,4K视频每一帧大约占用24MB内存")
+        self.frame_process_workers_card.setToolTip(
+                "开启视频去抖动等需要参考前后帧的功能时会自动逐帧处理")
         self.rate_adjustment_type_card.setToolTip("调整视频帧率的算法,光流法会大幅增加运算时间")
         self.output_codec_card.setToolTip(
                 "调整视频编码的算法,默认推荐经过优化的H264算法,压缩比例非常高,且画质清晰,适合大部分场景")
         self.video_black_border_algorithm_card.setToolTip(
                 '<html><head/><body><p><img src=":/tooltip/images/tooltip/black_remover.png"/>'
-                '<center><p>黑边不动优先使用动态算法,黑边上的logo会移动优先选择静态算法</p></center></body></html>')
+                '<center><p>黑边不动优先使用动态算法,黑边上的logo会移动优先选择静态算法,'
+                '快速算法只统计每一行和每一列的亮度,适合纯黑的黑边,'
+                'FFmpeg算法使用cropdetect滤镜,全部在FFmpeg里面完成,适合一次处理大量视频</p></center></body></html>')
         self.audio_sample_rate_card.setToolTip(
                 "最大采样率为所有视频采样率中最高的采样率,如果您的视频音频采样率为32kHz,则输出音频采样率为32kHz")
 
@@ -256,6 +312,9 @@ class SettingView(MessageBaseView):
                 self.temp_dir_card,
                 self.engine_card,
                 self.merge_video_card,
+                self.video_process_workers_card,
+                self.pipeline_mode_card,
+                self.ffmpeg_timeout_card,
                 self.delete_temp_dir_card,
                 self.preview_video_remove_black_card,
                 self.preview_frame_card,
@@ -267,6 +326,12 @@ class SettingView(MessageBaseView):
                 self.shake_card,
                 self.video_fps_card,
                 self.video_sample_rate_card,
+                self.video_analysis_workers_card,
+                self.black_border_analysis_height_card,
+                self.black_border_refine_card,
+                self.black_border_keyframe_only_card,
+                self.analysis_cache_card,
+                self.clear_analysis_cache_card,
                 self.video_resolution_card,
                 self.video_black_border_algorithm_card,
                 self.audio_normalization_card,
@@ -281,7 +346,9 @@ class SettingView(MessageBaseView):
         self.opencv_only_group.addSettingCards([
                 self.white_balance_card,
                 self.brightness_contrast_card,
-                self.super_resolution_algorithm_card
+                self.super_resolution_algorithm_card,
+                self.frame_queue_depth_card,
+                self.frame_process_workers_card
                 ])
 
         self.ai_group.addSettingCards([
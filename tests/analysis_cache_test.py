@@ -0,0 +1,56 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.common.analysis_cache import AnalysisCache
+from src.core.datacls import CropInfo, VideoInfo
+
+
+class TestAnalysisCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.video_path = Path(self.temp_dir.name) / "001.mp4"
+        self.video_path.write_bytes(b"fake video content")
+        # AnalysisCache是单例,测试时直接构造原始类避免写入项目目录
+        self.cache = AnalysisCache.__wrapped__(Path(self.temp_dir.name) / "cache.db", max_entries=2)
+
+    def tearDown(self):
+        self.cache._get_connection().close()
+        self.temp_dir.cleanup()
+
+    def test_put_and_get(self):
+        video_info = VideoInfo(self.video_path, 30, 300, 1920, 1080, CropInfo(0, 140, 1920, 800))
+        self.cache.put(video_info, "IMGBlackRemover", 500)
+
+        self.assertEqual(self.cache.get(self.video_path, "IMGBlackRemover", 500), video_info)
+        self.assertIsNone(self.cache.get(self.video_path, "VideoRemover", 500))
+        self.assertIsNone(self.cache.get(self.video_path, "IMGBlackRemover", 1000))
+
+    def test_modified_file_misses(self):
+        video_info = VideoInfo(self.video_path, 30, 300, 1920, 1080)
+        self.cache.put(video_info, "NoneType", 500)
+        self.video_path.write_bytes(b"another fake video content")
+
+        self.assertIsNone(self.cache.get(self.video_path, "NoneType", 500))
+
+    def test_lru_eviction(self):
+        video_info = VideoInfo(self.video_path, 30, 300, 1920, 1080)
+        self.cache.put(video_info, "A", 500)
+        self.cache.put(video_info, "B", 500)
+        self.cache.get(self.video_path, "A", 500)
+        self.cache.put(video_info, "C", 500)
+
+        self.assertIsNotNone(self.cache.get(self.video_path, "A", 500))
+        self.assertIsNone(self.cache.get(self.video_path, "B", 500))
+        self.assertIsNotNone(self.cache.get(self.video_path, "C", 500))
+
+    def test_clear(self):
+        video_info = VideoInfo(self.video_path, 30, 300, 1920, 1080)
+        self.cache.put(video_info, "NoneType", 500)
+        self.cache.clear()
+
+        self.assertIsNone(self.cache.get(self.video_path, "NoneType", 500))
+
+
+if __name__ == '__main__':
+    unittest.main()
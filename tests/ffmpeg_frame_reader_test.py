@@ -0,0 +1,61 @@
+import unittest
+from pathlib import Path
+
+from src.common.ffmpeg_frame_reader import FFmpegFrameReader, plan_geometry
+from src.core.datacls import CropInfo
+from src.core.enums import Orientation
+
+
+class TestPlanGeometry(unittest.TestCase):
+    def test_crop_only(self):
+        filters, width, height = plan_geometry(1920, 1080, CropInfo(0, 140, 1920, 800), 0,
+                                               Orientation.HORIZONTAL, 1920, 1080, False, 'bicubic')
+
+        self.assertEqual(filters, ['crop=1920:800:0:140'])
+        self.assertEqual((width, height), (1920, 800))
+
+    def test_rotate_when_orientation_mismatch(self):
+        filters, width, height = plan_geometry(1080, 1920, None, 90, Orientation.HORIZONTAL,
+                                               1920, 1080, False, 'bicubic')
+
+        self.assertEqual(filters, ['transpose=2'])
+        self.assertEqual((width, height), (1920, 1080))
+
+    def test_scale_and_pad_when_merging(self):
+        filters, width, height = plan_geometry(1920, 1080, CropInfo(0, 140, 1920, 800), 0,
+                                               Orientation.HORIZONTAL, 1280, 720, True, 'bicubic')
+
+        self.assertEqual(filters, ['crop=1920:800:0:140',
+                                   'scale=1280:533:flags=bicubic:force_original_aspect_ratio=decrease',
+                                   'pad=1280:720:0:93:black'])
+        self.assertEqual((width, height), (1280, 720))
+
+    def test_nothing_to_do(self):
+        filters, width, height = plan_geometry(1920, 1080, None, 0, Orientation.HORIZONTAL,
+                                               1920, 1080, True, 'bicubic')
+
+        self.assertEqual(filters, [])
+        self.assertEqual((width, height), (1920, 1080))
+
+
+
+class TestFFmpegFrameReader(unittest.TestCase):
+    def test_gray_keyframe_command(self):
+        reader = FFmpegFrameReader(Path('001.mp4'), 640, 360, ['scale=640:360:flags=area'],
+                                   input_options=['-skip_frame', 'nokey'],
+                                   output_options=['-fps_mode', 'passthrough'],
+                                   pix_fmt='gray')
+
+        command = reader.get_command()
+        self.assertLess(command.index('-skip_frame'), command.index('-i'))
+        self.assertEqual(command[command.index('-vf') + 1:],
+                         ['scale=640:360:flags=area', '-fps_mode', 'passthrough', '-an', '-sn', '-f', 'rawvideo',
+                          '-pix_fmt', 'gray', 'pipe:1'])
+
+    def test_unsupported_pix_fmt(self):
+        with self.assertRaises(ValueError):
+            FFmpegFrameReader(Path('001.mp4'), 640, 360, pix_fmt='yuv420p')
+
+
+if __name__ == '__main__':
+    unittest.main()
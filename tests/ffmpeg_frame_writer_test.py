@@ -0,0 +1,47 @@
+import unittest
+from fractions import Fraction
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from src.common.ffmpeg_frame_writer import FFmpegFrameWriter
+
+
+class TestFFmpegFrameWriter(unittest.TestCase):
+    @patch('src.common.ffmpeg_frame_writer.MediaProbe')
+    def test_command_reads_frames_from_pipe_and_audio_from_input(self, mock_media_probe):
+        mock_media_probe.return_value.probe.return_value = MagicMock(has_audio=True)
+        writer = FFmpegFrameWriter(Path('input.mp4'), Path('output.mp4'), 1280, 720, Fraction(30),
+                                   ['loudnorm'])
+
+        command: list[str] = writer.get_command()
+
+        self.assertIn('pipe:0', command)
+        self.assertEqual(command[command.index('-s') + 1], '1280x720')
+        self.assertEqual(command[command.index('-pix_fmt') + 1], 'bgr24')
+        self.assertIn('1:a:0', command)
+        self.assertEqual(command[command.index('-af') + 1], 'loudnorm')
+        self.assertEqual(command[-2:], ['output.mp4', '-y'])
+
+    @patch('src.common.ffmpeg_frame_writer.MediaProbe')
+    def test_command_without_audio(self, mock_media_probe):
+        mock_media_probe.return_value.probe.return_value = MagicMock(has_audio=False)
+        writer = FFmpegFrameWriter(Path('input.mp4'), Path('output.mp4'), 1280, 720, Fraction(30),
+                                   ['loudnorm'])
+
+        command: list[str] = writer.get_command()
+
+        self.assertNotIn('1:a:0', command)
+        self.assertNotIn('-af', command)
+        # 没有音频的时候使用静音,保证输出始终有音轨
+        self.assertTrue(command[command.index('lavfi') + 2].startswith('anullsrc='))
+        self.assertLess(command.index('lavfi'), command.index('-map'))
+        self.assertEqual(command[command.index('2:a:0') + 1:command.index('2:a:0') + 3], ['-c:a', 'aac'])
+        self.assertIn('-shortest', command)
+
+    def test_zero_fps_is_rejected(self):
+        with self.assertRaises(ValueError):
+            FFmpegFrameWriter(Path('input.mp4'), Path('output.mp4'), 1280, 720, Fraction(0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,70 +1,108 @@
 import subprocess
 import unittest
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 from src.common.ffmpeg_handler import FFmpegHandler
 
 
+def _create_mock_process(stdout_lines: list[str], stderr_lines: list[str], returncode: int) -> MagicMock:
+    mock_process = MagicMock()
+    mock_process.stdout = iter(stdout_lines)
+    mock_process.stderr = iter(stderr_lines)
+    mock_process.returncode = returncode
+    return mock_process
+
+
 class TestFFmpegHandler(unittest.TestCase):
 
+    @patch('src.common.ffmpeg_handler.SignalBus')
     @patch('subprocess.Popen')
-    def test_successful_command_execution_emits_finish_signal(self, mock_popen):
-        mock_process = MagicMock()
-        mock_process.communicate.return_value = ('output', '')
-        mock_process.returncode = 0
-        mock_popen.return_value = mock_process
+    def test_successful_command_execution_emits_finish_signal(self, mock_popen, _):
+        mock_popen.return_value = _create_mock_process(['progress=end\n'], ['output\n'], 0)
         handler = FFmpegHandler()
-        handler._signal_bus.set_detail_progress_finish.emit = MagicMock()
 
-        handler.run_command('ffmpeg -i input.mp4 output.mp3')
+        handler.run_command(['ffmpeg', '-i', 'input.mp4', 'output.mp3'])
 
         handler._signal_bus.set_detail_progress_finish.emit.assert_called_once()
 
     @patch('subprocess.Popen')
     def test_command_execution_with_non_zero_exit_code_raises_exception(self, mock_popen):
-        mock_process = MagicMock()
-        mock_process.communicate.return_value = ('', 'error')
-        mock_process.returncode = 1
-        mock_popen.return_value = mock_process
+        mock_popen.return_value = _create_mock_process([], ['error\n'], 1)
         handler = FFmpegHandler()
 
         with self.assertRaises(subprocess.CalledProcessError):
-            handler.run_command('ffmpeg -i input.mp4 output.mp3')
+            handler.run_command(['ffmpeg', '-i', 'input.mp4', 'output.mp3'])
 
     @patch('subprocess.Popen')
     def test_empty_command_raises_value_error(self, mock_popen):
         handler = FFmpegHandler()
 
         with self.assertRaises(ValueError):
-            handler.run_command('')
+            handler.run_command([])
+
+    @patch('src.common.ffmpeg_handler.SignalBus')
+    @patch('subprocess.Popen')
+    def test_progress_tracking_updates_progress_correctly(self, mock_popen, _):
+        stdout_lines = ['frame=10\n', 'out_time_us=1000000\n', 'speed=2.0x\n', 'progress=continue\n',
+                        'frame=20\n', 'out_time_us=2000000\n', 'speed=2.0x\n', 'progress=end\n']
+        mock_popen.return_value = _create_mock_process(stdout_lines, [], 0)
+        handler = FFmpegHandler()
+
+        last_progress = handler.run_command(['ffmpeg', '-i', 'input.mp4', 'output.mp3'], duration=2)
+
+        handler._signal_bus.set_detail_progress_max.emit.assert_called_once_with(2000)
+        handler._signal_bus.set_detail_progress_current.emit.assert_any_call(1000)
+        handler._signal_bus.set_detail_progress_current.emit.assert_any_call(2000)
+        self.assertEqual(last_progress.frame, 20)
+        self.assertEqual(last_progress.speed, 2.0)
+        self.assertTrue(last_progress.is_end)
+
+    @patch('subprocess.Popen')
+    def test_progress_callback_receives_milliseconds(self, mock_popen):
+        stdout_lines = ['out_time_us=500000\n', 'progress=continue\n', 'out_time_us=3000000\n', 'progress=end\n']
+        mock_popen.return_value = _create_mock_process(stdout_lines, [], 0)
+        handler = FFmpegHandler()
+        callback = MagicMock()
+
+        handler.run_command(['ffmpeg', '-i', 'input.mp4', 'output.mp3'], duration=2, progress_callback=callback)
+
+        callback.assert_any_call(500, 2000)
+        # 超出总时长的进度不会超过最大值
+        callback.assert_called_with(2000, 2000)
 
     @patch('subprocess.Popen')
-    def test_progress_tracking_updates_progress_correctly(self, mock_popen):
-        mock_process = MagicMock()
-        mock_process.stdout.readline.side_effect = ['frame= 10\n', 'frame= 20\n', '']
-        mock_process.communicate.return_value = ('', '')
-        mock_process.returncode = 0
-        mock_popen.return_value = mock_process
+    def test_progress_args_are_added(self, mock_popen):
+        mock_popen.return_value = _create_mock_process([], [], 0)
         handler = FFmpegHandler()
-        handler._signal_bus.set_detail_progress_current.emit = MagicMock()
 
-        handler.run_command('ffmpeg -i input.mp4 output.mp3', progress_total=20)
+        handler.run_command(['ffmpeg', '-i', 'input.mp4', 'output.mp3'])
 
-        handler._signal_bus.set_detail_progress_current.emit.assert_any_call(10)
-        handler._signal_bus.set_detail_progress_current.emit.assert_any_call(20)
+        command: list[str] = mock_popen.call_args[0][0]
+        self.assertEqual(command, ['ffmpeg', '-progress', 'pipe:1', '-nostats', '-i', 'input.mp4', 'output.mp3', '-y'])
+        self.assertNotIn('shell', mock_popen.call_args[1])
 
+    @patch('src.common.ffmpeg_handler.SignalBus')
     @patch('subprocess.Popen')
-    def test_command_execution_with_stderr_logs_critical_and_emits_failed_signal(self, mock_popen):
-        mock_process = MagicMock()
-        mock_process.communicate.return_value = ('', 'error')
-        mock_process.returncode = 1
-        mock_popen.return_value = mock_process
+    def test_command_execution_with_stderr_logs_critical_and_emits_failed_signal(self, mock_popen, _):
+        mock_popen.return_value = _create_mock_process([], ['error\n'], 1)
         handler = FFmpegHandler()
-        handler._signal_bus.failed.emit = MagicMock()
 
         try:
-            handler.run_command('ffmpeg -i input.mp4 output.mp3')
+            handler.run_command(['ffmpeg', '-i', 'input.mp4', 'output.mp3'])
         except subprocess.CalledProcessError:
             pass
 
         handler._signal_bus.failed.emit.assert_called_once()
+
+    @patch('src.common.ffmpeg_handler.MediaProbe')
+    def test_has_audio_stream_returns_false_when_probe_fails(self, mock_media_probe):
+        for error in (ValueError("无法读取媒体信息"), FileNotFoundError("ffprobe"),
+                      subprocess.TimeoutExpired('ffprobe', 10)):
+            mock_media_probe.return_value.probe.side_effect = error
+
+            self.assertFalse(FFmpegHandler._has_audio_stream(Path('input.mp4')))
+
+
+if __name__ == '__main__':
+    unittest.main()
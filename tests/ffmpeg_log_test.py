@@ -0,0 +1,25 @@
+import io
+import unittest
+from collections import deque
+
+from src.common.ffmpeg_log import read_ffmpeg_log
+
+
+class TestReadFFmpegLog(unittest.TestCase):
+    def test_text_and_binary_streams_are_read_the_same_way(self):
+        text: str = "frame=  10 fps=0.0\n\n[h264 @ 0x1] Invalid data found when processing input\n"
+        for stream in (io.StringIO(text), io.BytesIO(text.encode('utf-8'))):
+            with self.subTest(stream=type(stream).__name__):
+                log_tail: deque[str] = deque(maxlen=50)
+                read_ffmpeg_log(stream, log_tail)
+                self.assertEqual(list(log_tail), ["frame=  10 fps=0.0",
+                                                  "[h264 @ 0x1] Invalid data found when processing input"])
+
+    def test_only_last_lines_are_kept(self):
+        log_tail: deque[str] = deque(maxlen=2)
+        read_ffmpeg_log(io.StringIO("a\nb\nc\n"), log_tail)
+        self.assertEqual(list(log_tail), ["b", "c"])
+
+
+if __name__ == '__main__':
+    unittest.main()
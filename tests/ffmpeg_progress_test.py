@@ -0,0 +1,46 @@
+import unittest
+
+from src.common.ffmpeg_progress import FFmpegProgressParser, get_eta
+from src.core.datacls import FFmpegProgress
+
+
+class TestFFmpegProgressParser(unittest.TestCase):
+    def test_parse_progress_block(self):
+        parser = FFmpegProgressParser()
+        lines = ['frame=120\n', 'fps=59.94\n', 'out_time_us=4000000\n', 'total_size=1048576\n',
+                 'speed=1.98x\n']
+        for line in lines:
+            self.assertIsNone(parser.feed(line))
+
+        progress = parser.feed('progress=continue\n')
+        self.assertEqual(progress, FFmpegProgress(frame=120, fps=59.94, out_time_us=4000000,
+                                                  total_size=1048576, speed=1.98, is_end=False))
+        self.assertEqual(progress.out_time, 4.0)
+
+    def test_values_are_reset_between_blocks(self):
+        parser = FFmpegProgressParser()
+        parser.feed('frame=10\n')
+        parser.feed('progress=continue\n')
+
+        progress = parser.feed('progress=end\n')
+        self.assertEqual(progress.frame, 0)
+        self.assertTrue(progress.is_end)
+
+    def test_unknown_values(self):
+        parser = FFmpegProgressParser()
+        for line in ['out_time_us=N/A\n', 'speed=N/A\n', 'bitrate=N/A\n', 'garbage line\n']:
+            parser.feed(line)
+
+        progress = parser.feed('progress=continue\n')
+        self.assertEqual(progress.out_time_us, 0)
+        self.assertEqual(progress.speed, 0.0)
+
+    def test_get_eta(self):
+        progress = FFmpegProgress(out_time_us=4_000_000, speed=2.0)
+
+        self.assertEqual(get_eta(progress, 10), 3.0)
+        self.assertIsNone(get_eta(FFmpegProgress(out_time_us=4_000_000), 10))
+
+
+if __name__ == '__main__':
+    unittest.main()
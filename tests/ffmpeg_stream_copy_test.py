@@ -0,0 +1,62 @@
+import unittest
+from fractions import Fraction
+from pathlib import Path
+
+from src.common.ffmpeg import can_copy_audio_stream, can_copy_video_stream
+from src.config import VideoCodec
+from src.core.datacls import MediaInfo
+
+
+def _create_media_info(**kwargs) -> MediaInfo:
+    values = dict(path=Path('input.mp4'), width=1920, height=1080, fps=Fraction(30), duration=10.0,
+                  frame_count=300, rotation=0, video_codec='h264', pix_fmt='yuv420p', has_audio=True,
+                  audio_codec='aac', sample_rate=44100, audio_profile='LC', audio_channels=2,
+                  audio_channel_layout='stereo', is_constant_frame_rate=True)
+    values.update(kwargs)
+    return MediaInfo(**values)
+
+
+class TestCanCopyVideoStream(unittest.TestCase):
+    def test_same_codec_can_copy(self):
+        self.assertTrue(can_copy_video_stream(_create_media_info(), VideoCodec.H264, False))
+        self.assertTrue(can_copy_video_stream(_create_media_info(video_codec='hevc'), VideoCodec.H265Nvidia, False))
+
+    def test_different_codec_cannot_copy(self):
+        self.assertFalse(can_copy_video_stream(_create_media_info(), VideoCodec.H265, False))
+
+    def test_rotated_video_cannot_copy(self):
+        self.assertFalse(can_copy_video_stream(_create_media_info(rotation=90), VideoCodec.H264, False))
+
+    def test_variable_frame_rate_cannot_copy(self):
+        media_info = _create_media_info(is_constant_frame_rate=False)
+        self.assertFalse(can_copy_video_stream(media_info, VideoCodec.H264, False))
+
+    def test_merging_cannot_copy(self):
+        self.assertFalse(can_copy_video_stream(_create_media_info(), VideoCodec.H264, True))
+
+
+class TestCanCopyAudioStream(unittest.TestCase):
+    def test_aac_with_target_sample_rate_can_copy(self):
+        self.assertTrue(can_copy_audio_stream(_create_media_info(), 44100, False))
+
+    def test_resample_required(self):
+        self.assertFalse(can_copy_audio_stream(_create_media_info(), 48000, False))
+        self.assertFalse(can_copy_audio_stream(_create_media_info(audio_codec='mp3'), 44100, False))
+
+    def test_profile_and_channels_must_match(self):
+        self.assertFalse(can_copy_audio_stream(_create_media_info(audio_profile='HE-AAC'), 44100, False))
+        self.assertFalse(can_copy_audio_stream(_create_media_info(audio_channels=6, audio_channel_layout='5.1'),
+                                               44100, False))
+        self.assertFalse(can_copy_audio_stream(_create_media_info(audio_channels=1, audio_channel_layout='mono'),
+                                               44100, False))
+
+    def test_merging_cannot_copy(self):
+        self.assertFalse(can_copy_audio_stream(_create_media_info(), 44100, True))
+
+    def test_video_without_audio(self):
+        media_info = _create_media_info(has_audio=False, audio_codec=None, sample_rate=None)
+        self.assertTrue(can_copy_audio_stream(media_info, 48000, False))
+
+
+if __name__ == '__main__':
+    unittest.main()
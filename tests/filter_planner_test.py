@@ -0,0 +1,73 @@
+import unittest
+from fractions import Fraction
+
+from src.common.filter_planner import FilterGraphPlanner
+from src.core.datacls import CropInfo
+
+
+class TestFilterGraphPlanner(unittest.TestCase):
+    def test_downscale_runs_before_heavy_filters(self):
+        planner = FilterGraphPlanner(Fraction(60))
+        planner.add_fps(30)
+        planner.add_heavy("nlmeans=6.0:7.0")
+        planner.add_crop(CropInfo(0, 276, 3840, 1608))
+        planner.add_scale(3840, 1608, 1279, 535, "sinc")
+        planner.add_pad(1280, 720, 0, 92)
+
+        self.assertEqual(planner.plan(), ["fps=fps=30",
+                                          "crop=3840:1608:0:276",
+                                          "scale=1279:535:flags=sinc:force_original_aspect_ratio=decrease",
+                                          "nlmeans=6.0:7.0",
+                                          "pad=1280:720:0:92:black"])
+
+    def test_upscale_runs_after_heavy_filters(self):
+        planner = FilterGraphPlanner(Fraction(24))
+        planner.add_fps(60)
+        planner.add_heavy("bilateral")
+        planner.add_heavy("deband")
+        planner.add_crop(CropInfo(0, 60, 640, 360))
+        planner.add_scale(640, 360, 1919, 1079, "lanczos")
+        planner.add_pad(1920, 1080, 0, 0)
+
+        self.assertEqual(planner.plan(), ["crop=640:360:0:60",
+                                          "bilateral",
+                                          "deband",
+                                          "scale=1919:1079:flags=lanczos:force_original_aspect_ratio=decrease",
+                                          "pad=1920:1080:0:0:black",
+                                          "fps=fps=60"])
+
+    def test_noop_filters_are_dropped(self):
+        planner = FilterGraphPlanner(Fraction(30))
+        planner.add_fps(30)
+        planner.add_motion_interpolation(30)
+        planner.add_transpose(0)
+        planner.add_scale(1280, 720, 1280, 720, "sinc")
+
+        self.assertEqual(planner.plan(), [])
+
+    def test_variable_frame_rate_keeps_fps_filter(self):
+        # 平均帧率刚好等于目标帧率的可变帧率视频仍然需要转换成固定帧率
+        planner = FilterGraphPlanner(Fraction(30), is_constant_frame_rate=False)
+        planner.add_fps(30)
+        self.assertEqual(planner.plan(), ["fps=fps=30"])
+
+        planner = FilterGraphPlanner(Fraction(30), is_constant_frame_rate=False)
+        planner.add_motion_interpolation(30)
+        self.assertEqual(len(planner.plan()), 1)
+
+    def test_unknown_source_fps_keeps_fps_filter_first(self):
+        planner = FilterGraphPlanner()
+        planner.add_heavy("deshake")
+        planner.add_fps(30)
+
+        self.assertEqual(planner.plan(), ["fps=fps=30", "deshake"])
+
+    def test_ntsc_source_fps_is_not_dropped(self):
+        planner = FilterGraphPlanner(Fraction(30000, 1001))
+        planner.add_fps(30)
+
+        self.assertEqual(planner.plan(), ["fps=fps=30"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+
+import numpy as np
+
+from src.common.frame_parallel_executor import FrameParallelExecutor
+from src.common.processors.base_processor import OpenCVProcessor
+
+
+class _InvertProcessor(OpenCVProcessor):
+    def process(self, frame: np.ndarray) -> np.ndarray:
+        return 255 - frame
+
+
+class _StatefulProcessor(_InvertProcessor):
+    is_stateful = True
+
+
+class TestFrameParallelExecutor(unittest.TestCase):
+    def test_is_supported(self):
+        self.assertTrue(FrameParallelExecutor.is_supported([_InvertProcessor()]))
+        self.assertFalse(FrameParallelExecutor.is_supported([_InvertProcessor(), _StatefulProcessor()]))
+        self.assertFalse(FrameParallelExecutor.is_supported([]))
+
+    def test_frames_are_returned_in_order(self):
+        frames = [np.full((4, 6, 3), i, dtype=np.uint8) for i in range(20)]
+
+        with FrameParallelExecutor([_InvertProcessor()], (4, 6, 3), (4, 6, 3), max_workers=2) as executor:
+            results = list(executor.imap(frames))
+
+        self.assertEqual([int(x[0, 0, 0]) for x in results], [255 - i for i in range(20)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from src.common.frame_pipeline import FramePipeline
+
+
+class TestFramePipeline(unittest.TestCase):
+    def test_frames_are_encoded_in_order(self):
+        encoded: list[int] = []
+        finished: list[int] = []
+        pipeline = FramePipeline(range(100), lambda x: x * 2, encoded.append, queue_depth=4,
+                                 on_frame_finished=lambda: finished.append(1))
+
+        pipeline.run()
+
+        self.assertEqual(encoded, [x * 2 for x in range(100)])
+        self.assertEqual(len(finished), 100)
+        self.assertEqual([stats.frames for stats in pipeline.get_stats().values()], [100, 100, 100])
+
+    def test_error_in_stage_is_raised(self):
+        def process(x: int) -> int:
+            if x == 10:
+                raise ValueError("process failed")
+            return x
+
+        pipeline = FramePipeline(range(100), process, lambda x: None, queue_depth=2)
+
+        with self.assertRaises(ValueError):
+            pipeline.run()
+
+    def test_stop_when_not_running(self):
+        encoded: list[int] = []
+        pipeline = FramePipeline(iter(range(1000)), lambda x: x, encoded.append, queue_depth=2,
+                                 is_running=lambda: len(encoded) < 10)
+
+        pipeline.run()
+
+        self.assertLess(len(encoded), 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
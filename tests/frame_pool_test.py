@@ -0,0 +1,55 @@
+import unittest
+
+import numpy as np
+
+from src.common.frame_pool import FramePool
+from src.common.processors.base_processor import OpenCVProcessor, ProcessingPlan
+
+
+class _InvertProcessor(OpenCVProcessor):
+    supports_process_into = True
+
+    def process(self, frame: np.ndarray) -> np.ndarray:
+        return 255 - frame
+
+    def process_into(self, frame: np.ndarray, dst: np.ndarray) -> np.ndarray:
+        return np.subtract(255, frame, out=dst)
+
+
+class TestFramePool(unittest.TestCase):
+    def test_released_buffer_is_reused(self):
+        pool = FramePool()
+        buffer = pool.acquire((4, 6, 3), np.uint8)
+        pool.release(buffer)
+
+        self.assertIs(pool.acquire((4, 6, 3), np.uint8), buffer)
+        self.assertIsNot(pool.acquire((4, 6, 3), np.uint8), buffer)
+        self.assertIsNot(pool.acquire((4, 6, 3), np.float32), buffer)
+
+    def test_foreign_and_duplicate_release_are_ignored(self):
+        pool = FramePool()
+        pool.release(np.zeros((4, 6, 3), np.uint8))
+        buffer = pool.acquire((4, 6, 3), np.uint8)
+        pool.release(buffer)
+        pool.release(buffer)
+
+        self.assertIs(pool.acquire((4, 6, 3), np.uint8), buffer)
+        self.assertIsNot(pool.acquire((4, 6, 3), np.uint8), buffer)
+
+    def test_plan_reuses_buffers(self):
+        pool = FramePool()
+        plan = ProcessingPlan.from_processors([_InvertProcessor(), _InvertProcessor(), _InvertProcessor()])
+        frame = np.full((4, 6, 3), 10, dtype=np.uint8)
+
+        for _ in range(10):
+            result = plan.process(frame, pool)
+            self.assertEqual(int(result[0, 0, 0]), 245)
+            pool.release(result)
+
+        # 中间结果用完马上放回去,始终只需要两个缓冲区
+        self.assertEqual(pool.get_allocated_count(), 2)
+        self.assertEqual(int(frame[0, 0, 0]), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+from fractions import Fraction
+from pathlib import Path
+
+from src.common.media_probe import MediaProbe
+
+TEST_VIDEO_PATH: Path = Path("001.mp4")
+
+
+class TestMediaProbe(unittest.TestCase):
+    def test_parse_video_and_audio(self):
+        probe_data = {
+            "streams": [
+                {"codec_type": "video", "codec_name": "h264", "width": 1920, "height": 1080,
+                 "pix_fmt": "yuv420p", "avg_frame_rate": "30000/1001", "r_frame_rate": "30000/1001",
+                 "nb_frames": "1800", "start_time": "1.400000"},
+                {"codec_type": "audio", "codec_name": "aac", "profile": "LC", "sample_rate": "44100",
+                 "channels": 2, "channel_layout": "stereo"},
+            ],
+            "format": {"duration": "60.060000"},
+        }
+        media_info = MediaProbe.parse(TEST_VIDEO_PATH, probe_data)
+
+        self.assertEqual(media_info.fps, Fraction(30000, 1001))
+        self.assertEqual(media_info.frame_count, 1800)
+        self.assertEqual((media_info.width, media_info.height), (1920, 1080))
+        self.assertEqual(media_info.video_codec, "h264")
+        self.assertTrue(media_info.has_audio)
+        self.assertEqual(media_info.audio_codec, "aac")
+        self.assertEqual(media_info.sample_rate, 44100)
+        self.assertEqual((media_info.audio_profile, media_info.audio_channels, media_info.audio_channel_layout),
+                         ("LC", 2, "stereo"))
+        self.assertTrue(media_info.is_constant_frame_rate)
+        self.assertEqual(media_info.start_time, 1.4)
+
+    def test_frame_count_estimated_from_duration(self):
+        probe_data = {
+            "streams": [{"codec_type": "video", "width": 640, "height": 480,
+                         "avg_frame_rate": "0/0", "r_frame_rate": "25/1"}],
+            "format": {"duration": "10.0"},
+        }
+        media_info = MediaProbe.parse(TEST_VIDEO_PATH, probe_data)
+
+        self.assertEqual(media_info.fps, Fraction(25))
+        self.assertEqual(media_info.frame_count, 250)
+        self.assertFalse(media_info.has_audio)
+        self.assertIsNone(media_info.sample_rate)
+        self.assertFalse(media_info.is_constant_frame_rate)
+        self.assertEqual(media_info.start_time, 0.0)
+
+    def test_rotation_from_display_matrix(self):
+        probe_data = {
+            "streams": [{"codec_type": "video", "width": 1920, "height": 1080, "avg_frame_rate": "30/1",
+                         "side_data_list": [{"side_data_type": "Display Matrix", "rotation": -90}]}],
+            "format": {"duration": "1.0"},
+        }
+        media_info = MediaProbe.parse(TEST_VIDEO_PATH, probe_data)
+
+        self.assertEqual(media_info.rotation, 90)
+        self.assertEqual((media_info.display_width, media_info.display_height), (1080, 1920))
+
+    def test_rotation_from_tag(self):
+        probe_data = {
+            "streams": [{"codec_type": "video", "width": 1920, "height": 1080, "avg_frame_rate": "30/1",
+                         "tags": {"rotate": "270"}}],
+            "format": {},
+        }
+        media_info = MediaProbe.parse(TEST_VIDEO_PATH, probe_data)
+
+        self.assertEqual(media_info.rotation, 270)
+        self.assertEqual(media_info.display_width, 1080)
+
+    def test_parse_keyframe_interval(self):
+        packet_flags = (['K__'] + ['___'] * 49) * 3 + ['K__']
+
+        self.assertEqual(MediaProbe.parse_keyframe_interval(packet_flags), 50)
+        self.assertEqual(MediaProbe.parse_keyframe_interval(['K_'] + ['__'] * 599), 600)
+        self.assertEqual(MediaProbe.parse_keyframe_interval(['__', '']), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+import sys
+import unittest
+
+from src.common.process_runner import ProcessCancelledError, ProcessRunner
+
+
+class TestProcessRunner(unittest.TestCase):
+    def test_finished_process_is_not_cancelled(self):
+        runner = ProcessRunner()
+        process = runner.popen([sys.executable, '-c', 'pass'])
+        process.wait()
+
+        # 进程已经正常退出,只是还没有调用wait
+        runner.terminate_all()
+
+        self.assertEqual(runner.wait(process), 0)
+
+    def test_running_process_is_cancelled(self):
+        runner = ProcessRunner()
+        process = runner.popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+
+        runner.terminate_all()
+
+        with self.assertRaises(ProcessCancelledError):
+            runner.wait(process)
+
+
+if __name__ == '__main__':
+    unittest.main()
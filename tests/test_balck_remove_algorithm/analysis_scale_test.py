@@ -0,0 +1,63 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from src.common.black_remove_algorithm.analysis_scale import AnalysisScale, refine_content_rect
+from src.common.black_remove_algorithm.profile_black_remover import find_content_rect
+
+
+def _create_letterbox_frame() -> np.ndarray:
+    # 3840x2160的画面,上下各有283像素的黑边,左右各有17像素的黑边,边缘不落在缩小之后的像素边界上
+    frame = np.zeros((2160, 3840, 3), dtype=np.uint8)
+    frame[283:1877, 17:3823] = 120
+    return frame
+
+
+class AnalysisScaleTest(unittest.TestCase):
+    def test_never_upscale(self):
+        scale = AnalysisScale(640, 360, analysis_height=720)
+
+        self.assertFalse(scale.is_scaled)
+        self.assertEqual((scale.width, scale.height), (640, 360))
+        self.assertEqual(scale.to_source_rect((1, 2, 3, 4)), (1, 2, 3, 4))
+
+    def test_zero_disables_scaling(self):
+        self.assertFalse(AnalysisScale(3840, 2160, analysis_height=0).is_scaled)
+
+    def test_source_rect_rounds_outward(self):
+        scale = AnalysisScale(3840, 2160, analysis_height=360)
+
+        self.assertEqual((scale.width, scale.height), (640, 360))
+        # 缩小6倍,(3, 47)-(637, 313)映射回去之后必须包含原始的(17, 283)-(3823, 1877)
+        self.assertEqual(scale.to_source_rect((3, 47, 634, 266)), (18, 282, 3804, 1596))
+        self.assertEqual(scale.to_source_rect((0, 0, 640, 360)), (0, 0, 3840, 2160))
+
+    def test_refine_finds_exact_edges(self):
+        frame = _create_letterbox_frame()
+        scale = AnalysisScale(3840, 2160, analysis_height=360)
+        coarse_rect = scale.to_source_rect(find_content_rect(scale.to_gray(frame)))
+
+        rect = refine_content_rect(frame, coarse_rect, scale.get_refine_margin())
+        self.assertEqual(rect, (17, 283, 3806, 1594))
+
+    def test_refine_uses_given_threshold(self):
+        # 左右两侧是亮度60的灰边,阈值60的时候灰边算黑边,默认阈值30的时候灰边算画面
+        frame = _create_letterbox_frame()
+        frame[283:1877, :17] = 60
+        frame[283:1877, 3823:] = 60
+        scale = AnalysisScale(3840, 2160, analysis_height=360)
+
+        with mock.patch('src.common.black_remove_algorithm.analysis_scale.cfg.get', return_value=True):
+            self.assertNotEqual(scale.refine([frame], (12, 282, 3816, 1596)), (17, 283, 3806, 1594))
+            self.assertEqual(scale.refine([frame], (12, 282, 3816, 1596), threshold=60), (17, 283, 3806, 1594))
+
+    def test_refine_disabled_keeps_coarse_rect(self):
+        scale = AnalysisScale(3840, 2160, analysis_height=360)
+
+        with mock.patch('src.common.black_remove_algorithm.analysis_scale.cfg.get', return_value=False):
+            self.assertEqual(scale.refine([_create_letterbox_frame()], (12, 282, 3816, 1596)), (12, 282, 3816, 1596))
+
+
+if __name__ == '__main__':
+    unittest.main()
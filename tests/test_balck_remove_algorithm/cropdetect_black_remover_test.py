@@ -0,0 +1,48 @@
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.common.black_remove_algorithm.analysis_scale import AnalysisScale
+from src.common.black_remove_algorithm.cropdetect_black_remover import CropDetectBlackRemover, parse_cropdetect_log
+
+CROPDETECT_LOG: list[str] = [
+    "Input #0, mov,mp4,m4a,3gp,3g2,mj2, from '001.mp4':",
+    "[Parsed_cropdetect_2 @ 0000020c] x1:0 x2:639 y1:47 y2:312 w:640 h:266 x:0 y:47 pts:0 t:0.000000 "
+    "limit:0.117647 crop=640:266:0:47",
+    "[Parsed_cropdetect_2 @ 0000020c] x1:0 x2:639 y1:47 y2:312 w:640 h:266 x:0 y:47 pts:30030 t:10.010000 "
+    "crop=640:266:0:47",
+    # 整帧都是黑色的帧
+    "[Parsed_cropdetect_2 @ 0000020c] x1:639 x2:0 y1:359 y2:0 w:-638 h:-358 x:640 y:360 pts:60060 t:20.020000 "
+    "crop=-640:-352:640:360",
+]
+
+
+class CropDetectBlackRemoverTest(unittest.TestCase):
+    def test_parse_cropdetect_log(self):
+        self.assertEqual(parse_cropdetect_log(CROPDETECT_LOG), [(0.0, (0, 47, 640, 266)), (10.01, (0, 47, 640, 266))])
+
+    @mock.patch('src.common.black_remove_algorithm.cropdetect_black_remover.probe_keyframe_sampling',
+                return_value=2)
+    def test_keyframe_command(self, _):
+        command = CropDetectBlackRemover().get_command(Path('001.mp4'), AnalysisScale(3840, 2160, 360), 216000, 500)
+
+        self.assertEqual(command[command.index('-i') - 3:command.index('-i')], ['-skip_frame', 'nokey', '-copyts'])
+        self.assertEqual(command[command.index('-vf') + 1],
+                         "select='not(mod(n\\,2))',scale=640:360:flags=area,"
+                         "cropdetect=limit=30:round=2:reset=1:skip=0")
+        self.assertEqual(command[command.index('-frames:v') + 1], '500')
+        self.assertEqual(command[command.index('-fps_mode') + 1], 'passthrough')
+        self.assertNotIn('-vsync', command)
+
+    @mock.patch('src.common.black_remove_algorithm.cropdetect_black_remover.probe_keyframe_sampling',
+                return_value=None)
+    def test_frame_stride_command(self, _):
+        command = CropDetectBlackRemover().get_command(Path('001.mp4'), AnalysisScale(640, 360, 360), 1000, 500)
+
+        self.assertNotIn('-skip_frame', command)
+        self.assertEqual(command[command.index('-vf') + 1],
+                         "select='not(mod(n\\,2))',cropdetect=limit=30:round=2:reset=1:skip=0")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from src.common.black_remove_algorithm.frame_sampler import (choose_sampling_mode, get_keyframe_step,
+                                                             get_sample_indices, read_sample_frames)
+from src.core.enums import SamplingMode
+
+FRAME_COUNT: int = 40
+
+
+def _write_test_video(path: Path) -> None:
+    # 每一帧的亮度等于帧序号乘以5,读出来之后可以知道是第几帧
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), 25, (64, 48))
+    for i in range(FRAME_COUNT):
+        writer.write(np.full((48, 64, 3), i * 5, dtype=np.uint8))
+    writer.release()
+
+
+class FrameSamplerTest(unittest.TestCase):
+    def test_sample_indices(self):
+        self.assertEqual(get_sample_indices(10, 5), [0, 2, 4, 6, 8])
+        self.assertEqual(get_sample_indices(10, 0), list(range(10)))
+
+    def test_choose_sampling_mode(self):
+        self.assertEqual(choose_sampling_mode(10, 250), SamplingMode.SEQUENTIAL)
+        self.assertEqual(choose_sampling_mode(1000, 250), SamplingMode.SEEK)
+        self.assertEqual(choose_sampling_mode(3, 1), SamplingMode.SEEK)
+        # 关键帧间隔未知时按照默认值估算
+        self.assertEqual(choose_sampling_mode(100, 0), SamplingMode.SEQUENTIAL)
+
+    def test_keyframe_step_respects_sample_count(self):
+        # 两小时30fps、每250帧一个关键帧的视频大约有864个关键帧
+        self.assertEqual(get_keyframe_step(216000, 250, 500), 2)
+        self.assertEqual(get_keyframe_step(216000, 250, 2000), 1)
+        # 关键帧太少或者关键帧间隔未知时不使用关键帧采样
+        self.assertIsNone(get_keyframe_step(1500, 250, 500))
+        self.assertIsNone(get_keyframe_step(216000, 0, 500))
+
+    def test_sequential_and_seek_read_same_frames(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            video_path = Path(temp_dir) / 'sample.avi'
+            _write_test_video(video_path)
+            indices = get_sample_indices(FRAME_COUNT, 8)
+
+            results = {}
+            for mode in SamplingMode:
+                video = cv2.VideoCapture(str(video_path))
+                results[mode] = [(i, round(float(frame.mean()) / 5)) for i, frame in
+                                 read_sample_frames(video, indices, mode)]
+                video.release()
+
+        self.assertEqual(results[SamplingMode.SEQUENTIAL], [(i, i) for i in indices])
+        self.assertEqual(results[SamplingMode.SEQUENTIAL], results[SamplingMode.SEEK])
+
+    def test_sequential_stops_at_end_of_video(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            video_path = Path(temp_dir) / 'sample.avi'
+            _write_test_video(video_path)
+            video = cv2.VideoCapture(str(video_path))
+            indices = [i for i, _ in read_sample_frames(video, [0, 39, 45], SamplingMode.SEQUENTIAL)]
+            video.release()
+
+        self.assertEqual(indices, [0, 39])
+
+
+if __name__ == '__main__':
+    unittest.main()
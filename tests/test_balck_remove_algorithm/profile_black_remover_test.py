@@ -0,0 +1,70 @@
+import unittest
+from fractions import Fraction
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+from src.common.black_remove_algorithm.profile_black_remover import (ProfileBlackRemover, find_content_rect,
+                                                                     find_content_rects)
+from src.config import cfg
+from src.core.datacls import MediaInfo
+
+MODULE: str = 'src.common.black_remove_algorithm.profile_black_remover'
+
+
+def _create_letterbox_frame(value: int = 120) -> np.ndarray:
+    # 1280x720的画面,上下各有100像素的黑边,左右各有40像素的黑边
+    frame = np.zeros((720, 1280), dtype=np.uint8)
+    frame[100:620, 40:1240] = value
+    return frame
+
+
+class ProfileBlackRemoverTest(unittest.TestCase):
+    def test_letterbox_frame(self):
+        self.assertEqual(find_content_rect(_create_letterbox_frame()), (40, 100, 1200, 520))
+
+    def test_small_logo_on_border_is_ignored(self):
+        frame = _create_letterbox_frame()
+        frame[20:60, 1100:1200] = 255
+
+        self.assertEqual(find_content_rect(frame), (40, 100, 1200, 520))
+
+    def test_batch_returns_rect_for_each_frame(self):
+        frames = np.stack([_create_letterbox_frame(), np.zeros((720, 1280), dtype=np.uint8)])
+
+        self.assertEqual(find_content_rects(frames), [(40, 100, 1200, 520), None])
+
+    def test_most_common_rect_ignores_black_frames(self):
+        frames = np.stack([_create_letterbox_frame()] * 3 + [np.zeros((720, 1280), dtype=np.uint8)] * 5)
+
+        self.assertEqual(find_content_rect(frames), (40, 100, 1200, 520))
+
+    def test_black_video_returns_full_frame(self):
+        self.assertEqual(find_content_rect(np.zeros((4, 720, 1280), dtype=np.uint8)), (0, 0, 1280, 720))
+
+    def test_keyframe_progress_uses_sample_count(self):
+        media_info = MediaInfo(path=Path('001.mp4'), width=1280, height=720, fps=Fraction(30), duration=7200.0,
+                               frame_count=216000)
+        samples = [(n, _create_letterbox_frame()) for n in range(4)]
+        progress_callback = mock.MagicMock()
+        # 最多采样4帧,不缩小分析分辨率
+        config = {cfg.video_sample_frame_number: 4}
+
+        with mock.patch(f'{MODULE}.MediaProbe') as media_probe, \
+                mock.patch(f'{MODULE}.cv2.VideoCapture'), \
+                mock.patch(f'{MODULE}.cfg.get', side_effect=lambda item: config.get(item, 0)), \
+                mock.patch(f'{MODULE}.probe_keyframe_sampling', return_value=2), \
+                mock.patch(f'{MODULE}.read_keyframe_samples', return_value=iter(samples)), \
+                mock.patch.object(Path, 'exists', return_value=True):
+            media_probe.return_value.probe.return_value = media_info
+            rect = ProfileBlackRemover().remove_black('001.mp4', progress_callback)
+
+        self.assertEqual(rect, (40, 100, 1200, 520))
+        # 只分析关键帧的时候序号是第几个采样,进度的最大值是采样数量而不是总帧数
+        self.assertEqual([each.args for each in progress_callback.call_args_list[:-1]],
+                         [(0, 4), (1, 4), (2, 4), (3, 4)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import cv2
+import numpy as np
+
+from src.common.frame_pool import FramePool
+from src.common.processors.base_processor import ProcessingPlan, ShapeContext
+from src.common.processors.opencv_processors.crop_processor import CropProcessor
+from src.common.processors.opencv_processors.geometry_processor import GeometryProcessor
+from src.common.processors.opencv_processors.resize_processor import ResizeProcessor
+from src.common.processors.opencv_processors.rotate_processor import RotateProcessor
+from src.core.enums import Orientation
+
+
+class GeometryProcessorTest(unittest.TestCase):
+    def setUp(self):
+        self.global_var = {
+                "crop_x": 10,
+                "crop_y": 20,
+                "crop_width": 120,
+                "crop_height": 200,
+                "rotation_angle": 0,
+                "orientation": Orientation.HORIZONTAL,
+                "target_width": 320,
+                "target_height": 180,
+                }
+        # 平滑的渐变,不同插值实现之间的误差很小
+        rows, columns = np.indices((240, 160))
+        self.frame = np.dstack([rows, columns, (rows + columns) // 2]).astype(np.uint8)
+
+    def _create_processor(self, processor_type):
+        processor = processor_type()
+        processor._processor_global_var.get = MagicMock(side_effect=lambda key: self.global_var.get(key))
+        return processor
+
+    def _process_by_reference(self, frame: np.ndarray) -> np.ndarray:
+        for processor_type in (CropProcessor, RotateProcessor, ResizeProcessor):
+            frame = self._create_processor(processor_type).process(frame)
+        return frame
+
+    def _process(self, merge_video: bool, interpolation: int = cv2.INTER_LINEAR) -> tuple[np.ndarray, np.ndarray]:
+        with patch('src.common.processors.opencv_processors.geometry_processor.cfg.get', return_value=merge_video), \
+                patch('src.common.processors.opencv_processors.resize_processor.cfg.get', return_value=merge_video), \
+                patch.object(ResizeProcessor, 'get_interpolation', return_value=interpolation):
+            return self._process_by_reference(self.frame), self._create_processor(GeometryProcessor).process(self.frame)
+
+    def test_crop_only_returns_same_pixels(self):
+        self.global_var["orientation"] = Orientation.VERTICAL
+        expected, result = self._process(merge_video=False)
+        np.testing.assert_array_equal(result, expected)
+
+    def test_crop_and_rotate_matches_reference(self):
+        for angle in (0, 90, 180, 270):
+            with self.subTest(angle=angle):
+                self.global_var["rotation_angle"] = angle
+                expected, result = self._process(merge_video=False)
+                self.assertEqual(result.shape, expected.shape)
+                np.testing.assert_array_equal(result, expected)
+
+    def test_crop_rotate_and_resize_matches_reference(self):
+        self.global_var["rotation_angle"] = 90
+        expected, result = self._process(merge_video=True)
+        self.assertEqual(result.shape, (180, 320, 3))
+        # 边缘的插值方式和cv2.resize不完全一样,只比较平均误差
+        self.assertLess(np.abs(result.astype(np.int16) - expected.astype(np.int16)).mean(), 2)
+
+    def test_resize_pads_with_black(self):
+        self.global_var["target_width"] = 400
+        expected, result = self._process(merge_video=True)
+        self.assertEqual(result.shape, expected.shape)
+        pad_left = (400 - 300) // 2
+        self.assertFalse(result[:, :pad_left - 1].any())
+        self.assertFalse(result[:, -pad_left + 1:].any())
+
+    def test_output_shape_matches_processed_frame(self):
+        for merge_video in (False, True):
+            for angle in (0, 90, 180, 270):
+                with self.subTest(merge_video=merge_video, angle=angle):
+                    self.global_var["rotation_angle"] = angle
+                    _, result = self._process(merge_video=merge_video)
+                    shape = GeometryProcessor.output_shape(self.frame.shape, ShapeContext(self.global_var, merge_video))
+                    self.assertEqual(shape, result.shape)
+
+    def test_plan_outputs_are_not_shared(self):
+        # 编码之前排队的帧不能互相覆盖,只有剪裁的时候也不能返回原始帧的视图
+        for orientation, merge_video in ((Orientation.VERTICAL, False), (Orientation.HORIZONTAL, True)):
+            self.global_var["orientation"] = orientation
+            with self.subTest(orientation=orientation, merge_video=merge_video), \
+                    patch('src.common.processors.opencv_processors.geometry_processor.cfg.get',
+                          return_value=merge_video):
+                processor = self._create_processor(GeometryProcessor)
+                plan = ProcessingPlan.from_processors([processor], ShapeContext(self.global_var, merge_video))
+                pool = FramePool()
+                frames = [self.frame, 255 - self.frame]
+
+                results = [plan.process(frame, pool) for frame in frames]
+
+                self.assertIsNot(results[0], results[1])
+                for frame, result in zip(frames, results):
+                    self.assertTrue(result.flags.c_contiguous)
+                    np.testing.assert_array_equal(result, processor.process(frame))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+from src.common.processors.base_processor import OpenCVProcessor
+from src.common.processors.opencv_processors.deshake_processor import DeshakeProcessor
+from src.common.processors.opencv_processors.opencv_processor_registry import (get_all_capabilities,
+                                                                              get_processor_type,
+                                                                              register_processor)
+
+
+class OpenCVProcessorRegistryTest(unittest.TestCase):
+    def test_builtin_processors_are_listed(self):
+        capabilities = {x.name: x for x in get_all_capabilities()}
+
+        self.assertIn('GeometryProcessor', capabilities)
+        self.assertTrue(capabilities['DeshakeProcessor'].is_stateful)
+        self.assertTrue(capabilities['GeometryProcessor'].changes_geometry)
+        self.assertTrue(capabilities['WhiteBalanceProcessor'].is_pointwise)
+        self.assertEqual(capabilities['DeblockProcessor'].ffmpeg_filter, 'deblock')
+        self.assertIs(get_processor_type('DeshakeProcessor'), DeshakeProcessor)
+
+    def test_geometry_processors_override_output_shape(self):
+        for capabilities in get_all_capabilities():
+            processor_type = get_processor_type(capabilities.name)
+            with self.subTest(name=capabilities.name):
+                overrides_output_shape = processor_type.output_shape is not OpenCVProcessor.output_shape
+                self.assertEqual(overrides_output_shape, capabilities.changes_geometry)
+
+    def test_register_processor(self):
+        @register_processor
+        class _CustomProcessor(OpenCVProcessor):
+            relative_cost = 3
+
+            def process(self, frame):
+                return frame
+
+        self.assertIs(get_processor_type('_CustomProcessor'), _CustomProcessor)
+        self.assertIn(3, [x.relative_cost for x in get_all_capabilities() if x.name == '_CustomProcessor'])
+        with self.assertRaises(KeyError):
+            get_processor_type('UnknownProcessor')
+
+
+if __name__ == '__main__':
+    unittest.main()
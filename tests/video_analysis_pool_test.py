@@ -0,0 +1,35 @@
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from src.common.task_scheduler.video_analysis_pool import VideoAnalysisPool
+
+
+class FakeVideoInfoReader:
+    def __init__(self, video_path: Path):
+        self.video_path = video_path
+
+    def get_video_info(self, black_remove_algorithm, crop_enabled: bool = True, progress_callback=None):
+        # 每一个视频100帧,分析到一半的时候汇报一次进度
+        progress_callback(50, 100)
+        return self.video_path
+
+
+class TestVideoAnalysisPool(unittest.TestCase):
+    @patch('src.common.task_scheduler.video_analysis_pool.VideoInfoReader', FakeVideoInfoReader)
+    @patch('src.common.task_scheduler.video_analysis_pool.ProgressAggregator')
+    def test_each_video_reports_to_its_own_callback(self, mock_progress_aggregator):
+        aggregator = mock_progress_aggregator.return_value
+        video_path_list = [Path(f'{i}.mp4') for i in range(3)]
+
+        result = VideoAnalysisPool(3).analyze_all(video_path_list, None)
+
+        self.assertEqual(result, video_path_list)
+        # 进度经过汇总之后才发送到详细进度条,不同视频的帧数不会互相覆盖
+        self.assertEqual(sorted(x.args[0] for x in aggregator.create_callback.call_args_list), [0, 1, 2])
+        self.assertEqual(aggregator.create_callback.return_value.call_count, 3)
+        self.assertEqual(sorted(x.args[0] for x in aggregator.finish.call_args_list), [0, 1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import threading
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from src.common.task_scheduler.video_process_pool import VideoProcessPool
+
+
+class TestVideoProcessPool(unittest.TestCase):
+    def test_results_keep_index(self):
+        def process(index, video_info, progress_callback):
+            return video_info.video_path
+
+        video_infos = [SimpleNamespace(video_path=Path(f'{x}.mp4')) for x in 'abc']
+        result = dict(VideoProcessPool(2).process(enumerate(video_infos), process))
+
+        self.assertEqual(result, {0: Path('a.mp4'), 1: Path('b.mp4'), 2: Path('c.mp4')})
+
+    def test_failure_stops_and_closes_input(self):
+        input_closed = threading.Event()
+        stop_input = MagicMock()
+
+        def video_infos():
+            try:
+                index: int = 0
+                while True:
+                    yield index, SimpleNamespace(video_path=Path(f'{index}.mp4'))
+                    index += 1
+            finally:
+                input_closed.set()
+
+        def process(index, video_info, progress_callback):
+            raise ValueError("处理失败")
+
+        with self.assertRaises(ValueError):
+            for _ in VideoProcessPool(1).process(video_infos(), process, stop_input):
+                pass
+
+        stop_input.assert_called_once()
+        # 输入的生成器在读取线程里面被关闭,生成器里面的finally一定会执行
+        self.assertTrue(input_closed.wait(5))
+
+
+if __name__ == '__main__':
+    unittest.main()